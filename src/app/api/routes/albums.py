@@ -1,12 +1,13 @@
 import logging
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
 from fastapi import APIRouter, Depends
 from starlette.responses import HTMLResponse
 
 from app.config import generate_table, app
-from app.dependencies import get_albums
+from app.dependencies import get_albums, get_library
 from app.model.model import Album
+from storage.postgres.spotify_library_postgres import PostgresLibrary
 
 router = APIRouter()
 router.data = {}
@@ -19,9 +20,34 @@ async def list_albums(
     limit: int = 12,
     sort: str = None,
     field: str = 'name',
-    albums: Annotated[List[Album], Depends(get_albums)] = None
+    search: str = None,
+    type: str = None,
+    artist_id: str = None,
+    year: int = None,
+    cursor: str = None,
+    albums: Annotated[List[Album], Depends(get_albums)] = None,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
 ):
     logger.info(f"Getting albums page {page}")
+    if library:
+        albums_page = await library.get_albums(
+            search=search,
+            type=type,
+            artist_id=artist_id,
+            year=year,
+            page=page,
+            limit=limit,
+            sort=sort,
+            field=field,
+            cursor=cursor,
+        )
+        return {
+            "albums": albums_page.items,
+            "total": albums_page.total,
+            "total_filtered": albums_page.total_filtered,
+            "total_returned": len(albums_page.items),
+            "next_cursor": albums_page.next_cursor,
+        }
     total = len(app.albums)
     total_filtered = len(albums)
     logger.info(f"Total albums: {total}, filtered albums: {total_filtered}")
@@ -46,7 +72,7 @@ async def list_albums(
             "artists": album_data.get("artists", []),
             "images": album_data.get("images", []),
             "release_date": album_data.get("release_date", ""),
-            "artists_joined": ", ".join([artist.get("name", "") for artist in album_data.get("artists", [])]),
+            "artists_joined": album_data.get("artists_joined", ""),
             "album_type": album_data.get("album_type", ""),
             "label": album_data.get("label", ""),
             "total_tracks": album_data.get("total_tracks", 0),
@@ -1,12 +1,13 @@
 import logging
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
 from fastapi import APIRouter, Depends
 from starlette.responses import HTMLResponse
 
 from app.config import generate_table, app
 from app.model.model import Artist
-from app.dependencies import get_artists
+from app.dependencies import get_artists, get_library
+from storage.postgres.spotify_library_postgres import PostgresLibrary
 
 router = APIRouter()
 router.data = {}
@@ -18,9 +19,24 @@ async def list_artists(
     page: int = 1,
     limit: int = 12,
     sort: str = None,
-    artists: Annotated[List[Artist], Depends(get_artists)] = None
+    search: str = None,
+    genre: str = None,
+    cursor: str = None,
+    artists: Annotated[List[Artist], Depends(get_artists)] = None,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
 ):
     logger.info(f"Getting artists page {page}")
+    if library:
+        artists_page = await library.get_artists(
+            search=search, genre=genre, page=page, limit=limit, sort=sort, cursor=cursor
+        )
+        return {
+            "artists": artists_page.items,
+            "total": artists_page.total,
+            "total_filtered": artists_page.total_filtered,
+            "total_returned": len(artists_page.items),
+            "next_cursor": artists_page.next_cursor,
+        }
     total = len(app.artists)  # Get total count of all artists
     total_filtered = len(artists)
 
@@ -10,6 +10,8 @@ _cache_lock = threading.Lock()
 @router.get("/genres", response_class=JSONResponse)
 async def list_genres():
     global _genres_cache
+    if app.library:
+        return {"genres": await app.library.get_genres()}
     if _genres_cache is None:
         with _cache_lock:
             if _genres_cache is None:  # Double-checked locking
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from utils.metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
@@ -1,12 +1,13 @@
 import logging
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
 from fastapi import APIRouter, Depends
 from starlette.responses import JSONResponse, HTMLResponse
 
 from app.config import generate_table, app
-from app.dependencies import get_playlists
+from app.dependencies import get_playlists, get_library
 from app.model.model import Playlist
+from storage.postgres.spotify_library_postgres import PostgresLibrary
 
 router = APIRouter()
 router.data = {}
@@ -18,9 +19,22 @@ async def list_playlists(
     page: int = 1,
     limit: int = 12,
     sort: str = None,
-    playlists: Annotated[List[dict], Depends(get_playlists)] = None
+    search: str = None,
+    cursor: str = None,
+    playlists: Annotated[List[dict], Depends(get_playlists)] = None,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
 ):
     logger.info(f"Getting playlists page {page}")
+    if library:
+        playlists_page = await library.get_playlists(
+            search=search, page=page, limit=limit, sort=sort, cursor=cursor
+        )
+        return {
+            "playlists": playlists_page.items,
+            "total": playlists_page.total,
+            "total_filtered": playlists_page.total_filtered,
+            "next_cursor": playlists_page.next_cursor,
+        }
     total = len(app.playlists)
     total_filtered = len(playlists)
     
@@ -0,0 +1,58 @@
+import logging
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.responses import JSONResponse
+
+from app.dependencies import get_library
+from spotify.spotify_postgres_stats import (
+    ALBUMS_PER_LABEL,
+    TOP_ARTISTS,
+    TOP_GENRES,
+    TRACKS_PER_DECADE,
+)
+from storage.postgres.spotify_library_postgres import PostgresLibrary
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+
+async def get_stats(library: Optional[PostgresLibrary], name: str, limit: int):
+    logger.info(f"Getting stats {name}")
+    if not library:
+        raise HTTPException(
+            status_code=404, detail="Stats are only served by the postgres backend"
+        )
+    return {name: await library.get_stats(name, limit)}
+
+
+@router.get("/stats/tracks_per_decade", response_class=JSONResponse)
+async def tracks_per_decade(
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
+):
+    return await get_stats(library, TRACKS_PER_DECADE, 50)
+
+
+@router.get("/stats/top_genres", response_class=JSONResponse)
+async def top_genres(
+    limit: int = 50,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
+):
+    return await get_stats(library, TOP_GENRES, limit)
+
+
+@router.get("/stats/albums_per_label", response_class=JSONResponse)
+async def albums_per_label(
+    limit: int = 50,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
+):
+    return await get_stats(library, ALBUMS_PER_LABEL, limit)
+
+
+@router.get("/stats/top_artists", response_class=JSONResponse)
+async def top_artists(
+    limit: int = 50,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
+):
+    return await get_stats(library, TOP_ARTISTS, limit)
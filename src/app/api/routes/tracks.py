@@ -1,12 +1,13 @@
 import logging
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
 from fastapi import APIRouter, Depends
 from starlette.responses import JSONResponse, HTMLResponse
 
 from app.config import generate_table, app
 from app.model.model import Track
-from app.dependencies import get_tracks, get_album_tracks
+from app.dependencies import get_tracks, get_album_tracks, get_library
+from storage.postgres.spotify_library_postgres import PostgresLibrary
 
 router = APIRouter()
 router.data = {}
@@ -20,9 +21,31 @@ async def list_tracks(
     limit: int = 12,
     sort: str = None,
     field: str = 'name',
-    tracks: Annotated[List[Track], Depends(get_tracks)] = None
+    search: str = None,
+    artist_id: str = None,
+    album_id: str = None,
+    cursor: str = None,
+    tracks: Annotated[List[Track], Depends(get_tracks)] = None,
+    library: Annotated[Optional[PostgresLibrary], Depends(get_library)] = None,
 ):
     logger.info(f"Getting tracks page {page}")
+    if library:
+        tracks_page = await library.get_tracks(
+            search=search,
+            artist_id=artist_id,
+            album_id=album_id,
+            page=page,
+            limit=limit,
+            sort=sort,
+            field=field,
+            cursor=cursor,
+        )
+        return {
+            "tracks": tracks_page.items,
+            "total": tracks_page.total,
+            "total_filtered": tracks_page.total_filtered,
+            "next_cursor": tracks_page.next_cursor,
+        }
     total = len(app.tracks)
     total_filtered = len(tracks)
     
@@ -51,7 +74,7 @@ async def list_tracks(
             "name": track_info.get("name", ""),
             "artists": track_info.get("artists", []),
             "duration_ms": track_info.get("duration_ms", 0),
-            "artists_joined": ", ".join([artist.get("name", "") for artist in track_info.get("artists", [])]),
+            "artists_joined": track_info.get("artists_joined", ""),
             "_album": album_info,
             "preview_url": track_info.get("preview_url", ""),
             "track_number": track_info.get("track_number", 0),
@@ -33,6 +33,7 @@ class MyFastAPI(FastAPI):
     playlist_tracks: dict | None = None
     unique_playlist_tracks: dict | None = None
     spotify_playlist_maker: object | None = None
+    library: object | None = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -1,5 +1,7 @@
 import logging
-from typing import List
+from typing import List, Optional
+
+from fastapi import HTTPException
 
 from app.config import app
 from app.model.model import Artist, Album, Track
@@ -13,10 +15,13 @@ from spotify.spotify_utils import (
     PLAYLIST_TRACKS,
     UNIQUE_PLAYLIST_TRACKS,
 )
+from storage.postgres.spotify_library_postgres import decode_cursor
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced()
 def get_loaded_data():
     app.all_data = {}
     app.all_data[SAVED_ARTISTS] = app.artists
@@ -30,10 +35,24 @@ def get_loaded_data():
     return app.all_data
 
 
+@traced()
 def get_album_tracks():
     return app.album_tracks
 
 
+@traced()
+def get_library(cursor: Optional[str] = None):
+    """The Postgres library when the API serves from Postgres, otherwise None.
+    A ``cursor`` the library can't decode is the client's error."""
+    if app.library and cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return app.library
+
+
+@traced()
 async def playlist_maker():
     logger.info("Getting SpotifyPlaylistMaker")
     if not app.spotify_playlist_maker:
@@ -48,6 +67,7 @@ async def playlist_maker():
     return app.spotify_playlist_maker
 
 
+@traced()
 async def get_artists(
     page: int = 1,
     limit: int = 12,
@@ -56,7 +76,7 @@ async def get_artists(
     genre: str = None,
 ) -> List[Artist]:
     # Get all artists
-    artists = app.artists
+    artists = app.artists or []
 
     # Apply search filter if provided
     if search:
@@ -91,6 +111,7 @@ async def get_artists(
     return artists
 
 
+@traced()
 async def get_albums(
     page: int = 1,
     limit: int = 12,
@@ -100,7 +121,7 @@ async def get_albums(
     type: str = None,
 ) -> List[Album]:
     # Get all albums
-    albums = app.albums
+    albums = app.albums or []
 
     # Apply search filter if provided
     if search:
@@ -123,9 +144,7 @@ async def get_albums(
         if field == 'artist':
             albums = sorted(
                 albums,
-                key=lambda x: ", ".join(
-                    [artist.get("name", "") for artist in x.get('artists', [])]
-                ).lower(),
+                key=lambda x: x.get("artists_joined", "").lower(),
                 reverse=(sort == 'desc'),
             )
         else:
@@ -143,6 +162,7 @@ async def get_albums(
     # return albums[start_idx:end_idx]
 
 
+@traced()
 async def get_tracks(
     page: int = 1,
     limit: int = 12,
@@ -151,7 +171,7 @@ async def get_tracks(
     search: str = None,
 ) -> List[Track]:
     # Get all tracks
-    tracks = app.tracks
+    tracks = app.tracks or []
 
     # Apply search filter if provided
     if search:
@@ -175,9 +195,6 @@ async def get_tracks(
                 tracks, key=lambda x: x.get('duration_ms', 0), reverse=(sort == 'desc')
             )
         elif field == 'artists_joined':
-            for track in tracks:
-                track["artists_joined"] = ", ".join([artist.get("name", "") for artist in track.get("artists", [])]),
-
             tracks = sorted(
                 tracks,
                 key=lambda x: x.get("artists_joined", ""),
@@ -196,11 +213,12 @@ async def get_tracks(
     return tracks[start_idx:end_idx]
 
 
+@traced()
 async def get_playlists(
     page: int = 1, limit: int = 12, sort: str = None, search: str = None
 ) -> List[dict]:
     # Get all playlists
-    playlists = app.playlists
+    playlists = app.playlists or []
 
     # Apply search filter if provided
     if search:
@@ -11,11 +11,15 @@ from starlette.templating import Jinja2Templates
 from app.api.routes.albums import router as albums_router
 from app.api.routes.artists import router as artists_router
 from app.api.routes.genres import router as genres_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.playlist_creation import router as playlist_creation_router
 from app.api.routes.playlists import router as playlists_router
 from app.api.routes.tracks import router as tracks_router
 from app.api.routes.save_data import router as save_data_router
+from app.api.routes.stats import router as stats_router
 from app.config import app
+from utils.metrics import HTTP_REQUEST_SECONDS
+from utils.tracing import span
 
 # Add CORS middleware
 app.add_middleware(
@@ -35,6 +39,8 @@ app.include_router(albums_router, tags=["albums"])
 app.include_router(artists_router, tags=["artists"])
 app.include_router(genres_router, tags=["genres"])
 app.include_router(save_data_router, tags=["save_data"])
+app.include_router(stats_router, tags=["stats"])
+app.include_router(metrics_router, tags=["metrics"])
 app.include_router(playlist_creation_router, tags=["playlist_creation"])
 templates = Jinja2Templates(directory="src/app/templates")
 
@@ -52,13 +58,25 @@ if not logger.hasHandlers():  # Prevent duplicate handlers
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     logger.info(f"⬆️ Request: {request.method} {request.url}")
 
-    response = await call_next(request)
-
-    process_time = time.time() - start_time
+    with span("http.request", method=request.method) as request_span:
+        response = await call_next(request)
+        # the route template, so /tracks/{id} is one series rather than one per id
+        route = request.scope.get("route")
+        route_path = route.path if route else "unmatched"
+        request_span.set_attribute("route", route_path)
+        request_span.set_attribute("status", response.status_code)
+
+    process_time = time.perf_counter() - start_time
+    HTTP_REQUEST_SECONDS.observe(
+        process_time,
+        method=request.method,
+        route=route_path,
+        status=response.status_code,
+    )
     logger.info(
         f"⬇️ Response: {request.method} {request.url} - {response.status_code} - {process_time:.4f}s"
     )
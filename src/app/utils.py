@@ -1,8 +1,12 @@
 import logging
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from postgres.postgres_driver import close_shared_pools, get_shared_pool
+from storage.postgres.spotify_library_postgres import PostgresLibrary
+from spotify.spotify_enrich import enrich_snapshot
 from spotify.spotify_utils import get_memory_usage, get_data_location, unzip_data_from_zip, get_latest_zip, \
     SAVED_ALBUMS, SAVED_ARTISTS, SAVED_TRACKS, PLAYLISTS
 
@@ -11,6 +15,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger("fastapi_app")
 
+# "memory" loads the latest snapshot zips, "postgres" serves from the spot_* tables
+LIBRARY_BACKEND = "LIBRARY_BACKEND"
+MEMORY_BACKEND = "memory"
+POSTGRES_BACKEND = "postgres"
+
+
+def get_library_backend() -> str:
+    return os.environ.get(LIBRARY_BACKEND, MEMORY_BACKEND).lower()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -19,12 +33,21 @@ async def lifespan(app: FastAPI):
     """
     logger.info("Starting up FastAPI application")
     try:
-        await load_data(app)
+        if get_library_backend() == POSTGRES_BACKEND:
+            await connect_library(app)
+        else:
+            await load_data(app)
         yield  # This is where the app runs
     finally:
         logger.info("Shutting down FastAPI application")
-        # Perform any cleanup here if necessary
+        if app.library:
+            await close_shared_pools()
+            app.library = None
+
 
+async def connect_library(app: FastAPI):
+    logger.info("Serving the library from Postgres")
+    app.library = PostgresLibrary(await get_shared_pool())
 
 
 async def load_data(app: FastAPI):
@@ -37,16 +60,19 @@ async def load_data(app: FastAPI):
         #     get_latest_zip(raw_data_location, SAVED_ALBUM_TRACKS)
         # )
         logger.info("Album tracks loaded")
-        app.albums = unzip_data_from_zip(
-            get_latest_zip(raw_data_location, SAVED_ALBUMS)
+        # snapshots from before derived fields were stored get them here
+        app.albums = enrich_snapshot(
+            SAVED_ALBUMS,
+            unzip_data_from_zip(get_latest_zip(raw_data_location, SAVED_ALBUMS)),
         )
         logger.info("Albums loaded")
         app.artists = unzip_data_from_zip(
             get_latest_zip(raw_data_location, SAVED_ARTISTS)
         )
         logger.info("Artists loaded")
-        app.tracks = unzip_data_from_zip(
-            get_latest_zip(raw_data_location, SAVED_TRACKS)
+        app.tracks = enrich_snapshot(
+            SAVED_TRACKS,
+            unzip_data_from_zip(get_latest_zip(raw_data_location, SAVED_TRACKS)),
         )
         logger.info("Tracks loaded")
         app.playlists = unzip_data_from_zip(
@@ -0,0 +1,620 @@
+"""An offline stand-in for the parts of the Spotify Web API we call.
+
+Serves a synthetic library (or snapshots on disk) through the same paginated
+endpoints the getters and the playlist maker use, so the fetch pipeline can
+be load tested without a Spotify account or quota:
+
+- ``GET me``, ``me/tracks``, ``me/albums``, ``me/playlists``
+- ``GET me/following?type=artist``, paged with an ``after`` cursor
+- ``GET playlists/{id}/tracks`` (and ``/items``, which newer spotipy calls)
+- ``GET search?type=track``
+- ``POST users/{user}/playlists`` and ``me/playlists``, ``PUT playlists/{id}``
+- ``POST``, ``PUT`` and ``DELETE playlists/{id}/tracks`` to add, reorder,
+  replace and remove items
+
+Latency, the largest page the server hands out, a requests-per-second budget
+and random 429s and 5xx faults are set in ``MockSpotifyConfig``. Rate limited
+responses carry ``Retry-After`` as Spotify's do. ``GET /mock/stats`` counts
+the requests and faults served, for the benchmark to report.
+
+Point a spotipy client at a running server with ``mock_spotify_client``.
+"""
+import argparse
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import Flask, abort, jsonify, request
+from pydantic import BaseModel
+from spotipy import Spotify
+from werkzeug.exceptions import HTTPException
+from werkzeug.serving import make_server
+
+from benchmarks.synthetic_library import (
+    DEFAULT_SEED,
+    USER_DISPLAY_NAME,
+    SyntheticLibrary,
+)
+from spotify.spotify_enrich import ARTISTS_JOINED, DURATION_MIN, RELEASE_YEAR
+from spotify.spotify_utils import (
+    OTHER_PLAYLISTS,
+    PLAYLIST_TRACKS,
+    PLAYLISTS,
+    SAVED_ALBUMS,
+    SAVED_ARTISTS,
+    SAVED_TRACKS,
+    most_recent_directory,
+    setup_app_logging,
+    unzip_data_from_zip,
+)
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/v1"
+ADDED_AT = "2024-01-01T00:00:00Z"
+# Spotify's own caps
+MAX_LIBRARY_PAGE_SIZE = 50
+MAX_PLAYLIST_ITEMS_PAGE_SIZE = 100
+MAX_SEARCH_OFFSET = 1_000
+MAX_ITEMS_PER_WRITE = 100
+SERVER_ERROR_STATUSES = (500, 502, 503)
+# the getters add these after a fetch, the real API doesn't send them
+DERIVED_FIELDS = (ARTISTS_JOINED, RELEASE_YEAR, DURATION_MIN)
+SERVED_DATA_TYPES = (
+    SAVED_ARTISTS,
+    SAVED_ALBUMS,
+    SAVED_TRACKS,
+    PLAYLISTS,
+    OTHER_PLAYLISTS,
+    PLAYLIST_TRACKS,
+)
+
+
+class MockSpotifyConfig(BaseModel):
+    latency_ms: float = 0
+    # added on top of latency_ms, uniformly between 0 and this
+    latency_jitter_ms: float = 0
+    # pages are cut to these sizes whatever limit the client asks for; the
+    # response's limit and next link say so
+    max_page_size: int = MAX_LIBRARY_PAGE_SIZE
+    max_playlist_items_page_size: int = MAX_PLAYLIST_ITEMS_PAGE_SIZE
+    # requests over this rate get a 429, None for no budget
+    requests_per_second: Optional[float] = None
+    # chance of a 429 or a 5xx on any request, on top of the budget
+    rate_limit_ratio: float = 0
+    server_error_ratio: float = 0
+    retry_after: int = 1
+    seed: int = DEFAULT_SEED
+
+
+def strip_derived_fields(record: Optional[dict]) -> Optional[dict]:
+    """A shallow copy of ``record`` as Spotify sends it."""
+    if record is None:
+        return None
+    record = {k: v for k, v in record.items() if k not in DERIVED_FIELDS}
+    if isinstance(record.get("album"), dict):
+        record["album"] = strip_derived_fields(record["album"])
+    if isinstance(record.get("tracks"), dict) and "items" in record["tracks"]:
+        record["tracks"] = dict(
+            record["tracks"],
+            items=[strip_derived_fields(track) for track in record["tracks"]["items"]],
+        )
+    return record
+
+
+def playlist_item(track: Optional[dict]) -> dict:
+    return {
+        "added_at": ADDED_AT,
+        "added_by": {"id": USER_DISPLAY_NAME, "type": "user"},
+        "is_local": bool(track and track.get("is_local")),
+        "primary_color": None,
+        "track": strip_derived_fields(track),
+        "video_thumbnail": {"url": None},
+    }
+
+
+def load_snapshots(raw_data_location: str) -> Dict[str, object]:
+    """The served snapshots from the most recent folder under
+    ``raw_data_location``, as ``write_synthetic_library`` or a fetch left them."""
+    data_location = f"{raw_data_location}/{most_recent_directory(raw_data_location)}"
+    logger.info(f"Serving snapshots from {data_location}")
+    return {
+        data_type: unzip_data_from_zip(f"{data_location}/{data_type}.gz")
+        for data_type in SERVED_DATA_TYPES
+    }
+
+
+class TokenBucket:
+    """Allows ``rate`` requests a second, in bursts of up to a second's worth."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 if a request may go ahead, else the seconds until it could."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class MockSpotifyApi:
+    """The served library, its playlist edits and the Flask app serving them."""
+
+    def __init__(
+        self, data: Dict[str, object], config: Optional[MockSpotifyConfig] = None
+    ) -> None:
+        self.config = config or MockSpotifyConfig()
+        self.saved_tracks: List[dict] = data[SAVED_TRACKS]
+        self.saved_albums: List[dict] = data[SAVED_ALBUMS]
+        self.artists: List[dict] = data[SAVED_ARTISTS]
+        self.artist_positions = {
+            artist["id"]: position for position, artist in enumerate(self.artists)
+        }
+        self.playlists: List[dict] = [
+            dict(playlist, tracks=dict(playlist["tracks"]))
+            for playlist in data[PLAYLISTS] + data[OTHER_PLAYLISTS]
+        ]
+        self.playlists_by_id = {playlist["id"]: playlist for playlist in self.playlists}
+        playlist_tracks: Dict[str, list] = data[PLAYLIST_TRACKS]
+        self.playlist_tracks: Dict[str, List[Optional[dict]]] = {
+            playlist["id"]: list(playlist_tracks.get(playlist["id"]) or [])
+            for playlist in self.playlists
+        }
+        self.tracks_by_uri: Dict[str, dict] = {
+            track["uri"]: track
+            for tracks in [self.saved_tracks, *self.playlist_tracks.values()]
+            for track in tracks
+            if track
+        }
+        self.searchable_tracks = [
+            (track["name"].lower(), track)
+            for track in self.tracks_by_uri.values()
+            if not track.get("is_local")
+        ]
+
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.config.seed)
+        self.token_bucket = (
+            TokenBucket(self.config.requests_per_second)
+            if self.config.requests_per_second
+            else None
+        )
+        self.stats: Counter = Counter()
+        self.snapshot_versions: Counter = Counter()
+        self.next_playlist_number = 0
+        self.app = self.create_app()
+
+    def create_app(self) -> Flask:
+        app = Flask(__name__)
+        # spotipy asks for "me/"
+        app.url_map.strict_slashes = False
+        app.before_request(self.before_request)
+        app.register_error_handler(HTTPException, self.http_error)
+
+        app.add_url_rule(f"{API_PREFIX}/me", view_func=self.me)
+        app.add_url_rule(f"{API_PREFIX}/me/tracks", view_func=self.saved_tracks_page)
+        app.add_url_rule(f"{API_PREFIX}/me/albums", view_func=self.saved_albums_page)
+        app.add_url_rule(f"{API_PREFIX}/me/following", view_func=self.followed_artists)
+        app.add_url_rule(f"{API_PREFIX}/me/playlists", view_func=self.playlists_page)
+        app.add_url_rule(
+            f"{API_PREFIX}/me/playlists",
+            endpoint="create_my_playlist",
+            view_func=self.create_playlist,
+            methods=["POST"],
+        )
+        app.add_url_rule(
+            f"{API_PREFIX}/users/<user>/playlists",
+            view_func=self.create_playlist,
+            methods=["POST"],
+        )
+        app.add_url_rule(
+            f"{API_PREFIX}/playlists/<playlist_id>",
+            view_func=self.change_playlist_details,
+            methods=["PUT"],
+        )
+        for items_path in ("tracks", "items"):
+            rule = f"{API_PREFIX}/playlists/<playlist_id>/{items_path}"
+            app.add_url_rule(
+                rule, f"playlist_{items_path}", self.playlist_items_page
+            )
+            app.add_url_rule(
+                rule, f"add_{items_path}", self.add_playlist_items, methods=["POST"]
+            )
+            app.add_url_rule(
+                rule,
+                f"update_{items_path}",
+                self.update_playlist_items,
+                methods=["PUT"],
+            )
+            app.add_url_rule(
+                rule,
+                f"remove_{items_path}",
+                self.remove_playlist_items,
+                methods=["DELETE"],
+            )
+        app.add_url_rule(f"{API_PREFIX}/search", view_func=self.search)
+        app.add_url_rule("/mock/stats", view_func=self.stats_page)
+        return app
+
+    def before_request(self):
+        if not request.path.startswith(API_PREFIX):
+            return None
+        config = self.config
+        fault = None
+        with self.lock:
+            self.stats["requests"] += 1
+            delay_ms = config.latency_ms + self.rng.uniform(0, config.latency_jitter_ms)
+            wait = self.token_bucket.take() if self.token_bucket else 0
+            roll = self.rng.random()
+            if wait or roll < config.rate_limit_ratio:
+                self.stats["rate_limited"] += 1
+                retry_after = max(config.retry_after, math.ceil(wait))
+                fault = (429, "API rate limit exceeded", retry_after)
+            elif roll < config.rate_limit_ratio + config.server_error_ratio:
+                self.stats["server_errors"] += 1
+                fault = (self.rng.choice(SERVER_ERROR_STATUSES), "Server error")
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        return self.error(*fault) if fault else None
+
+    def http_error(self, e: HTTPException):
+        return self.error(e.code, e.description)
+
+    @staticmethod
+    def error(status: int, message: str, retry_after: Optional[int] = None):
+        response = jsonify({"error": {"status": status, "message": message}})
+        response.status_code = status
+        if retry_after is not None:
+            response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    @staticmethod
+    def int_arg(name: str, default: int) -> int:
+        value = request.args.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            abort(400, f"Invalid {name}")
+
+    def page(self, items: list, max_page_size: int, make_item=None, **extra) -> dict:
+        """An offset paging object over ``items``, cut to ``max_page_size``."""
+        limit = min(self.int_arg("limit", 20), max_page_size)
+        offset = self.int_arg("offset", 0)
+        if limit < 1 or offset < 0:
+            abort(400, "Invalid limit or offset")
+        page_items = items[offset: offset + limit]
+        if make_item is not None:
+            page_items = [make_item(item) for item in page_items]
+
+        def link(link_offset: int) -> str:
+            return f"{request.base_url}?offset={link_offset}&limit={limit}"
+
+        return {
+            "href": link(offset),
+            "items": page_items,
+            "limit": limit,
+            "next": link(offset + limit) if offset + limit < len(items) else None,
+            "offset": offset,
+            "previous": link(max(0, offset - limit)) if offset else None,
+            "total": len(items),
+            **extra,
+        }
+
+    def playlist_or_404(self, playlist_id: str) -> dict:
+        playlist = self.playlists_by_id.get(playlist_id)
+        if playlist is None:
+            abort(404, "Not found.")
+        return playlist
+
+    def me(self):
+        return jsonify(
+            {
+                "display_name": USER_DISPLAY_NAME,
+                "id": USER_DISPLAY_NAME,
+                "type": "user",
+                "uri": f"spotify:user:{USER_DISPLAY_NAME}",
+            }
+        )
+
+    def saved_tracks_page(self):
+        return jsonify(
+            self.page(
+                self.saved_tracks,
+                self.config.max_page_size,
+                lambda track: {"added_at": ADDED_AT, "track": strip_derived_fields(track)},
+            )
+        )
+
+    def saved_albums_page(self):
+        return jsonify(
+            self.page(
+                self.saved_albums,
+                self.config.max_page_size,
+                lambda album: {"added_at": ADDED_AT, "album": strip_derived_fields(album)},
+            )
+        )
+
+    def followed_artists(self):
+        if request.args.get("type") != "artist":
+            abort(400, "Only valid type is 'artist'")
+        limit = min(self.int_arg("limit", 20), self.config.max_page_size)
+        after = request.args.get("after")
+        start = 0
+        if after:
+            if after not in self.artist_positions:
+                abort(400, "Invalid after")
+            start = self.artist_positions[after] + 1
+        artists = self.artists[start: start + limit]
+        has_next = start + limit < len(self.artists)
+        last_id = artists[-1]["id"] if artists else None
+        return jsonify(
+            {
+                "artists": {
+                    "cursors": {"after": last_id if has_next else None},
+                    "href": request.url,
+                    "items": artists,
+                    "limit": limit,
+                    "next": (
+                        f"{request.base_url}?type=artist&after={last_id}&limit={limit}"
+                        if has_next
+                        else None
+                    ),
+                    "total": len(self.artists),
+                }
+            }
+        )
+
+    def playlists_page(self):
+        return jsonify(self.page(self.playlists, self.config.max_page_size))
+
+    def playlist_items_page(self, playlist_id: str):
+        self.playlist_or_404(playlist_id)
+        with self.lock:
+            tracks = list(self.playlist_tracks[playlist_id])
+        return jsonify(
+            self.page(tracks, self.config.max_playlist_items_page_size, playlist_item)
+        )
+
+    def search(self):
+        query = (request.args.get("q") or "").lower()
+        if not query:
+            abort(400, "No search query")
+        if "track" not in (request.args.get("type") or "").split(","):
+            abort(400, "Only track search is served")
+        if self.int_arg("offset", 0) + self.int_arg("limit", 20) > MAX_SEARCH_OFFSET:
+            abort(400, "Offset and limit over the search window")
+        words = query.split()
+        found = [
+            track
+            for name, track in self.searchable_tracks
+            if all(word in name for word in words)
+        ]
+        return jsonify(
+            {
+                "tracks": self.page(
+                    found[:MAX_SEARCH_OFFSET],
+                    self.config.max_page_size,
+                    strip_derived_fields,
+                )
+            }
+        )
+
+    def create_playlist(self, user: str = USER_DISPLAY_NAME):
+        details = request.get_json(silent=True) or {}
+        if not details.get("name"):
+            abort(400, "Missing required field: name")
+        with self.lock:
+            self.next_playlist_number += 1
+            playlist_id = f"mockplaylist{self.next_playlist_number:010d}"
+            playlist = {
+                "collaborative": bool(details.get("collaborative", False)),
+                "description": details.get("description", ""),
+                "external_urls": {
+                    "spotify": f"https://open.spotify.com/playlist/{playlist_id}"
+                },
+                "href": f"{request.host_url}v1/playlists/{playlist_id}",
+                "id": playlist_id,
+                "images": [],
+                "name": details["name"],
+                "owner": {"display_name": USER_DISPLAY_NAME, "id": user},
+                "public": bool(details.get("public", True)),
+                "snapshot_id": f"{playlist_id}-0",
+                "tracks": {
+                    "href": f"{request.host_url}v1/playlists/{playlist_id}/tracks",
+                    "total": 0,
+                },
+                "type": "playlist",
+                "uri": f"spotify:playlist:{playlist_id}",
+            }
+            self.playlists.append(playlist)
+            self.playlists_by_id[playlist_id] = playlist
+            self.playlist_tracks[playlist_id] = []
+        response = jsonify(playlist)
+        response.status_code = 201
+        return response
+
+    def change_playlist_details(self, playlist_id: str):
+        playlist = self.playlist_or_404(playlist_id)
+        details = request.get_json(silent=True) or {}
+        with self.lock:
+            for field in ("name", "public", "collaborative", "description"):
+                if field in details:
+                    playlist[field] = details[field]
+        return "", 200
+
+    def tracks_for_uris(self, uris: list) -> List[dict]:
+        if not uris or len(uris) > MAX_ITEMS_PER_WRITE:
+            abort(400, f"Between 1 and {MAX_ITEMS_PER_WRITE} uris are allowed")
+        unknown = [uri for uri in uris if uri not in self.tracks_by_uri]
+        if unknown:
+            abort(400, f"Invalid track uri: {unknown[0]}")
+        return [self.tracks_by_uri[uri] for uri in uris]
+
+    def snapshot(self, playlist: dict):
+        """Bump the playlist's snapshot id and total, return it as Spotify does."""
+        tracks = self.playlist_tracks[playlist["id"]]
+        playlist["tracks"]["total"] = len(tracks)
+        self.snapshot_versions[playlist["id"]] += 1
+        playlist["snapshot_id"] = (
+            f"{playlist['id']}-{self.snapshot_versions[playlist['id']]}"
+        )
+        return {"snapshot_id": playlist["snapshot_id"]}
+
+    def add_playlist_items(self, playlist_id: str):
+        playlist = self.playlist_or_404(playlist_id)
+        body = request.get_json(silent=True)
+        uris = body.get("uris") if isinstance(body, dict) else body
+        if uris is None and request.args.get("uris"):
+            uris = request.args["uris"].split(",")
+        tracks = self.tracks_for_uris(uris or [])
+        with self.lock:
+            items = self.playlist_tracks[playlist_id]
+            position = request.args.get("position")
+            if isinstance(body, dict) and body.get("position") is not None:
+                position = body["position"]
+            position = len(items) if position is None else int(position)
+            items[position:position] = tracks
+            response = jsonify(self.snapshot(playlist))
+        response.status_code = 201
+        return response
+
+    def update_playlist_items(self, playlist_id: str):
+        playlist = self.playlist_or_404(playlist_id)
+        body = request.get_json(silent=True) or {}
+        with self.lock:
+            items = self.playlist_tracks[playlist_id]
+            if "uris" in body:
+                items[:] = self.tracks_for_uris(body["uris"]) if body["uris"] else []
+            elif "range_start" in body and "insert_before" in body:
+                start = int(body["range_start"])
+                length = int(body.get("range_length") or 1)
+                insert_before = int(body["insert_before"])
+                if not (0 <= start < len(items) and 0 <= insert_before <= len(items)):
+                    abort(400, "Index out of bounds")
+                moved = items[start: start + length]
+                del items[start: start + length]
+                if insert_before > start:
+                    insert_before -= len(moved)
+                items[insert_before:insert_before] = moved
+            else:
+                abort(400, "Either uris or range_start and insert_before are needed")
+            return jsonify(self.snapshot(playlist))
+
+    def remove_playlist_items(self, playlist_id: str):
+        playlist = self.playlist_or_404(playlist_id)
+        body = request.get_json(silent=True) or {}
+        # spotipy sends "items", older clients and the docs "tracks"
+        removed = body.get("items") or body.get("tracks") or []
+        if not removed or len(removed) > MAX_ITEMS_PER_WRITE:
+            abort(400, f"Between 1 and {MAX_ITEMS_PER_WRITE} items are allowed")
+        uris = {item["uri"] for item in removed}
+        with self.lock:
+            items = self.playlist_tracks[playlist_id]
+            items[:] = [track for track in items if not track or track["uri"] not in uris]
+            return jsonify(self.snapshot(playlist))
+
+    def stats_page(self):
+        with self.lock:
+            return jsonify(dict(self.stats))
+
+
+class MockSpotifyServer:
+    """Runs a ``MockSpotifyApi`` on a background thread for a ``with`` block.
+
+    Port 0 picks a free port; ``url`` is the API prefix to give spotipy.
+    """
+
+    def __init__(
+        self, api: MockSpotifyApi, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.api = api
+        self.server = make_server(host, port, api.app, threaded=True)
+        self.url = f"http://{host}:{self.server.server_port}{API_PREFIX}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "MockSpotifyServer":
+        self.thread.start()
+        logger.info(f"Mock Spotify API listening on {self.url}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.server.shutdown()
+        self.thread.join()
+
+
+def mock_spotify_client(url: str, **kwargs) -> Spotify:
+    """A spotipy client for the mock at ``url``.
+
+    spotipy retries 429s and 5xx on its own by default; pass ``retries`` and
+    ``status_retries`` to let them through to our own backoff instead.
+    """
+    spotify = Spotify(auth="mock-token", **kwargs)
+    spotify.prefix = url
+    return spotify
+
+
+def main():
+    setup_app_logging(logger, logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--raw-data-location", help="serve the latest snapshots in this folder"
+    )
+    source.add_argument(
+        "--tracks",
+        type=int,
+        default=10_000,
+        help="serve a synthetic library of this many saved tracks",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--max-page-size", type=int, default=MAX_LIBRARY_PAGE_SIZE)
+    parser.add_argument(
+        "--max-playlist-items-page-size", type=int, default=MAX_PLAYLIST_ITEMS_PAGE_SIZE
+    )
+    parser.add_argument("--requests-per-second", type=float)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0)
+    parser.add_argument("--server-error-ratio", type=float, default=0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.raw_data_location:
+        data = load_snapshots(args.raw_data_location)
+    else:
+        data = SyntheticLibrary(args.tracks, args.seed).build()
+    config = MockSpotifyConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        max_page_size=args.max_page_size,
+        max_playlist_items_page_size=args.max_playlist_items_page_size,
+        requests_per_second=args.requests_per_second,
+        rate_limit_ratio=args.rate_limit_ratio,
+        server_error_ratio=args.server_error_ratio,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    with MockSpotifyServer(MockSpotifyApi(data, config), args.host, args.port):
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            logger.info("Stopping")
+
+
+if __name__ == "__main__":
+    main()
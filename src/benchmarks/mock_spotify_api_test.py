@@ -0,0 +1,121 @@
+import unittest
+
+from benchmarks.mock_spotify_api import (
+    MockSpotifyApi,
+    MockSpotifyConfig,
+    MockSpotifyServer,
+    mock_spotify_client,
+)
+from benchmarks.synthetic_library import SyntheticLibrary
+from spotify.spotify_enrich import ARTISTS_JOINED
+from spotify.spotify_utils import PLAYLISTS, SAVED_ARTISTS, SAVED_TRACKS
+
+
+class MockSpotifyApiTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = SyntheticLibrary(1_000, seed=3).build()
+
+    def client(self, **config):
+        self.api = MockSpotifyApi(self.data, MockSpotifyConfig(**config))
+        return self.api.app.test_client()
+
+    def test_saved_tracks_page_through_the_library(self):
+        client = self.client(max_page_size=20)
+
+        first = client.get("/v1/me/tracks?limit=50&offset=0").get_json()
+        last = client.get("/v1/me/tracks?limit=50&offset=980").get_json()
+
+        self.assertEqual(20, first["limit"])
+        self.assertEqual(1_000, first["total"])
+        self.assertIn("offset=20&limit=20", first["next"])
+        self.assertIsNone(last["next"])
+        self.assertEqual(self.data[SAVED_TRACKS][980]["id"], last["items"][0]["track"]["id"])
+        # served as the API sends them, without our derived fields
+        self.assertNotIn(ARTISTS_JOINED, first["items"][0]["track"])
+
+    def test_followed_artists_use_an_after_cursor(self):
+        client = self.client()
+        artists = self.data[SAVED_ARTISTS]
+
+        page = client.get("/v1/me/following?type=artist&limit=10").get_json()["artists"]
+        after = page["cursors"]["after"]
+        next_page = client.get(
+            f"/v1/me/following?type=artist&limit=10&after={after}"
+        ).get_json()["artists"]
+
+        self.assertEqual(artists[9]["id"], after)
+        self.assertEqual(artists[10]["id"], next_page["items"][0]["id"])
+        self.assertEqual(len(artists), page["total"])
+
+    def test_rate_limits_and_server_errors_are_injected(self):
+        client = self.client(rate_limit_ratio=0.5, server_error_ratio=0.5, retry_after=7)
+
+        responses = [client.get("/v1/me") for _ in range(40)]
+
+        statuses = {response.status_code for response in responses}
+        self.assertIn(429, statuses)
+        self.assertTrue(statuses & {500, 502, 503})
+        rate_limited = next(r for r in responses if r.status_code == 429)
+        self.assertEqual("7", rate_limited.headers["Retry-After"])
+        stats = client.get("/mock/stats").get_json()
+        self.assertEqual(40, stats["requests"])
+        self.assertEqual(40, stats["rate_limited"] + stats["server_errors"])
+
+    def test_requests_over_the_budget_are_rate_limited(self):
+        client = self.client(requests_per_second=2)
+
+        statuses = [client.get("/v1/me").status_code for _ in range(4)]
+
+        self.assertEqual([200, 200, 429, 429], statuses)
+
+    def test_playlist_writes(self):
+        client = self.client()
+        uris = [track["uri"] for track in self.data[SAVED_TRACKS][:3]]
+
+        playlist = client.post(
+            "/v1/users/synthetic_user/playlists", json={"name": "New", "public": False}
+        ).get_json()
+        items_url = f"/v1/playlists/{playlist['id']}/tracks"
+        self.assertEqual(201, client.post(items_url, json=uris).status_code)
+        client.put(items_url, json={"range_start": 2, "insert_before": 0})
+        client.delete(items_url, json={"items": [{"uri": uris[0]}]})
+        client.put(f"/v1/playlists/{playlist['id']}", json={"name": "Renamed"})
+
+        page = client.get(f"{items_url}?limit=100").get_json()
+        self.assertEqual([uris[2], uris[1]], [item["track"]["uri"] for item in page["items"]])
+        self.assertEqual("Renamed", self.api.playlists_by_id[playlist["id"]]["name"])
+        self.assertEqual(2, self.api.playlists_by_id[playlist["id"]]["tracks"]["total"])
+        self.assertEqual(
+            400, client.post(items_url, json=["spotify:track:unknown"]).status_code
+        )
+        self.assertEqual(404, client.get("/v1/playlists/nope/tracks").status_code)
+
+    def test_spotipy_client_against_a_running_server(self):
+        api = MockSpotifyApi(self.data)
+        with MockSpotifyServer(api) as server:
+            spotify = mock_spotify_client(server.url, retries=0, status_retries=0)
+
+            me = spotify.me()
+            playlists = spotify.current_user_playlists(limit=50)
+            playlist_id = self.data[PLAYLISTS][0]["id"]
+            items = spotify.playlist_items(playlist_id, limit=100)
+            word = self.data[SAVED_TRACKS][0]["name"].split()[0]
+            found = spotify.search(q=word, type="track", limit=10)
+
+        self.assertEqual("synthetic_user", me["display_name"])
+        self.assertEqual(len(api.playlists), playlists["total"])
+        self.assertEqual(
+            self.data[PLAYLISTS][0]["tracks"]["total"], items["total"]
+        )
+        self.assertTrue(found["tracks"]["items"])
+        self.assertTrue(
+            all(
+                word.lower() in track["name"].lower()
+                for track in found["tracks"]["items"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
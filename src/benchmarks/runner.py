@@ -0,0 +1,322 @@
+"""Runs the benchmark scenarios and compares results between commits.
+
+Each scenario and size runs in a fresh worker process. That way peak RSS
+belongs to that measurement alone and nothing is left warm for the next one.
+A measurement is:
+
+- one warm-up call of the scenario's ``run``
+- ``repeats`` timed calls
+- one more call under ``tracemalloc``, for the peak and net Python allocations
+
+Peak RSS is the worker's high-water mark, including setup, plus any
+subprocesses it has waited for. Results go into a JSON file tagged with the
+commit; ``compare`` flags the scenarios that got slower or allocate more.
+
+    python -m benchmarks.runner run --output before.json
+    python -m benchmarks.runner run --only zip_data dedupe_tracks --sizes 1000
+    python -m benchmarks.runner compare before.json after.json
+"""
+import argparse
+import datetime
+import logging
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence
+
+import psutil
+from pydantic import BaseModel
+
+from benchmarks.scenarios import SCENARIOS, Scenario
+from spotify.spotify_utils import setup_app_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.1
+# smaller differences are noise, whatever their ratio
+MIN_TIME_DIFFERENCE = 0.001
+MIN_ALLOCATED_DIFFERENCE = 64 * 1024
+
+
+class BenchmarkResult(BaseModel):
+    scenario: str
+    size: int
+    repeats: int = 0
+    # seconds
+    min: Optional[float] = None
+    median: Optional[float] = None
+    mean: Optional[float] = None
+    max: Optional[float] = None
+    # bytes
+    setup_rss: Optional[int] = None
+    peak_rss: Optional[int] = None
+    peak_allocated: Optional[int] = None
+    net_allocated: Optional[int] = None
+    skipped: Optional[str] = None
+
+
+class BenchmarkRun(BaseModel):
+    commit: Optional[str] = None
+    created_at: str
+    python: str
+    platform: str
+    results: List[BenchmarkResult] = []
+
+
+class Comparison(NamedTuple):
+    scenario: str
+    size: int
+    baseline_median: float
+    median: float
+    # relative changes, 0.1 is 10% more
+    time_change: float
+    allocated_change: Optional[float]
+    regressed: bool
+
+
+def peak_rss() -> int:
+    """The high-water RSS of this process and its waited-for children."""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return psutil.Process().memory_info().peak_wset
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(scenario: Scenario, size: int, repeats: int = DEFAULT_REPEATS) -> BenchmarkResult:
+    """Time one scenario at one size, in this process."""
+    prepared = scenario.prepare(size)
+    # the scenarios log per call, which would be measured too
+    logging.disable(logging.INFO)
+    try:
+        setup_rss = psutil.Process().memory_info().rss
+        prepared.run()
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            prepared.run()
+            times.append(time.perf_counter() - start)
+        # before tracemalloc, which adds its own memory
+        run_peak_rss = peak_rss()
+
+        tracemalloc.start()
+        try:
+            prepared.run()
+            net_allocated, peak_allocated = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        logging.disable(logging.NOTSET)
+        if prepared.cleanup is not None:
+            prepared.cleanup()
+
+    return BenchmarkResult(
+        scenario=scenario.name,
+        size=size,
+        repeats=repeats,
+        min=min(times),
+        median=statistics.median(times),
+        mean=statistics.mean(times),
+        max=max(times),
+        setup_rss=setup_rss,
+        peak_rss=run_peak_rss,
+        peak_allocated=peak_allocated,
+        net_allocated=net_allocated,
+    )
+
+
+def measure_scenario(name: str, size: int, repeats: int) -> BenchmarkResult:
+    """``measure`` by scenario name, so it can be sent to a worker."""
+    return measure(SCENARIOS[name], size, repeats)
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    names: Optional[Sequence[str]] = None,
+    sizes: Optional[Sequence[int]] = None,
+    repeats: int = DEFAULT_REPEATS,
+    in_process: bool = False,
+) -> BenchmarkRun:
+    """Run the named scenarios (all by default) at their own sizes, or at
+    ``sizes``. ``in_process`` skips the worker processes, e.g. to profile."""
+    unknown = set(names or ()) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    benchmark_run = BenchmarkRun(
+        commit=current_commit(),
+        created_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+    )
+    for name in names or SCENARIOS:
+        scenario = SCENARIOS[name]
+        skip_reason = scenario.skip_reason()
+        for size in sizes or scenario.sizes:
+            if skip_reason:
+                logger.info(f"Skipping {name}: {skip_reason}")
+                benchmark_run.results.append(
+                    BenchmarkResult(scenario=name, size=size, skipped=skip_reason)
+                )
+                continue
+            logger.info(f"Running {name} at {size} tracks")
+            if in_process:
+                result = measure(scenario, size, repeats)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                ) as executor:
+                    result = executor.submit(
+                        measure_scenario, name, size, repeats
+                    ).result()
+            logger.info(
+                f"{name} at {size}: median {result.median:.4f}s, "
+                f"peak RSS {result.peak_rss / 2 ** 20:.1f} MiB, "
+                f"peak allocated {result.peak_allocated / 2 ** 20:.1f} MiB"
+            )
+            benchmark_run.results.append(result)
+    return benchmark_run
+
+
+def save_run(benchmark_run: BenchmarkRun, file_name: str) -> None:
+    with open(file_name, "w", encoding="utf-8") as f:
+        f.write(benchmark_run.model_dump_json(indent=2))
+
+
+def load_run(file_name: str) -> BenchmarkRun:
+    with open(file_name, encoding="utf-8") as f:
+        return BenchmarkRun.model_validate_json(f.read())
+
+
+def relative_change(baseline: Optional[float], value: Optional[float]) -> Optional[float]:
+    if not baseline or value is None:
+        return None
+    return value / baseline - 1
+
+
+def compare(
+    baseline: BenchmarkRun, current: BenchmarkRun, threshold: float = DEFAULT_THRESHOLD
+) -> List[Comparison]:
+    """The scenarios and sizes measured in both runs, flagged as regressed
+    when their median time or peak allocations grew by more than
+    ``threshold``. Differences under ``MIN_TIME_DIFFERENCE`` seconds and
+    ``MIN_ALLOCATED_DIFFERENCE`` bytes are ignored."""
+    baseline_results = {
+        (result.scenario, result.size): result
+        for result in baseline.results
+        if not result.skipped
+    }
+    comparisons = []
+    for result in current.results:
+        baseline_result = baseline_results.get((result.scenario, result.size))
+        if result.skipped or baseline_result is None:
+            continue
+        time_change = relative_change(baseline_result.median, result.median) or 0
+        allocated_change = relative_change(
+            baseline_result.peak_allocated, result.peak_allocated
+        )
+        comparisons.append(
+            Comparison(
+                scenario=result.scenario,
+                size=result.size,
+                baseline_median=baseline_result.median,
+                median=result.median,
+                time_change=time_change,
+                allocated_change=allocated_change,
+                regressed=(
+                    time_change > threshold
+                    and result.median - baseline_result.median > MIN_TIME_DIFFERENCE
+                )
+                or (
+                    (allocated_change or 0) > threshold
+                    and result.peak_allocated - baseline_result.peak_allocated
+                    > MIN_ALLOCATED_DIFFERENCE
+                ),
+            )
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    lines = [
+        f"{'scenario':<34}{'size':>9}{'before':>11}{'after':>11}{'time':>9}{'alloc':>9}"
+    ]
+    for comparison in comparisons:
+        allocated_change = (
+            f"{comparison.allocated_change:+.0%}"
+            if comparison.allocated_change is not None
+            else "-"
+        )
+        lines.append(
+            f"{comparison.scenario:<34}{comparison.size:>9}"
+            f"{comparison.baseline_median:>10.4f}s{comparison.median:>10.4f}s"
+            f"{comparison.time_change:>+9.0%}{allocated_change:>9}"
+            + ("  REGRESSED" if comparison.regressed else "")
+        )
+    return "\n".join(lines)
+
+
+def main():
+    setup_app_logging(logger, logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run scenarios into a results file")
+    run_parser.add_argument("--only", nargs="+", choices=list(SCENARIOS))
+    run_parser.add_argument(
+        "--sizes", nargs="+", type=int, help="library sizes, instead of each scenario's"
+    )
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument("--in-process", action="store_true")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two results files, exit 1 on a regression"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    subparsers.add_parser("list", help="list the scenarios")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for scenario in SCENARIOS.values():
+            print(f"{scenario.name:<34}{scenario.description}")
+    elif args.command == "run":
+        benchmark_run = run_benchmarks(args.only, args.sizes, args.repeats, args.in_process)
+        save_run(benchmark_run, args.output)
+        logger.info(f"Wrote {len(benchmark_run.results)} results to {args.output}")
+    else:
+        comparisons = compare(
+            load_run(args.baseline), load_run(args.current), args.threshold
+        )
+        print(format_comparisons(comparisons))
+        if any(comparison.regressed for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.runner import (
+    BenchmarkResult,
+    BenchmarkRun,
+    compare,
+    load_run,
+    measure,
+    run_benchmarks,
+    save_run,
+)
+from benchmarks.scenarios import BENCHMARK_MONGODB_URL, SCENARIOS
+
+
+def benchmark_run(**medians) -> BenchmarkRun:
+    return BenchmarkRun(
+        created_at="2026-01-01T00:00:00",
+        python="3",
+        platform="test",
+        results=[
+            BenchmarkResult(scenario=name, size=1_000, median=median, peak_allocated=100)
+            for name, median in medians.items()
+        ],
+    )
+
+
+class RunnerTest(unittest.TestCase):
+    def test_measure_records_time_and_memory(self):
+        result = measure(SCENARIOS["dedupe_tracks"], 1_000, repeats=3)
+
+        self.assertEqual(3, result.repeats)
+        self.assertLessEqual(result.min, result.median)
+        self.assertLessEqual(result.median, result.max)
+        self.assertGreater(result.peak_rss, 0)
+        self.assertGreater(result.peak_allocated, 0)
+
+    def test_in_memory_scenarios_run(self):
+        for name in (
+            "unzip_data",
+            "api_search_tracks",
+            "api_get_albums",
+            "filter_tracks_by_search_term_any",
+            "get_albums_by_year",
+        ):
+            with self.subTest(name):
+                prepared = SCENARIOS[name].prepare(1_000)
+                try:
+                    self.assertTrue(prepared.run())
+                finally:
+                    if prepared.cleanup:
+                        prepared.cleanup()
+
+    def test_database_scenarios_are_skipped_without_a_database(self):
+        with mock.patch.dict(os.environ, {BENCHMARK_MONGODB_URL: ""}):
+            results = run_benchmarks(["save_to_mongo"], sizes=[1_000]).results
+
+        self.assertEqual(1, len(results))
+        self.assertIn(BENCHMARK_MONGODB_URL, results[0].skipped)
+
+    def test_unknown_scenarios_are_rejected(self):
+        with self.assertRaises(ValueError):
+            run_benchmarks(["nope"])
+
+    def test_results_round_trip_and_compare(self):
+        baseline = benchmark_run(zip_data=1.0, dedupe_tracks=1.0, tiny=0.0001)
+        current = benchmark_run(zip_data=1.05, dedupe_tracks=1.5, tiny=0.0002)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "results.json")
+            save_run(current, file_name)
+            current = load_run(file_name)
+
+        comparisons = {c.scenario: c for c in compare(baseline, current, threshold=0.1)}
+
+        self.assertFalse(comparisons["zip_data"].regressed)
+        self.assertTrue(comparisons["dedupe_tracks"].regressed)
+        # twice as slow, but within timer noise
+        self.assertFalse(comparisons["tiny"].regressed)
+        self.assertAlmostEqual(0.5, comparisons["dedupe_tracks"].time_change)
+
+
+if __name__ == "__main__":
+    unittest.main()
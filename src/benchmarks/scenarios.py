@@ -0,0 +1,388 @@
+"""The benchmark scenarios, each run on synthetic libraries of several sizes.
+
+A scenario's ``prepare`` builds everything it needs for one library size and
+returns the ``run`` to time, plus a ``cleanup``; only ``run`` is measured.
+Sizes are the number of saved tracks in the library.
+
+The MongoDB and Postgres savers write to a database, so they only run
+against scratch databases named in ``BENCHMARK_MONGODB_URL`` (the
+``spotify_benchmark_db`` database on that server is used and dropped) and
+``BENCHMARK_POSTGRES_DATABASE`` (on the usual ``POSTGRES_*`` server, with the
+schema already migrated); without them they are skipped.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import uuid
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from benchmarks.mock_spotify_api import (
+    MockSpotifyApi,
+    MockSpotifyServer,
+    mock_spotify_client,
+)
+from benchmarks.synthetic_library import (
+    DEFAULT_SEED,
+    SyntheticLibrary,
+    write_synthetic_library,
+)
+from postgres.postgres_driver import close_shared_pools, create_pool
+from spotify.spotify_get_data import AsyncSpotifyDataGetter, BaseSpotifyDataGetter
+from spotify.spotify_playlist_maker import SpotifyPlaylistMaker
+from spotify.spotify_utils import (
+    SAVED_ALBUMS,
+    SAVED_TRACKS,
+    unzip_data_from_zip,
+    zip_data,
+)
+from storage.file.spotify_save_to_file import SpotifyToFile
+from storage.mongo.spotify_save_to_mongo import DEFAULT_BATCH_SIZE, SpotifyToMongo
+from storage.postgres.spotify_save_to_postgres import SpotifyToPostgres
+from utils.rate_limiter.in_memory_rate_limiter import InMemoryRateLimiter
+from utils.rate_limiter.rate_limiter_interface import RateLimiterConfig
+
+BENCHMARK_MONGODB_URL = "BENCHMARK_MONGODB_URL"
+BENCHMARK_MONGO_DATABASE = "spotify_benchmark_db"
+BENCHMARK_POSTGRES_DATABASE = "BENCHMARK_POSTGRES_DATABASE"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# these go through HTTP or write every sheet, so stop sooner
+FETCH_SIZES = (1_000, 10_000)
+SAVE_SIZES = (1_000, 10_000)
+MOCK_SERVER_START_TIMEOUT = 300
+# requests a minute, high enough that the getter's own limiter never waits
+UNLIMITED_RATE = 1_000_000_000
+
+
+class Prepared(NamedTuple):
+    run: Callable[[], Any]
+    cleanup: Optional[Callable[[], None]] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    prepare: Callable[[int], Prepared]
+    sizes: Tuple[int, ...] = DEFAULT_SIZES
+    # a reason to skip the scenario here, or None to run it
+    skip_reason: Callable[[], Optional[str]] = lambda: None
+
+
+def library(size: int) -> Dict[str, Any]:
+    return SyntheticLibrary(size, DEFAULT_SEED).build()
+
+
+def first_word(tracks: list) -> str:
+    return tracks[0]["name"].split()[0]
+
+
+def serve_mock_library(size: int, ready, stop) -> None:
+    """Serve a synthetic library until ``stop`` is set, in its own process so
+    the server's memory and CPU aren't counted against the fetch."""
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    with MockSpotifyServer(MockSpotifyApi(library(size))) as server:
+        ready.put(server.url)
+        stop.wait()
+
+
+def prepare_fetch(size: int) -> Prepared:
+    context = multiprocessing.get_context("spawn")
+    ready, stop = context.Queue(), context.Event()
+    server_process = context.Process(
+        target=serve_mock_library, args=(size, ready, stop), daemon=True
+    )
+    server_process.start()
+    url = ready.get(timeout=MOCK_SERVER_START_TIMEOUT)
+    raw_data_location = tempfile.TemporaryDirectory()
+
+    # skip the config file and Redis, the getter only needs these
+    getter = AsyncSpotifyDataGetter.__new__(AsyncSpotifyDataGetter)
+    getter.spotify = mock_spotify_client(url, retries=0, status_retries=0)
+    getter.rate_limiter = InMemoryRateLimiter(
+        RateLimiterConfig(default_rate=UNLIMITED_RATE, burst_size=UNLIMITED_RATE)
+    )
+    getter.me = getter.spotify.me()
+    getter.raw_data_location = raw_data_location.name
+
+    def cleanup():
+        stop.set()
+        server_process.join()
+        raw_data_location.cleanup()
+
+    return Prepared(lambda: asyncio.run(getter.get_all_data_parallel()), cleanup)
+
+
+def prepare_zip_data(size: int) -> Prepared:
+    tracks = library(size)[SAVED_TRACKS]
+    data_location = tempfile.TemporaryDirectory()
+    return Prepared(
+        lambda: zip_data(tracks, SAVED_TRACKS, data_location.name),
+        data_location.cleanup,
+    )
+
+
+def prepare_unzip_data(size: int) -> Prepared:
+    data_location = tempfile.TemporaryDirectory()
+    zip_data(library(size)[SAVED_TRACKS], SAVED_TRACKS, data_location.name)
+    zip_file = f"{data_location.name}/{SAVED_TRACKS}.gz"
+    return Prepared(lambda: unzip_data_from_zip(zip_file), data_location.cleanup)
+
+
+def prepare_dedupe_tracks(size: int) -> Prepared:
+    tracks = library(size)[SAVED_TRACKS]
+    return Prepared(lambda: list(BaseSpotifyDataGetter.dedupe_tracks(tracks)))
+
+
+def prepare_api_query(size: int, query: Callable[[Dict[str, Any]], Any]) -> Prepared:
+    # the API package configures root logging when imported, so only the
+    # API scenarios import it
+    from app.config import app
+
+    data = library(size)
+    app.tracks = data[SAVED_TRACKS]
+    app.albums = data[SAVED_ALBUMS]
+    return Prepared(lambda: asyncio.run(query(data)))
+
+
+def prepare_api_get_tracks(size: int) -> Prepared:
+    from app.dependencies import get_tracks
+
+    return prepare_api_query(
+        size, lambda data: get_tracks(page=2, limit=50, sort="asc", field="name")
+    )
+
+
+def prepare_api_search_tracks(size: int) -> Prepared:
+    from app.dependencies import get_tracks
+
+    return prepare_api_query(
+        size,
+        lambda data: get_tracks(
+            page=1,
+            limit=50,
+            sort="desc",
+            field="artists_joined",
+            search=first_word(data[SAVED_TRACKS]),
+        ),
+    )
+
+
+def prepare_api_get_albums(size: int) -> Prepared:
+    from app.dependencies import get_albums
+
+    return prepare_api_query(
+        size, lambda data: get_albums(sort="asc", field="artist", type="album")
+    )
+
+
+def prepare_playlist_filter(size: int, apply: Callable[[Any, dict], Any]) -> Prepared:
+    data = library(size)
+    return Prepared(lambda: apply(SpotifyPlaylistMaker, data))
+
+
+def prepare_filter_tracks_by_year(size: int) -> Prepared:
+    return prepare_playlist_filter(
+        size,
+        lambda maker, data: maker.filter_tracks_by_year(
+            data[SAVED_TRACKS], data[SAVED_TRACKS][0]["album"]["release_date"][:4]
+        ),
+    )
+
+
+def prepare_filter_tracks_by_search_term_any(size: int) -> Prepared:
+    return prepare_playlist_filter(
+        size,
+        lambda maker, data: maker.filter_tracks_by_search_term_any(
+            data[SAVED_TRACKS], [first_word(data[SAVED_TRACKS]), "love"]
+        ),
+    )
+
+
+def prepare_filter_tracks_by_search_term_all(size: int) -> Prepared:
+    return prepare_playlist_filter(
+        size,
+        lambda maker, data: maker.filter_tracks_by_search_term_all(
+            data[SAVED_TRACKS], [first_word(data[SAVED_TRACKS]), "a"]
+        ),
+    )
+
+
+def prepare_filter_tracks_by_artist(size: int) -> Prepared:
+    return prepare_playlist_filter(
+        size,
+        lambda maker, data: maker.filter_tracks_by_artist(
+            data[SAVED_TRACKS], [data[SAVED_TRACKS][0]["artists"][0]["name"]]
+        ),
+    )
+
+
+def prepare_get_albums_by_year(size: int) -> Prepared:
+    return prepare_playlist_filter(
+        size,
+        lambda maker, data: maker.get_albums_by_year(
+            data[SAVED_ALBUMS], data[SAVED_ALBUMS][0]["release_date"][:4]
+        ),
+    )
+
+
+def prepare_save_to_file(size: int) -> Prepared:
+    save_location = tempfile.TemporaryDirectory()
+    raw_data_location = os.path.join(save_location.name, "raw")
+    write_synthetic_library(raw_data_location, size, DEFAULT_SEED)
+    # skip the config file, the exporter only needs its folders
+    spotify_to_file = SpotifyToFile.__new__(SpotifyToFile)
+    spotify_to_file.raw_data_location = raw_data_location
+    spotify_to_file.playlist_location = save_location.name
+    return Prepared(lambda: spotify_to_file.save_all_data({}), save_location.cleanup)
+
+
+def mongo_skip_reason() -> Optional[str]:
+    if not os.environ.get(BENCHMARK_MONGODB_URL):
+        return f"set {BENCHMARK_MONGODB_URL} to a scratch MongoDB server"
+    client = MongoClient(
+        os.environ[BENCHMARK_MONGODB_URL], serverSelectionTimeoutMS=2_000
+    )
+    try:
+        client.admin.command("ping")
+    except PyMongoError as e:
+        return f"MongoDB not reachable: {e}"
+    finally:
+        client.close()
+    return None
+
+
+def prepare_save_to_mongo(size: int) -> Prepared:
+    raw_data_location = tempfile.TemporaryDirectory()
+    write_synthetic_library(raw_data_location.name, size, DEFAULT_SEED)
+    spotify_to_mongo = SpotifyToMongo.__new__(SpotifyToMongo)
+    spotify_to_mongo.client = MongoClient(os.environ[BENCHMARK_MONGODB_URL])
+    spotify_to_mongo.db = spotify_to_mongo.client.get_database(BENCHMARK_MONGO_DATABASE)
+    spotify_to_mongo.upsert = False
+    spotify_to_mongo.batch_size = DEFAULT_BATCH_SIZE
+    spotify_to_mongo.load_id = uuid.uuid4().hex
+    spotify_to_mongo.raw_data_location = raw_data_location.name
+
+    def cleanup():
+        spotify_to_mongo.client.drop_database(BENCHMARK_MONGO_DATABASE)
+        spotify_to_mongo.client.close()
+        raw_data_location.cleanup()
+
+    return Prepared(lambda: spotify_to_mongo.save_all_data({}), cleanup)
+
+
+def postgres_skip_reason() -> Optional[str]:
+    database = os.environ.get(BENCHMARK_POSTGRES_DATABASE)
+    if not database:
+        return f"set {BENCHMARK_POSTGRES_DATABASE} to a scratch Postgres database"
+    async def connect():
+        pool = await create_pool(database=database, min_size=1, max_size=1, timeout=2)
+        await pool.close()
+
+    try:
+        asyncio.run(connect())
+    except Exception as e:
+        return f"Postgres not reachable: {e}"
+    return None
+
+
+def prepare_save_to_postgres(size: int) -> Prepared:
+    # the saver uses the shared pool, which reads the database from the
+    # environment; scenarios run in their own process so this stays here
+    os.environ["POSTGRES_DATABASE"] = os.environ[BENCHMARK_POSTGRES_DATABASE]
+    raw_data_location = tempfile.TemporaryDirectory()
+    write_synthetic_library(raw_data_location.name, size, DEFAULT_SEED)
+    spotify_to_postgres = SpotifyToPostgres.__new__(SpotifyToPostgres)
+    spotify_to_postgres.raw_data_location = raw_data_location.name
+
+    async def save_and_close():
+        try:
+            await spotify_to_postgres.save_all_data({})
+        finally:
+            # pools belong to the event loop, and each run has its own
+            await close_shared_pools()
+
+    return Prepared(lambda: asyncio.run(save_and_close()), raw_data_location.cleanup)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario(
+            "fetch_parallel",
+            "AsyncSpotifyDataGetter.get_all_data_parallel against the mock API",
+            prepare_fetch,
+            FETCH_SIZES,
+        ),
+        Scenario("zip_data", "zip_data of the saved tracks", prepare_zip_data),
+        Scenario(
+            "unzip_data", "unzip_data_from_zip of the saved tracks", prepare_unzip_data
+        ),
+        Scenario(
+            "dedupe_tracks", "dedupe_tracks of the saved tracks", prepare_dedupe_tracks
+        ),
+        Scenario(
+            "api_get_tracks",
+            "get_tracks, every track sorted by name, one page",
+            prepare_api_get_tracks,
+        ),
+        Scenario(
+            "api_search_tracks",
+            "get_tracks, searched and sorted by artist, one page",
+            prepare_api_search_tracks,
+        ),
+        Scenario(
+            "api_get_albums",
+            "get_albums, filtered by type and sorted by artist",
+            prepare_api_get_albums,
+        ),
+        Scenario(
+            "filter_tracks_by_year",
+            "SpotifyPlaylistMaker.filter_tracks_by_year",
+            prepare_filter_tracks_by_year,
+        ),
+        Scenario(
+            "filter_tracks_by_search_term_any",
+            "SpotifyPlaylistMaker.filter_tracks_by_search_term_any",
+            prepare_filter_tracks_by_search_term_any,
+        ),
+        Scenario(
+            "filter_tracks_by_search_term_all",
+            "SpotifyPlaylistMaker.filter_tracks_by_search_term_all",
+            prepare_filter_tracks_by_search_term_all,
+        ),
+        Scenario(
+            "filter_tracks_by_artist",
+            "SpotifyPlaylistMaker.filter_tracks_by_artist",
+            prepare_filter_tracks_by_artist,
+        ),
+        Scenario(
+            "get_albums_by_year",
+            "SpotifyPlaylistMaker.get_albums_by_year",
+            prepare_get_albums_by_year,
+        ),
+        Scenario(
+            "save_to_file",
+            "SpotifyToFile.save_all_data, CSV and XLSX",
+            prepare_save_to_file,
+            SAVE_SIZES,
+        ),
+        Scenario(
+            "save_to_mongo",
+            "SpotifyToMongo.save_all_data",
+            prepare_save_to_mongo,
+            SAVE_SIZES,
+            mongo_skip_reason,
+        ),
+        Scenario(
+            "save_to_postgres",
+            "SpotifyToPostgres.save_all_data",
+            prepare_save_to_postgres,
+            SAVE_SIZES,
+            postgres_skip_reason,
+        ),
+    )
+}
@@ -0,0 +1,570 @@
+"""Deterministic synthetic Spotify libraries, for benchmarks and load tests.
+
+Builds every snapshot a fetch writes (saved tracks, albums and artists,
+playlists and their tracks, the unique playlist tracks and artists) at any
+size, from a thousand to a million saved tracks, and writes them into a
+``<raw data location>/<date>`` folder exactly as ``zip_data`` does. Every
+loader, exporter, saver and API dependency can then run on a large library
+without a Spotify account. The same size and seed always give the same files.
+
+The data is shaped like a real library rather than uniform noise:
+
+- artist popularity follows a Zipf curve, so a few artists own many tracks
+  and playlists overlap heavily with the saved tracks
+- some tracks have several artists, some are re-releases sharing an ISRC
+- some tracks have no ISRC and some albums no UPC
+- there are compilations by Various Artists, albums and singles
+- playlists hold local files and the odd removed (``None``) track
+"""
+import argparse
+import datetime
+import gzip
+import itertools
+import json
+import logging
+import os
+import random
+import string
+from typing import Dict, List, Optional
+
+from spotify.spotify_enrich import enrich_snapshot
+from spotify.spotify_utils import (
+    OTHER_PLAYLISTS,
+    PLAYLIST_TRACKS,
+    PLAYLISTS,
+    SAVED_ALBUM_TRACKS,
+    SAVED_ALBUMS,
+    SAVED_ARTISTS,
+    SAVED_TRACKS,
+    UNIQUE_PLAYLIST_ARTISTS,
+    UNIQUE_PLAYLIST_TRACKS,
+    setup_app_logging,
+)
+
+logger = logging.getLogger(__name__)
+
+MIN_TRACKS = 1_000
+MAX_TRACKS = 1_000_000
+DEFAULT_SEED = 42
+USER_DISPLAY_NAME = "synthetic_user"
+
+# catalogue album tracks generated per saved track, so playlists also hold
+# tracks that aren't saved
+CATALOGUE_RATIO = 1.25
+TRACKS_PER_ARTIST = 12
+SAVED_ALBUM_RATIO = 0.1
+FOLLOWED_ARTIST_RATIO = 0.6
+TRACKS_PER_PLAYLIST = 250
+OTHER_PLAYLIST_RATIO = 0.2
+ARTIST_ZIPF_EXPONENT = 0.6
+# share of playlist tracks drawn from the saved tracks rather than the catalogue
+PLAYLIST_SAVED_TRACK_RATIO = 0.7
+
+COMPILATION_RATIO = 0.05
+SINGLE_RATIO = 0.25
+FEATURE_RATIO = 0.15
+RERELEASE_RATIO = 0.03
+MISSING_ISRC_RATIO = 0.02
+MISSING_UPC_RATIO = 0.03
+LOCAL_TRACK_RATIO = 0.01
+REMOVED_TRACK_RATIO = 0.002
+
+WORDS = (
+    "after all alone angel autumn baby back bad black blue body broken burning "
+    "city cold come crazy dance dark day dead desire down dream electric empty "
+    "end ever fade falling fire forever free friday ghost girl glass gold gone "
+    "good heart heaven high home honey hope house island kids kiss last late "
+    "light little lost love lucky machine midnight mind moon morning never new "
+    "night north ocean old paradise queen rain red river road rock run sea "
+    "secret shadow silver sky sleep slow song soul star still stone storm "
+    "summer sun sweet time tonight true velvet wait walk war water west wild "
+    "wind winter wish world young"
+).split()
+GENRES = (
+    "alternative rock", "ambient", "art pop", "bossa nova", "britpop",
+    "chamber pop", "dance pop", "deep house", "disco", "dream pop",
+    "drum and bass", "dub", "electronica", "folk", "funk", "grunge",
+    "hard rock", "hip hop", "indie folk", "indie pop", "indie rock", "jazz",
+    "krautrock", "metal", "new wave", "northern soul", "post-punk", "punk",
+    "r&b", "reggae", "shoegaze", "singer-songwriter", "soul", "synthpop",
+    "techno", "trip hop",
+)
+LABELS = (
+    "4AD", "Blue Note", "Columbia", "Domino", "EMI", "Factory", "Island",
+    "Matador", "Motown", "Mute", "Ninja Tune", "One Little Indian", "Parlophone",
+    "Rough Trade", "Sub Pop", "Warp", "XL Recordings",
+)
+ID_ALPHABET = string.ascii_letters + string.digits
+API_URL = "https://api.spotify.com/v1"
+# JSON fragments joined per snapshot write
+WRITE_BATCH_SIZE = 100_000
+
+
+class SyntheticLibrary:
+    """Generates one library; call ``build`` for the snapshot data."""
+
+    def __init__(self, num_tracks: int, seed: int = DEFAULT_SEED) -> None:
+        if not MIN_TRACKS <= num_tracks <= MAX_TRACKS:
+            raise ValueError(
+                f"num_tracks must be between {MIN_TRACKS} and {MAX_TRACKS}, "
+                f"got {num_tracks}"
+            )
+        self.num_tracks = num_tracks
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.isrc_counter = itertools.count(1)
+        self.upc_counter = itertools.count(1)
+
+    def build(self) -> Dict[str, object]:
+        """Every snapshot, keyed by its ``zip_data`` type."""
+        artists = self.make_artists(max(10, self.num_tracks // TRACKS_PER_ARTIST))
+        albums = self.make_albums(artists, int(self.num_tracks * CATALOGUE_RATIO))
+        catalogue = [
+            self.make_track(album, album_track)
+            for album in albums
+            for album_track in album["tracks"]["items"]
+        ]
+        saved_tracks = self.pick_saved_tracks(catalogue)
+        saved_albums = self.rng.sample(
+            albums, max(1, int(len(albums) * SAVED_ALBUM_RATIO))
+        )
+        playlists = self.make_playlists(max(2, self.num_tracks // TRACKS_PER_PLAYLIST))
+        # split by owner, as the getters do
+        my_playlists = [
+            playlist
+            for playlist in playlists
+            if playlist["owner"]["display_name"] == USER_DISPLAY_NAME
+        ]
+        other_playlists = [
+            playlist
+            for playlist in playlists
+            if playlist["owner"]["display_name"] != USER_DISPLAY_NAME
+        ]
+        playlist_tracks = {
+            playlist["id"]: self.make_playlist_tracks(
+                playlist, saved_tracks, catalogue
+            )
+            for playlist in my_playlists
+        }
+        data = {
+            SAVED_ARTISTS: self.pick_followed_artists(artists, saved_tracks),
+            SAVED_ALBUMS: saved_albums,
+            SAVED_ALBUM_TRACKS: [
+                album_track
+                for album in saved_albums
+                for album_track in album["tracks"]["items"]
+            ],
+            SAVED_TRACKS: saved_tracks,
+            PLAYLISTS: my_playlists,
+            OTHER_PLAYLISTS: other_playlists,
+            PLAYLIST_TRACKS: playlist_tracks,
+            UNIQUE_PLAYLIST_TRACKS: unique_playlist_tracks(playlist_tracks),
+            UNIQUE_PLAYLIST_ARTISTS: unique_playlist_artists(playlist_tracks),
+        }
+        # the getters store derived fields in the snapshots, so do the same
+        for data_type, snapshot in data.items():
+            enrich_snapshot(data_type, snapshot)
+        return data
+
+    def make_id(self) -> str:
+        return "".join(self.rng.choices(ID_ALPHABET, k=22))
+
+    def make_title(self, min_words: int = 1, max_words: int = 4) -> str:
+        words = self.rng.sample(WORDS, self.rng.randint(min_words, max_words))
+        return " ".join(words).title()
+
+    @staticmethod
+    def links(object_type: str, object_id: str) -> dict:
+        return {
+            "external_urls": {
+                "spotify": f"https://open.spotify.com/{object_type}/{object_id}"
+            },
+            "href": f"{API_URL}/{object_type}s/{object_id}",
+            "id": object_id,
+            "type": object_type,
+            "uri": f"spotify:{object_type}:{object_id}",
+        }
+
+    @staticmethod
+    def make_images(object_id: str, count: int) -> List[dict]:
+        return [
+            {
+                "height": size,
+                "url": f"https://i.scdn.co/image/{object_id}{size}",
+                "width": size,
+            }
+            for size in (640, 300, 64)[:count]
+        ]
+
+    def make_artists(self, count: int) -> List[dict]:
+        artists = []
+        for rank in range(count):
+            artist_id = self.make_id()
+            name = self.make_title(1, 3)
+            if self.rng.random() < 0.3:
+                name = "The " + name
+            artists.append(
+                {
+                    **self.links("artist", artist_id),
+                    # popularity falls with rank, as in the Zipf weights below
+                    "followers": {"href": None, "total": int(5_000_000 / (rank + 1))},
+                    "genres": self.rng.sample(GENRES, self.rng.randint(0, 4)),
+                    "images": self.make_images(artist_id, self.rng.choice((0, 3, 3, 3))),
+                    "name": f"{name} {rank}" if rank % 50 == 49 else name,
+                    "popularity": max(0, 90 - int(rank * 90 / count)),
+                }
+            )
+        return artists
+
+    @staticmethod
+    def simple_artist(artist: dict) -> dict:
+        return {
+            key: artist[key]
+            for key in ("external_urls", "href", "id", "name", "type", "uri")
+        }
+
+    def make_albums(self, artists: List[dict], num_album_tracks: int) -> List[dict]:
+        simple_artists = [self.simple_artist(artist) for artist in artists]
+        cum_weights = list(
+            itertools.accumulate(
+                1 / (rank + 1) ** ARTIST_ZIPF_EXPONENT for rank in range(len(artists))
+            )
+        )
+        various_artists = {
+            **self.links("artist", "0LyfQWJT6nXafLPZqxe9Of"),
+            "name": "Various Artists",
+        }
+        albums = []
+        album_track_count = 0
+        while album_track_count < num_album_tracks:
+            artist = self.rng.choices(simple_artists, cum_weights=cum_weights)[0]
+            roll = self.rng.random()
+            if roll < COMPILATION_RATIO:
+                album_type, album_artists, total_tracks = (
+                    "compilation",
+                    [various_artists],
+                    self.rng.randint(12, 30),
+                )
+            elif roll < COMPILATION_RATIO + SINGLE_RATIO:
+                album_type, album_artists, total_tracks = (
+                    "single",
+                    [artist],
+                    self.rng.randint(1, 4),
+                )
+            else:
+                album_type, album_artists, total_tracks = (
+                    "album",
+                    [artist],
+                    self.rng.randint(6, 16),
+                )
+            album = self.make_album(album_type, album_artists, total_tracks)
+            album["tracks"]["items"] = [
+                self.make_album_track(
+                    track_number,
+                    # compilation tracks are by their own artists
+                    self.rng.choices(simple_artists, cum_weights=cum_weights)
+                    if album_type == "compilation"
+                    else album_artists,
+                    simple_artists,
+                    cum_weights,
+                )
+                for track_number in range(1, total_tracks + 1)
+            ]
+            albums.append(album)
+            album_track_count += total_tracks
+        return albums
+
+    def make_album(
+        self, album_type: str, artists: List[dict], total_tracks: int
+    ) -> dict:
+        album_id = self.make_id()
+        year = self.rng.randint(1955, 2025)
+        precision = self.rng.choices(("day", "month", "year"), weights=(8, 1, 1))[0]
+        release_date = {
+            "day": f"{year}-{self.rng.randint(1, 12):02d}-{self.rng.randint(1, 28):02d}",
+            "month": f"{year}-{self.rng.randint(1, 12):02d}",
+            "year": str(year),
+        }[precision]
+        external_ids = (
+            {}
+            if self.rng.random() < MISSING_UPC_RATIO
+            else {"upc": f"{next(self.upc_counter):012d}"}
+        )
+        return {
+            **self.links("album", album_id),
+            "album_type": album_type,
+            "artists": artists,
+            "copyrights": [{"text": f"(P) {year} {artists[0]['name']}", "type": "P"}],
+            "external_ids": external_ids,
+            "genres": [],
+            "images": self.make_images(album_id, 3),
+            "label": self.rng.choice(LABELS),
+            "name": self.make_title(),
+            "popularity": self.rng.randint(0, 80),
+            "release_date": release_date,
+            "release_date_precision": precision,
+            "total_tracks": total_tracks,
+            "tracks": {
+                "href": f"{API_URL}/albums/{album_id}/tracks",
+                "items": [],
+                "limit": 50,
+                "next": None,
+                "offset": 0,
+                "previous": None,
+                "total": total_tracks,
+            },
+        }
+
+    def make_album_track(
+        self,
+        track_number: int,
+        artists: List[dict],
+        simple_artists: List[dict],
+        cum_weights: List[float],
+    ) -> dict:
+        if self.rng.random() < FEATURE_RATIO:
+            featured = self.rng.choices(simple_artists, cum_weights=cum_weights)[0]
+            if featured["id"] not in {artist["id"] for artist in artists}:
+                artists = artists + [featured]
+        return {
+            **self.links("track", self.make_id()),
+            "artists": artists,
+            "disc_number": 1,
+            # mostly three to five minutes, the odd interlude or long mix
+            "duration_ms": max(20_000, int(self.rng.lognormvariate(12.3, 0.35))),
+            "explicit": self.rng.random() < 0.1,
+            "is_local": False,
+            "name": self.make_title(),
+            "preview_url": None,
+            "track_number": track_number,
+        }
+
+    def make_track(self, album: dict, album_track: dict) -> dict:
+        """The full track object a saved or playlist track is."""
+        simple_album = {
+            key: album[key]
+            for key in (
+                "album_type", "artists", "external_urls", "href", "id", "images",
+                "name", "release_date", "release_date_precision", "total_tracks",
+                "type", "uri",
+            )
+        }
+        external_ids = (
+            {}
+            if self.rng.random() < MISSING_ISRC_RATIO
+            else {"isrc": f"QZSYN{next(self.isrc_counter):07d}"}
+        )
+        return {
+            **album_track,
+            "album": simple_album,
+            "external_ids": external_ids,
+            "popularity": self.rng.randint(0, 90),
+        }
+
+    def pick_saved_tracks(self, catalogue: List[dict]) -> List[dict]:
+        saved_tracks = self.rng.sample(catalogue, self.num_tracks)
+        # re-releases: the same recording on another album shares its ISRC
+        with_isrc = [track for track in saved_tracks if track["external_ids"]]
+        for track in self.rng.sample(with_isrc, int(len(with_isrc) * RERELEASE_RATIO)):
+            track["external_ids"] = dict(self.rng.choice(with_isrc)["external_ids"])
+        return saved_tracks
+
+    def pick_followed_artists(
+        self, artists: List[dict], saved_tracks: List[dict]
+    ) -> List[dict]:
+        artists_by_id = {artist["id"]: artist for artist in artists}
+        saved_artist_ids = list(
+            dict.fromkeys(
+                artist["id"] for track in saved_tracks for artist in track["artists"]
+            )
+        )
+        saved_artist_ids = [
+            artist_id for artist_id in saved_artist_ids if artist_id in artists_by_id
+        ]
+        followed_ids = self.rng.sample(
+            saved_artist_ids, int(len(saved_artist_ids) * FOLLOWED_ARTIST_RATIO)
+        )
+        return [artists_by_id[artist_id] for artist_id in followed_ids]
+
+    def make_playlists(self, count: int) -> List[dict]:
+        num_other_playlists = max(1, int(count * OTHER_PLAYLIST_RATIO))
+        playlists = []
+        for index in range(count):
+            playlist_id = self.make_id()
+            # the first few are followed playlists made by someone else
+            owner = "someone_else" if index < num_other_playlists else USER_DISPLAY_NAME
+            playlists.append(
+                {
+                    **self.links("playlist", playlist_id),
+                    "collaborative": False,
+                    "description": "",
+                    "images": self.make_images(playlist_id, 1),
+                    "name": self.make_title(1, 3),
+                    "owner": {
+                        **self.links("user", owner),
+                        "display_name": owner,
+                    },
+                    "primary_color": None,
+                    "public": self.rng.random() < 0.7,
+                    "snapshot_id": self.make_id(),
+                    "tracks": {
+                        "href": f"{API_URL}/playlists/{playlist_id}/tracks",
+                        # set once the tracks are made
+                        "total": 0,
+                    },
+                }
+            )
+        return playlists
+
+    def make_playlist_tracks(
+        self, playlist: dict, saved_tracks: List[dict], catalogue: List[dict]
+    ) -> List[Optional[dict]]:
+        size = min(
+            len(catalogue), max(1, int(self.rng.expovariate(1 / TRACKS_PER_PLAYLIST)))
+        )
+        tracks = []
+        for _ in range(size):
+            roll = self.rng.random()
+            if roll < REMOVED_TRACK_RATIO:
+                tracks.append(None)
+            elif roll < REMOVED_TRACK_RATIO + LOCAL_TRACK_RATIO:
+                tracks.append(self.make_local_track())
+            else:
+                source = (
+                    saved_tracks
+                    if self.rng.random() < PLAYLIST_SAVED_TRACK_RATIO
+                    else catalogue
+                )
+                # playlist items carry the track/episode flags saved tracks don't
+                tracks.append(dict(self.rng.choice(source), episode=False, track=True))
+        playlist["tracks"]["total"] = len(tracks)
+        return tracks
+
+    def make_local_track(self) -> dict:
+        artist_name = self.make_title(1, 2)
+        name = self.make_title()
+        duration_sec = self.rng.randint(120, 400)
+        uri = f"spotify:local:{artist_name}::{name}:{duration_sec}".replace(" ", "+")
+        return {
+            "album": {
+                "album_type": None,
+                "artists": [],
+                "external_urls": {},
+                "href": None,
+                "id": None,
+                "images": [],
+                "name": "",
+                "release_date": None,
+                "release_date_precision": None,
+                "type": "album",
+                "uri": None,
+            },
+            "artists": [
+                {
+                    "external_urls": {},
+                    "href": None,
+                    "id": None,
+                    "name": artist_name,
+                    "type": "artist",
+                    "uri": None,
+                }
+            ],
+            "disc_number": 0,
+            "duration_ms": duration_sec * 1000,
+            "episode": False,
+            "explicit": False,
+            "external_ids": {},
+            "external_urls": {},
+            "href": None,
+            "id": None,
+            "is_local": True,
+            "name": name,
+            "popularity": 0,
+            "preview_url": None,
+            "track": True,
+            "track_number": 0,
+            "type": "track",
+            "uri": uri,
+        }
+
+
+def unique_playlist_tracks(playlist_tracks: Dict[str, list]) -> Dict[str, dict]:
+    """As the getters build them: by URI, removed tracks skipped."""
+    return {
+        track["uri"]: track
+        for tracks in playlist_tracks.values()
+        for track in tracks
+        if track is not None
+    }
+
+
+def unique_playlist_artists(playlist_tracks: Dict[str, list]) -> Dict[str, dict]:
+    return {
+        artist["id"]: artist
+        for tracks in playlist_tracks.values()
+        for track in tracks
+        if track is not None
+        for artist in track["artists"]
+    }
+
+
+def write_snapshot(data, data_type: str, data_location: str) -> str:
+    """Write a snapshot byte for byte as ``zip_data`` does, but streamed,
+    so a million tracks never become one JSON string in memory."""
+    os.makedirs(data_location, exist_ok=True)
+    zip_filename = f"{data_location}/{data_type}.gz"
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=4)
+    chunks = encoder.iterencode(data)
+    with gzip.open(zip_filename, "wb", compresslevel=5) as handle:
+        # the encoder yields tiny fragments, write them a batch at a time
+        while batch := "".join(itertools.islice(chunks, WRITE_BATCH_SIZE)):
+            handle.write(batch.encode("utf-8"))
+    logger.debug(f"Wrote {zip_filename}")
+    return zip_filename
+
+
+def write_synthetic_library(
+    raw_data_location: str,
+    num_tracks: int,
+    seed: int = DEFAULT_SEED,
+    date_folder: Optional[str] = None,
+) -> str:
+    """Generate a library and write it to ``raw_data_location/date_folder``.
+
+    Returns the folder, which is what ``most_recent_directory`` picks up when
+    ``date_folder`` (by default today) sorts last.
+    """
+    data_location = os.path.join(
+        raw_data_location, date_folder or str(datetime.date.today())
+    )
+    data = SyntheticLibrary(num_tracks, seed).build()
+    for data_type, snapshot in data.items():
+        write_snapshot(snapshot, data_type, data_location)
+    logger.info(
+        f"Wrote a synthetic library of {len(data[SAVED_TRACKS])} saved tracks, "
+        f"{len(data[SAVED_ALBUMS])} albums, {len(data[SAVED_ARTISTS])} artists and "
+        f"{len(data[PLAYLISTS])} playlists to {data_location}"
+    )
+    return data_location
+
+
+def main():
+    setup_app_logging(logger, logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("raw_data_location", help="the raw data folder to write into")
+    parser.add_argument(
+        "--tracks",
+        type=int,
+        default=10_000,
+        help=f"saved tracks, {MIN_TRACKS} to {MAX_TRACKS}",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--date-folder", help="defaults to today's date")
+    args = parser.parse_args()
+    write_synthetic_library(
+        args.raw_data_location, args.tracks, args.seed, args.date_folder
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.synthetic_library import (
+    SyntheticLibrary,
+    write_synthetic_library,
+)
+from spotify.spotify_enrich import ARTISTS_JOINED, DURATION_MIN
+from spotify.spotify_utils import (
+    PLAYLIST_TRACKS,
+    PLAYLISTS,
+    SAVED_TRACKS,
+    UNIQUE_PLAYLIST_TRACKS,
+    most_recent_directory,
+    unzip_data_from_zip,
+)
+
+
+class SyntheticLibraryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = SyntheticLibrary(1_000, seed=7).build()
+
+    def test_same_seed_gives_the_same_library(self):
+        again = SyntheticLibrary(1_000, seed=7).build()
+        other = SyntheticLibrary(1_000, seed=8).build()
+
+        self.assertEqual(json.dumps(self.data), json.dumps(again))
+        self.assertNotEqual(
+            json.dumps(self.data[SAVED_TRACKS]), json.dumps(other[SAVED_TRACKS])
+        )
+
+    def test_library_has_the_awkward_cases(self):
+        tracks = self.data[SAVED_TRACKS]
+        playlist_tracks = [
+            track for tracks in self.data[PLAYLIST_TRACKS].values() for track in tracks
+        ]
+
+        self.assertEqual(1_000, len(tracks))
+        self.assertTrue(any(not track["external_ids"] for track in tracks))
+        isrcs = [
+            track["external_ids"]["isrc"] for track in tracks if track["external_ids"]
+        ]
+        self.assertLess(len(set(isrcs)), len(isrcs))
+        self.assertTrue(any(len(track["artists"]) > 1 for track in tracks))
+        self.assertTrue(any(track and track["is_local"] for track in playlist_tracks))
+        self.assertIn("compilation", {track["album"]["album_type"] for track in tracks})
+        # playlists share tracks with the saved library
+        saved_ids = {track["id"] for track in tracks}
+        self.assertTrue(
+            any(track and track["id"] in saved_ids for track in playlist_tracks)
+        )
+        self.assertEqual(len(self.data[PLAYLISTS]), len(self.data[PLAYLIST_TRACKS]))
+
+    def test_snapshots_carry_derived_fields(self):
+        track = self.data[SAVED_TRACKS][0]
+        unique_track = next(iter(self.data[UNIQUE_PLAYLIST_TRACKS].values()))
+
+        self.assertEqual(
+            ", ".join(artist["name"] for artist in track["artists"]),
+            track[ARTISTS_JOINED],
+        )
+        self.assertIn(DURATION_MIN, unique_track)
+
+    def test_writes_snapshots_where_loaders_find_them(self):
+        with tempfile.TemporaryDirectory() as raw_data_location:
+            data_location = write_synthetic_library(
+                raw_data_location, 1_000, seed=7, date_folder="2026-01-01"
+            )
+
+            self.assertEqual("2026-01-01", most_recent_directory(raw_data_location))
+            saved_tracks = unzip_data_from_zip(
+                os.path.join(data_location, f"{SAVED_TRACKS}.gz")
+            )
+        self.assertEqual(
+            json.loads(json.dumps(self.data[SAVED_TRACKS])), saved_tracks
+        )
+
+    def test_size_is_bounded(self):
+        with self.assertRaises(ValueError):
+            SyntheticLibrary(10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import zlib
 from configparser import ConfigParser
 from typing import List
 
-from flask import Flask, jsonify, render_template, url_for, redirect
+from flask import Flask, jsonify, render_template, url_for, redirect, request
 from json2html import json2html
 
 from spotify.spotify_get_data_non_async import SpotifyDataGetter
@@ -15,7 +15,7 @@ from spotify.spotify_utils import (
     get_config_location,
 )
 from storage.file.spotify_save_to_file import SpotifyToFile
-from storage.mongo.spotify_read_from_mongo import SpotifyFromMongo
+from storage.mongo.spotify_read_from_mongo import SpotifyFromMongo, DEFAULT_PAGE_SIZE
 from storage.mongo.spotify_save_to_mongo import SpotifyToMongo
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -59,30 +59,44 @@ def index():
     return render_template("index.html", routes=routes)
 
 
+def page_args() -> dict:
+    """Optional ?page=&page_size=&sort=&desc= query arguments for the Mongo readers."""
+    return {
+        "page": request.args.get("page", type=int),
+        "page_size": request.args.get("page_size", DEFAULT_PAGE_SIZE, type=int),
+        "sort": request.args.get("sort", "name"),
+        "descending": request.args.get("desc", "false").lower() == "true",
+    }
+
+
+def aggregate_arg() -> bool:
+    return request.args.get("aggregate", "false").lower() == "true"
+
+
 @app.route("/liked_albums", methods=["GET"], endpoint="liked_albums")
 def get_albums():
-    items: List[dict] = app.spotify_from_mongo.get_liked_albums()
+    items: List[dict] = app.spotify_from_mongo.get_liked_albums(**page_args())
 
     return convert_json_to_html(items)
 
 
 @app.route("/liked_artists", methods=["GET"], endpoint="liked_artists")
 def get_artists():
-    items: List[dict] = app.spotify_from_mongo.get_liked_artists()
+    items: List[dict] = app.spotify_from_mongo.get_liked_artists(**page_args())
 
     return convert_json_to_html(items)
 
 
 @app.route("/liked_tracks", methods=["GET"], endpoint="liked_tracks")
 def get_tracks():
-    items: List[dict] = app.spotify_from_mongo.get_liked_tracks()
+    items: List[dict] = app.spotify_from_mongo.get_liked_tracks(**page_args())
 
     return convert_json_to_html(items)
 
 
 @app.route("/playlists", methods=["GET"], endpoint="playlists")
 def get_playlists():
-    items: List[dict] = app.spotify_from_mongo.get_playlists()
+    items: List[dict] = app.spotify_from_mongo.get_playlists(**page_args())
 
     return convert_json_to_html(items)
 
@@ -91,14 +105,16 @@ def get_playlists():
     "/unique_playlist_tracks", methods=["GET"], endpoint="unique_playlist_tracks"
 )
 def get_unique_playlist_tracks():
-    items: List[dict] = app.spotify_from_mongo.get_unique_playlist_tracks()
+    items: List[dict] = app.spotify_from_mongo.get_unique_playlist_tracks(
+        aggregate=aggregate_arg(), **page_args()
+    )
 
     return convert_json_to_html(items)
 
 
 @app.route("/playlist_tracks", methods=["GET"], endpoint="playlist_tracks")
 def get_playlist_tracks():
-    items: List[dict] = app.spotify_from_mongo.get_playlist_tracks()
+    items: List[dict] = app.spotify_from_mongo.get_playlist_tracks(**page_args())
 
     return convert_json_to_html(items)
 
@@ -107,14 +123,16 @@ def get_playlist_tracks():
     "/unique_playlist_artists", methods=["GET"], endpoint="unique_playlist_artists"
 )
 def get_playlist_unique_artists():
-    items: List[dict] = app.spotify_from_mongo.get_playlist_unique_artists()
+    items: List[dict] = app.spotify_from_mongo.get_playlist_unique_artists(
+        aggregate=aggregate_arg(), **page_args()
+    )
 
     return convert_json_to_html(items)
 
 
 @app.route("/liked_album_tracks", methods=["GET"], endpoint="liked_album_tracks")
 def get_album_tracks():
-    items: List[dict] = app.spotify_from_mongo.get_liked_album_tracks()
+    items: List[dict] = app.spotify_from_mongo.get_liked_album_tracks(**page_args())
 
     return convert_json_to_html(items)
 
@@ -323,6 +341,10 @@ async def setup():
     logger.info("Setting up")
     app.all_data = await load_data()
     app.spotify_from_mongo = SpotifyFromMongo()
+    try:
+        app.spotify_from_mongo.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create Mongo indexes: {e}")
     app.spotify_from_mongo.all_data = app.all_data
     app.playlist_maker = SpotifyPlaylistMaker(use_zip=False, get_data=False)
     app.playlist_maker.all_data = app.all_data
@@ -1,20 +1,105 @@
+import asyncio
+import json
 from os import environ
+from typing import Dict, List, Optional, Tuple
 
 import asyncpg
 
+# Process-wide pools, one per distinct set of connection settings, each tied
+# to the event loop it was created on
+_shared_pools: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncpg.Pool]] = {}
+_shared_pools_lock: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
 
-async def create_pool() -> asyncpg.Pool:
-    return await asyncpg.create_pool(
+
+JSONB_FORMAT_VERSION = b"\x01"
+
+
+class JsonText(str):
+    """JSON a writer serialized itself, sent to json and jsonb columns as is."""
+
+
+def encode_json(value) -> bytes:
+    # anything else, plain strings included, is a value to serialize
+    text = value if isinstance(value, JsonText) else json.dumps(value)
+    return text.encode("utf-8")
+
+
+def encode_jsonb(value) -> bytes:
+    return JSONB_FORMAT_VERSION + encode_json(value)
+
+
+def decode_jsonb(data: bytes):
+    return json.loads(data[1:])
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Decode json and jsonb columns once, in the driver, as Python objects.
+
+    The codecs use the binary format so COPY (``copy_records_to_table``) can
+    use them too; binary jsonb is its text prefixed with a version byte.
+    Parameters are Python values, serialized here; only ``JsonText`` is
+    taken to be JSON already.
+    """
+    await conn.set_type_codec(
+        "json", encoder=encode_json, decoder=json.loads, schema="pg_catalog", format="binary"
+    )
+    await conn.set_type_codec(
+        "jsonb", encoder=encode_jsonb, decoder=decode_jsonb, schema="pg_catalog", format="binary"
+    )
+
+
+async def create_pool(**overrides) -> asyncpg.Pool:
+    pool_args = dict(
         database=environ.get("POSTGRES_DATABASE", "spotify"),
         host=environ.get("POSTGRES_HOST", "localhost"),
         port=environ.get("POSTGRES_PORT", 5432),
         user=environ.get("POSTGRES_USER", "postgres"),
         password=environ.get("POSTGRES_PASSWORD"),
         max_size=50,
+        init=init_connection,
     )
+    pool_args.update(overrides)
+    return await asyncpg.create_pool(**pool_args)
+
+
+def _get_shared_pools_lock(loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+    global _shared_pools_lock
+    if _shared_pools_lock is None or _shared_pools_lock[0] is not loop:
+        _shared_pools_lock = (loop, asyncio.Lock())
+    return _shared_pools_lock[1]
+
+
+async def get_shared_pool(**overrides) -> asyncpg.Pool:
+    """The process-wide pool for these settings, created on first use.
+
+    Every Postgres component asks for its pool here, so connections are set
+    up once per process instead of once per call, and their prepared
+    statement caches are reused. ``overrides`` are passed to ``create_pool``.
+    """
+    loop = asyncio.get_running_loop()
+    key = json.dumps(overrides, sort_keys=True, default=str)
+    async with _get_shared_pools_lock(loop):
+        pool_loop, pool = _shared_pools.get(key, (None, None))
+        if pool is None or pool_loop is not loop or pool.is_closing():
+            # a pool from an earlier event loop can't be used on this one
+            pool = await create_pool(**overrides)
+            _shared_pools[key] = (loop, pool)
+    return pool
+
+
+async def close_shared_pools() -> None:
+    """Close the pools created on the running event loop, e.g. at shutdown."""
+    loop = asyncio.get_running_loop()
+    for key, (pool_loop, pool) in list(_shared_pools.items()):
+        if pool_loop is loop:
+            del _shared_pools[key]
+            await pool.close()
 
 
 class PostgresDriver:
+    # procedure name -> call statement with typed placeholders, looked up once
+    _procedure_statements: Dict[str, str] = {}
+
     @classmethod
     async def count_table_size(cls, pool: asyncpg.Pool, table_name: str) -> int:
         async with pool.acquire() as conn:
@@ -36,34 +121,50 @@ class PostgresDriver:
     async def execute_procedure(
             cls, pool: asyncpg.Pool, procedure_name: str, *args
     ) -> list[asyncpg.Record]:
-        """Runs a procedure, can pass as many arguments as defined and returns the procedure's output"""
+        """Runs a procedure, can pass as many arguments as defined and returns the procedure's output
+
+        The procedure's signature is only looked up on the first call. As the
+        statement text is then the same every time, asyncpg reuses the
+        connection's prepared statement for it, so later calls are one round trip.
+        """
         async with pool.acquire() as conn:
             procedure_statement = "SELECT * FROM %s" % await cls._add_arguments(
                 conn, procedure_name
             )
             return await conn.fetch(procedure_statement, *args)
 
+    @classmethod
+    def clear_procedure_cache(cls) -> None:
+        """Forget cached signatures, for when procedures are redefined."""
+        cls._procedure_statements.clear()
+
     @classmethod
     async def _add_arguments(cls, conn: asyncpg.Connection, procedure_name: str):
-        proc_args = await cls._get_procedures_arguments(conn, procedure_name)
-        return '"%s"(%s)' % (
-            procedure_name.replace('"', '""'),
-            await cls._concatenate_arguments(conn, proc_args),
-        )
+        statement = cls._procedure_statements.get(procedure_name)
+        if statement is None:
+            arg_types = await cls._get_procedures_arguments(conn, procedure_name)
+            statement = '"%s"(%s)' % (
+                procedure_name.replace('"', '""'),
+                cls._concatenate_arguments(arg_types),
+            )
+            cls._procedure_statements[procedure_name] = statement
+        return statement
 
     @staticmethod
-    async def _get_procedures_arguments(conn, procedure_name):
-        args = await conn.fetchval("select proargtypes from pg_proc where proname=$1;", procedure_name)
-        return args
+    async def _get_procedures_arguments(conn, procedure_name) -> List[str]:
+        """Type names of the procedure's arguments, in order, in one query."""
+        arg_types = await conn.fetchval(
+            "select array(select t.typname "
+            "from unnest(p.proargtypes) with ordinality as a(oid, position) "
+            "join pg_type t on t.oid = a.oid order by a.position) "
+            "from pg_proc p where p.proname=$1;",
+            procedure_name,
+        )
+        return arg_types or []
 
     @staticmethod
-    async def _concatenate_arguments(conn, proc_args):
-        count = 1
-        args = []
-        for proc_arg in proc_args:
-            arg_type = await conn.fetchval(
-                "select typname from pg_type where oid=$1;", proc_arg
-            )
-            args.append("$%i::%s" % (count, arg_type))
-            count += 1
-        return ", ".join(args)
+    def _concatenate_arguments(arg_types: List[str]) -> str:
+        return ", ".join(
+            "$%i::%s" % (count, arg_type)
+            for count, arg_type in enumerate(arg_types, start=1)
+        )
@@ -5,11 +5,18 @@ from unittest.mock import patch, AsyncMock
 import asyncpg
 
 from postgres.postgres_driver import (
+    JsonText,
     PostgresDriver,
+    close_shared_pools,
     create_pool,
+    decode_jsonb,
+    encode_json,
+    encode_jsonb,
+    get_shared_pool,
+    init_connection,
 )
 
-PATCH_LOCATION = "storage_drivers.postgres.postgres_driver"
+PATCH_LOCATION = "postgres.postgres_driver"
 
 
 @patch(f"{PATCH_LOCATION}.asyncpg", new_callable=AsyncMock)
@@ -19,12 +26,13 @@ class PostgresCreatePoolTest(unittest.IsolatedAsyncioTestCase):
             await create_pool()
 
             asyncpg_spy.create_pool.assert_called_with(
-                database="illuminate",
+                database="spotify",
                 host="localhost",
                 port=5432,
                 user="postgres",
                 password="not-a-real-password",
                 max_size=50,
+                init=init_connection,
             )
 
     async def test_passes_environment_variables_to_create_connection_pool(
@@ -35,7 +43,7 @@ class PostgresCreatePoolTest(unittest.IsolatedAsyncioTestCase):
             {
                 "POSTGRES_DATABASE": "not_illuminate",
                 "POSTGRES_HOST": "not_localhost",
-                "POSTGRES_PORT": 54320,
+                "POSTGRES_PORT": "54320",
                 "POSTGRES_USER": "not_postgres",
                 "POSTGRES_PASSWORD": "not-a-real-password",
             },
@@ -46,13 +54,20 @@ class PostgresCreatePoolTest(unittest.IsolatedAsyncioTestCase):
             asyncpg_spy.create_pool.assert_called_with(
                 database="not_illuminate",
                 host="not_localhost",
-                port=54320,
+                port="54320",
                 user="not_postgres",
                 password="not-a-real-password",
                 max_size=50,
+                init=init_connection,
             )
 
-            yield  # Needed to clear the env vars properly after the test
+
+class JsonCodecTest(unittest.TestCase):
+    def test_values_are_serialized_unless_already_json(self):
+        self.assertEqual(b'"abc"', encode_json("abc"))
+        self.assertEqual(b'{"a": [1]}', encode_json({"a": [1]}))
+        self.assertEqual(b'{"a": 1}', encode_json(JsonText('{"a": 1}')))
+        self.assertEqual("abc", decode_jsonb(encode_jsonb("abc")))
 
 
 ENV_VARS = {"POSTGRES_PASSWORD": "not-a-real-password"}
@@ -60,6 +75,9 @@ PROCEDURE_NAME = "SomeProcedure"
 
 
 class PostgresDriverTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        PostgresDriver.clear_procedure_cache()
+
     async def test_counts_table_size(self):
         with (
             patch(f"{PATCH_LOCATION}.asyncpg.Pool", spec=asyncpg.Pool) as mock_pool,
@@ -93,7 +111,7 @@ class PostgresDriverTest(unittest.IsolatedAsyncioTestCase):
         ):
             conn_attrs = {
                 "fetch.return_value": [],
-                "fetchval.side_effect": [["maximum"], "integer"],
+                "fetchval.return_value": ["integer"],
             }
             conn = AsyncMock(**conn_attrs)
             mock_pool.acquire().__aenter__.return_value = conn
@@ -111,7 +129,7 @@ class PostgresDriverTest(unittest.IsolatedAsyncioTestCase):
         ):
             conn_attrs = {
                 "fetch.return_value": [("output_1", "output_2")],
-                "fetchval.side_effect": [["maximum"], "integer"],
+                "fetchval.return_value": ["integer"],
             }
             conn = AsyncMock(**conn_attrs)
             mock_pool.acquire().__aenter__.return_value = conn
@@ -131,12 +149,7 @@ class PostgresDriverTest(unittest.IsolatedAsyncioTestCase):
                     ("output_1a", "output_1b"),
                     ("output_2a", "output_2b"),
                 ],
-                "fetchval.side_effect": [
-                    ["maximum", "text_field", "boolean_field"],
-                    "integer",
-                    "text",
-                    "boolean",
-                ],
+                "fetchval.return_value": ["integer", "text", "boolean"],
             }
             conn = AsyncMock(**conn_attrs)
             mock_pool.acquire().__aenter__.return_value = conn
@@ -154,3 +167,38 @@ class PostgresDriverTest(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(
                 [("output_1a", "output_1b"), ("output_2a", "output_2b")], output
             )
+
+    async def test_procedure_signature_is_looked_up_once(self):
+        with (
+            patch(f"{PATCH_LOCATION}.asyncpg.Pool", spec=asyncpg.Pool) as mock_pool,
+            patch.dict(os.environ, ENV_VARS),
+        ):
+            conn = AsyncMock(**{"fetch.return_value": [], "fetchval.return_value": ["integer"]})
+            mock_pool.acquire().__aenter__.return_value = conn
+
+            await PostgresDriver.execute_procedure(mock_pool, PROCEDURE_NAME, 1)
+            await PostgresDriver.execute_procedure(mock_pool, PROCEDURE_NAME, 2)
+
+            conn.fetchval.assert_called_once()
+            self.assertEqual(
+                conn.fetch.call_args_list[0].args[0], conn.fetch.call_args_list[1].args[0]
+            )
+
+
+@patch(f"{PATCH_LOCATION}.asyncpg", new_callable=AsyncMock)
+class SharedPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_pool_is_created_once_per_settings(self, asyncpg_spy):
+        asyncpg_spy.create_pool.side_effect = lambda **kwargs: AsyncMock(
+            is_closing=lambda: False
+        )
+
+        first = await get_shared_pool()
+        self.assertIs(first, await get_shared_pool())
+        other = await get_shared_pool(database="other")
+        self.assertIsNot(first, other)
+        self.assertEqual(2, asyncpg_spy.create_pool.call_count)
+
+        await close_shared_pools()
+        first.close.assert_awaited_once()
+        self.assertIsNot(first, await get_shared_pool())
+        await close_shared_pools()
@@ -1,18 +1,66 @@
+import argparse
 import logging
+import os
 
+from spotify.spotify_playlist_jobs import DEFAULT_MAX_WORKERS
 from spotify.spotify_playlist_maker import SpotifyPlaylistMaker
 from spotify.spotify_utils import setup_app_logging
 
 logger = logging.getLogger(__name__)
 
+SEARCH_TERM_FILES = "data/search_term_files"
+
 
 def main():
     setup_app_logging(logger, logging.DEBUG)
+    parser = argparse.ArgumentParser(description="Create Spotify playlists")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Regenerate all year, decade, search term and artist playlists",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="Number of playlists written at once",
+    )
+    args = parser.parse_args()
 
     spotify_playlist_maker: SpotifyPlaylistMaker = SpotifyPlaylistMaker(
         use_zip=True
     )
-    make_playlists(spotify_playlist_maker)
+    if args.all:
+        regenerate_all_playlists(spotify_playlist_maker, max_workers=args.workers)
+    else:
+        make_playlists(spotify_playlist_maker)
+
+
+def read_search_term_file(file_name):
+    path = os.path.join(SEARCH_TERM_FILES, file_name)
+    if not os.path.exists(path):
+        logger.debug(f"No search term file {path}")
+        return []
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def regenerate_all_playlists(spotify_playlist_maker, max_workers=DEFAULT_MAX_WORKERS):
+    """Nightly regeneration of the year, decade, search term and artist playlists."""
+    tracks = spotify_playlist_maker.saved_tracks
+    specs = spotify_playlist_maker.get_playlist_specs_by_year(
+        tracks, start_year=1955, end_year=2024, playlist_prefix="Liked"
+    )
+    specs += spotify_playlist_maker.get_playlist_specs_by_decade(
+        tracks, start_year=193, end_year=202, playlist_prefix="Liked"
+    )
+    specs += spotify_playlist_maker.get_playlist_specs_for_search_terms(
+        read_search_term_file("colours.txt"), "colours", tracks
+    )
+    specs += spotify_playlist_maker.get_playlist_specs_for_artists(
+        read_search_term_file("artists.txt"), "Liked", tracks
+    )
+    return spotify_playlist_maker.regenerate_playlists(specs, max_workers=max_workers)
 
 
 def make_playlists(spotify_playlist_maker):
@@ -0,0 +1,71 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_CACHE_FILE = "playlist_cache.sqlite"
+
+
+class PlaylistCache:
+    """On-disk cache of playlist track ids keyed by playlist id and snapshot_id.
+
+    Spotify gives every playlist version a new ``snapshot_id``, so an entry is
+    only returned while the caller's snapshot id still matches; any change made
+    elsewhere shows up as a miss. One row is kept per playlist, holding the
+    latest version we have seen or written. Safe to share between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS playlist_items (
+                    playlist_id TEXT PRIMARY KEY,
+                    snapshot_id TEXT NOT NULL,
+                    track_ids TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, playlist_id: str, snapshot_id: Optional[str]) -> Optional[List[str]]:
+        if snapshot_id is None:
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT track_ids FROM playlist_items"
+                " WHERE playlist_id = ? AND snapshot_id = ?",
+                (playlist_id, snapshot_id),
+            ).fetchone()
+        if row is None:
+            logger.debug(f"Playlist cache miss for {playlist_id} at {snapshot_id}")
+            return None
+        logger.debug(f"Playlist cache hit for {playlist_id} at {snapshot_id}")
+        return json.loads(row[0])
+
+    def put(self, playlist_id: str, snapshot_id: Optional[str], track_ids: List[str]) -> None:
+        if snapshot_id is None:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO playlist_items"
+                " (playlist_id, snapshot_id, track_ids, updated_at) VALUES (?, ?, ?, ?)",
+                (playlist_id, snapshot_id, json.dumps(track_ids), time.time()),
+            )
+
+    def invalidate(self, playlist_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM playlist_items WHERE playlist_id = ?", (playlist_id,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,173 @@
+import bisect
+import logging
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Spotify accepts at most 100 items per add/remove call
+MAX_ITEMS_PER_CALL = 100
+
+
+class PlaylistMove(BaseModel):
+    """A single reorder call, indices as Spotify expects them (before the move)."""
+
+    range_start: int
+    insert_before: int
+
+
+class PlaylistAddition(BaseModel):
+    """A batch of track ids to insert at a position (None appends)."""
+
+    position: Optional[int] = None
+    track_ids: List[str]
+
+
+class PlaylistDiff(BaseModel):
+    """Operations turning the current playlist contents into the desired ones.
+
+    Apply removals first, then moves, then additions in the given order.
+    """
+
+    to_remove: List[str] = []
+    moves: List[PlaylistMove] = []
+    additions: List[PlaylistAddition] = []
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.to_remove or self.moves or self.additions)
+
+    @property
+    def num_added(self) -> int:
+        return sum(len(addition.track_ids) for addition in self.additions)
+
+    def api_calls(self, batch_size: int = MAX_ITEMS_PER_CALL) -> int:
+        removal_calls = (len(self.to_remove) + batch_size - 1) // batch_size
+        return removal_calls + len(self.moves) + len(self.additions)
+
+
+def compute_playlist_diff(
+    current_ids: Iterable[str],
+    desired_ids: Iterable[str],
+    reorder: bool = True,
+    batch_size: int = MAX_ITEMS_PER_CALL,
+) -> PlaylistDiff:
+    """Compute the minimal add/remove/reorder operations between two track id lists.
+
+    Duplicate ids are collapsed to their first occurrence in the desired list;
+    ids duplicated in the current playlist are removed and added back once.
+    With ``reorder`` disabled, new tracks are simply appended and the order of
+    kept tracks is left alone.
+    """
+    current_ids = list(current_ids)
+    desired = dedupe_track_ids(desired_ids)
+    desired_set: Set[str] = set(desired)
+
+    occurrences = Counter(current_ids)
+    to_remove = [
+        track_id
+        for track_id in dict.fromkeys(current_ids)
+        if track_id not in desired_set or occurrences[track_id] > 1
+    ]
+    remove_set = set(to_remove)
+    kept = [track_id for track_id in current_ids if track_id not in remove_set]
+    kept_set = set(kept)
+
+    if not reorder:
+        new_ids = [track_id for track_id in desired if track_id not in kept_set]
+        additions = [
+            PlaylistAddition(track_ids=new_ids[i: i + batch_size])
+            for i in range(0, len(new_ids), batch_size)
+        ]
+        return PlaylistDiff(to_remove=to_remove, additions=additions)
+
+    target = [track_id for track_id in desired if track_id in kept_set]
+    moves = [
+        PlaylistMove(range_start=range_start, insert_before=insert_before)
+        for range_start, insert_before in _compute_moves(kept, target)
+    ]
+    return PlaylistDiff(
+        to_remove=to_remove,
+        moves=moves,
+        additions=_compute_positional_additions(desired, kept_set, batch_size),
+    )
+
+
+def dedupe_track_ids(track_ids: Iterable[str]) -> List[str]:
+    """The playlist contents a sync produces: first occurrences, empty ids dropped."""
+    return list(dict.fromkeys(track_id for track_id in track_ids if track_id))
+
+
+def _compute_moves(current: List[str], target: List[str]) -> List[Tuple[int, int]]:
+    """Single item moves reordering ``current`` into ``target`` (same items).
+
+    Items on a longest increasing subsequence stay put, every other item is
+    moved directly after its predecessor in the target order, which needs
+    the minimum number of single item moves.
+    """
+    if current == target:
+        return []
+    rank = {track_id: i for i, track_id in enumerate(target)}
+    stable = _longest_increasing_subsequence(current, rank)
+
+    simulated = list(current)
+    moves: List[Tuple[int, int]] = []
+    for i, track_id in enumerate(target):
+        if track_id in stable:
+            continue
+        range_start = simulated.index(track_id)
+        insert_before = simulated.index(target[i - 1]) + 1 if i > 0 else 0
+        simulated.pop(range_start)
+        simulated.insert(
+            insert_before if insert_before < range_start else insert_before - 1,
+            track_id,
+        )
+        if range_start != insert_before and range_start + 1 != insert_before:
+            moves.append((range_start, insert_before))
+    return moves
+
+
+def _longest_increasing_subsequence(items: List[str], rank: dict) -> Set[str]:
+    tails: List[int] = []
+    tail_indices: List[int] = []
+    previous: List[int] = [-1] * len(items)
+    for index, item in enumerate(items):
+        value = rank[item]
+        position = bisect.bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_indices.append(index)
+        else:
+            tails[position] = value
+            tail_indices[position] = index
+        previous[index] = tail_indices[position - 1] if position > 0 else -1
+
+    stable: Set[str] = set()
+    index = tail_indices[-1] if tail_indices else -1
+    while index != -1:
+        stable.add(items[index])
+        index = previous[index]
+    return stable
+
+
+def _compute_positional_additions(
+    desired: List[str], kept_set: Set[str], batch_size: int
+) -> List[PlaylistAddition]:
+    """Group runs of new ids into positional inserts, processed left to right."""
+    additions: List[PlaylistAddition] = []
+    run_start = None
+    run: List[str] = []
+    for position, track_id in enumerate(desired + [None]):
+        if track_id is not None and track_id not in kept_set:
+            if not run:
+                run_start = position
+            run.append(track_id)
+            continue
+        for i in range(0, len(run), batch_size):
+            additions.append(
+                PlaylistAddition(position=run_start + i, track_ids=run[i: i + batch_size])
+            )
+        run = []
+    return additions
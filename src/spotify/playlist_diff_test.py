@@ -0,0 +1,70 @@
+import random
+import unittest
+
+from spotify.playlist_diff import compute_playlist_diff
+
+
+def apply_diff(current, diff):
+    """Apply a diff the way the Spotify Web API would."""
+    playlist = [track_id for track_id in current if track_id not in set(diff.to_remove)]
+    for move in diff.moves:
+        item = playlist[move.range_start]
+        playlist.insert(move.insert_before, item)
+        playlist.pop(move.range_start + 1 if move.insert_before <= move.range_start else move.range_start)
+    for addition in diff.additions:
+        if addition.position is None:
+            playlist.extend(addition.track_ids)
+        else:
+            playlist[addition.position:addition.position] = addition.track_ids
+    return playlist
+
+
+class PlaylistDiffTest(unittest.TestCase):
+    def test_unchanged_playlist_needs_no_calls(self):
+        diff = compute_playlist_diff(["a", "b", "c"], ["a", "b", "c"])
+
+        self.assertTrue(diff.is_empty)
+        self.assertEqual(0, diff.api_calls())
+
+    def test_small_change_to_large_playlist_needs_few_calls(self):
+        current = [f"t{i}" for i in range(3000)]
+        desired = [track_id for track_id in current if track_id != "t10"] + ["new"]
+
+        diff = compute_playlist_diff(current, desired)
+
+        self.assertEqual(["t10"], diff.to_remove)
+        self.assertEqual([], diff.moves)
+        self.assertEqual(2, diff.api_calls())
+        self.assertEqual(desired, apply_diff(current, diff))
+
+    def test_moving_one_track_is_a_single_reorder(self):
+        diff = compute_playlist_diff(["a", "b", "c", "d"], ["b", "c", "d", "a"])
+
+        self.assertEqual(1, len(diff.moves))
+        self.assertEqual(["b", "c", "d", "a"], apply_diff(["a", "b", "c", "d"], diff))
+
+    def test_duplicates_are_collapsed(self):
+        diff = compute_playlist_diff(["a", "b", "a"], ["a", "b", "b"])
+
+        self.assertEqual(["a", "b"], apply_diff(["a", "b", "a"], diff))
+
+    def test_without_reorder_new_tracks_are_appended(self):
+        diff = compute_playlist_diff(["a", "b"], ["c", "b", "a"], reorder=False)
+
+        self.assertEqual([], diff.moves)
+        self.assertEqual(["a", "b", "c"], apply_diff(["a", "b"], diff))
+
+    def test_random_playlists_converge(self):
+        rng = random.Random(42)
+        pool = [f"t{i}" for i in range(60)]
+        for _ in range(300):
+            current = rng.sample(pool, rng.randint(0, 40))
+            desired = rng.sample(pool, rng.randint(0, 40))
+
+            diff = compute_playlist_diff(current, desired, batch_size=7)
+
+            self.assertEqual(desired, apply_diff(current, diff))
+
+
+if __name__ == "__main__":
+    unittest.main()
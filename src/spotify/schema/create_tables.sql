@@ -12,7 +12,9 @@ CREATE TABLE IF NOT EXISTS spot_artists (
     popularity INTEGER,
     followers INTEGER,
     spotify_url TEXT,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    content_hash TEXT
 );
 
 -- Create albums table
@@ -29,7 +31,9 @@ CREATE TABLE IF NOT EXISTS spot_albums (
     album_type TEXT NOT NULL,
     available_markets JSONB,
     spotify_url TEXT,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    content_hash TEXT
 );
 
 -- Create album_artists junction table
@@ -52,7 +56,9 @@ CREATE TABLE IF NOT EXISTS spot_tracks (
     available_markets JSONB,
     isrc TEXT,
     spotify_url TEXT,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    content_hash TEXT
 );
 
 -- Create track_artists junction table
@@ -75,7 +81,9 @@ CREATE TABLE IF NOT EXISTS spot_playlists (
     public BOOLEAN NOT NULL,
     tracks_count INTEGER NOT NULL,
     spotify_url TEXT,
-    created_at TIMESTAMP NOT NULL
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP,
+    content_hash TEXT
 );
 
 -- Create playlist_tracks table
@@ -85,4 +93,13 @@ CREATE TABLE IF NOT EXISTS spot_playlist_tracks (
     added_at TIMESTAMP NOT NULL,
     created_at TIMESTAMP NOT NULL,
     PRIMARY KEY (playlist_id, track_id)
-); 
\ No newline at end of file
+); 
+-- Change detection columns for databases created before they were added
+ALTER TABLE spot_artists ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE spot_artists ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE spot_albums ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE spot_albums ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE spot_tracks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE spot_tracks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE spot_playlists ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE spot_playlists ADD COLUMN IF NOT EXISTS content_hash TEXT;
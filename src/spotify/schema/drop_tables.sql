@@ -1,5 +1,11 @@
 -- Drop tables for Spotify data in PostgreSQL
 
+-- Drop the stats views first, they depend on the tables
+DROP MATERIALIZED VIEW IF EXISTS spot_stats_tracks_per_decade;
+DROP MATERIALIZED VIEW IF EXISTS spot_stats_top_genres;
+DROP MATERIALIZED VIEW IF EXISTS spot_stats_albums_per_label;
+DROP MATERIALIZED VIEW IF EXISTS spot_stats_artist_tracks;
+
 -- Drop tables in the correct order to handle foreign key constraints
 DROP TABLE IF EXISTS spot_playlist_tracks;
 DROP TABLE IF EXISTS spot_track_artists;
@@ -7,4 +13,6 @@ DROP TABLE IF EXISTS spot_album_artists;
 DROP TABLE IF EXISTS spot_tracks;
 DROP TABLE IF EXISTS spot_playlists;
 DROP TABLE IF EXISTS spot_albums;
-DROP TABLE IF EXISTS spot_artists; 
\ No newline at end of file
+DROP TABLE IF EXISTS spot_artists;
+DROP TABLE IF EXISTS spot_schema_migrations;
+
@@ -0,0 +1,8 @@
+-- Trigram indexes so name searches (ILIKE '%term%') don't scan the tables
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS spot_artists_name_trgm_idx ON spot_artists USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS spot_albums_name_trgm_idx ON spot_albums USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS spot_tracks_name_trgm_idx ON spot_tracks USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS spot_playlists_name_trgm_idx ON spot_playlists USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS spot_playlists_description_trgm_idx ON spot_playlists USING GIN (description gin_trgm_ops);
@@ -0,0 +1,13 @@
+-- Sort keys used by the keyset paginated listings, (sort key, id)
+CREATE INDEX IF NOT EXISTS spot_artists_lower_name_idx ON spot_artists (lower(name), id);
+CREATE INDEX IF NOT EXISTS spot_albums_lower_name_idx ON spot_albums (lower(name), id);
+CREATE INDEX IF NOT EXISTS spot_tracks_lower_name_idx ON spot_tracks (lower(name), id);
+CREATE INDEX IF NOT EXISTS spot_tracks_duration_idx ON spot_tracks (duration_ms, id);
+CREATE INDEX IF NOT EXISTS spot_playlists_lower_name_idx ON spot_playlists (lower(name), id);
+
+-- Reverse lookups, the primary keys only cover the first column
+CREATE INDEX IF NOT EXISTS spot_tracks_album_id_idx ON spot_tracks (album_id);
+CREATE INDEX IF NOT EXISTS spot_tracks_isrc_idx ON spot_tracks (isrc);
+CREATE INDEX IF NOT EXISTS spot_album_artists_artist_id_idx ON spot_album_artists (artist_id);
+CREATE INDEX IF NOT EXISTS spot_track_artists_artist_id_idx ON spot_track_artists (artist_id);
+CREATE INDEX IF NOT EXISTS spot_playlist_tracks_track_id_idx ON spot_playlist_tracks (track_id);
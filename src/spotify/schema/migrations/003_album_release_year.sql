@@ -0,0 +1,7 @@
+-- Release dates are 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' depending on their precision
+ALTER TABLE spot_albums ADD COLUMN IF NOT EXISTS release_year INTEGER
+    GENERATED ALWAYS AS (
+        CASE WHEN release_date ~ '^[0-9]{4}' THEN substring(release_date FROM 1 FOR 4)::INTEGER END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS spot_albums_release_year_idx ON spot_albums (release_year, id);
@@ -0,0 +1,2 @@
+-- Genre filters (genres ? 'rock', genres @> '["rock"]')
+CREATE INDEX IF NOT EXISTS spot_artists_genres_idx ON spot_artists USING GIN (genres);
@@ -0,0 +1,2 @@
+-- Record labels, for the albums per label stats
+ALTER TABLE spot_albums ADD COLUMN IF NOT EXISTS label TEXT;
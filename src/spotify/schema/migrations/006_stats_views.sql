@@ -0,0 +1,43 @@
+-- Library stats, refreshed concurrently after every ingestion.
+-- REFRESH ... CONCURRENTLY needs a unique index on each view.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS spot_stats_tracks_per_decade AS
+SELECT (al.release_year / 10) * 10 AS decade,
+       count(*) AS track_count,
+       sum(t.duration_ms)::BIGINT AS duration_ms
+FROM spot_tracks t
+JOIN spot_albums al ON al.id = t.album_id
+WHERE al.release_year IS NOT NULL
+GROUP BY 1;
+CREATE UNIQUE INDEX IF NOT EXISTS spot_stats_tracks_per_decade_idx ON spot_stats_tracks_per_decade (decade);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS spot_stats_top_genres AS
+WITH artist_genres AS (
+    SELECT ar.id AS artist_id, jsonb_array_elements_text(ar.genres) AS genre
+    FROM spot_artists ar
+    WHERE ar.genres IS NOT NULL
+)
+SELECT ag.genre,
+       count(DISTINCT ag.artist_id) AS artist_count,
+       count(DISTINCT ta.track_id) AS track_count
+FROM artist_genres ag
+LEFT JOIN spot_track_artists ta ON ta.artist_id = ag.artist_id
+GROUP BY ag.genre;
+CREATE UNIQUE INDEX IF NOT EXISTS spot_stats_top_genres_idx ON spot_stats_top_genres (genre);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS spot_stats_albums_per_label AS
+SELECT COALESCE(al.label, '') AS label,
+       count(*) AS album_count,
+       sum(al.total_tracks)::BIGINT AS track_count
+FROM spot_albums al
+GROUP BY 1;
+CREATE UNIQUE INDEX IF NOT EXISTS spot_stats_albums_per_label_idx ON spot_stats_albums_per_label (label);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS spot_stats_artist_tracks AS
+SELECT ar.id AS artist_id,
+       ar.name,
+       count(*) AS track_count
+FROM spot_artists ar
+JOIN spot_track_artists ta ON ta.artist_id = ar.id
+GROUP BY ar.id, ar.name;
+CREATE UNIQUE INDEX IF NOT EXISTS spot_stats_artist_tracks_idx ON spot_stats_artist_tracks (artist_id);
@@ -0,0 +1,121 @@
+"""Derived fields, computed once per record right after a fetch.
+
+``artists_joined``, ``release_year`` and ``duration_min`` are stored on the
+records themselves, so they travel in the snapshot files and every exporter,
+saver and API route reads them instead of rebuilding them in its own loop.
+Snapshots written before these fields existed are enriched when loaded;
+records that already have them are left alone.
+"""
+import logging
+from typing import Callable, Dict, Iterable, Optional
+
+from spotify.spotify_utils import (
+    PLAYLIST_TRACKS,
+    SAVED_ALBUMS,
+    SAVED_TRACKS,
+    UNIQUE_PLAYLIST_TRACKS,
+)
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+ARTISTS_JOINED = "artists_joined"
+RELEASE_YEAR = "release_year"
+DURATION_MIN = "duration_min"
+
+
+def join_artists(artists: Iterable[dict]) -> str:
+    return ", ".join([artist.get("name", "") for artist in artists])
+
+
+def calc_release_year(release_date, release_date_precision) -> int:
+    if release_date_precision == ["year", "month", "day"]:
+        return release_date[0:4]
+    if release_date_precision is None:
+        return -1
+
+    return release_date
+
+
+def duration_in_min(duration_ms) -> str:
+    """``m:ss``, with every minute counted, so an hour is ``60:00``."""
+    minutes, seconds = divmod(round(duration_ms / 1000), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def album_release_year(album: dict):
+    if RELEASE_YEAR in album:
+        return album[RELEASE_YEAR]
+    return calc_release_year(
+        album.get("release_date"), album.get("release_date_precision")
+    )
+
+
+def enrich_track(track: dict, album: Optional[dict] = None) -> dict:
+    """Add the derived fields to a track, using ``album`` for an album's own
+    tracks, which don't embed their album."""
+    album = album if album is not None else track.get("album")
+    track[ARTISTS_JOINED] = join_artists(track.get("artists") or [])
+    if album:
+        track[RELEASE_YEAR] = album_release_year(album)
+    if track.get("duration_ms") is not None:
+        track[DURATION_MIN] = duration_in_min(track["duration_ms"])
+    return track
+
+
+def enrich_album(album: dict) -> dict:
+    album[ARTISTS_JOINED] = join_artists(album.get("artists") or [])
+    album[RELEASE_YEAR] = album_release_year(album)
+    for track in (album.get("tracks") or {}).get("items") or []:
+        enrich_track(track, album)
+    return album
+
+
+@traced(count="tracks")
+def enrich_tracks(tracks: Iterable[Optional[dict]]) -> None:
+    for track in tracks:
+        if not track:
+            continue
+        # saved and playlist items wrap the track, playlist tracks also have
+        # a boolean "track" flag
+        if isinstance(track.get("track"), dict):
+            track = track["track"]
+        if ARTISTS_JOINED not in track:
+            enrich_track(track)
+
+
+@traced(count="albums")
+def enrich_albums(albums: Iterable[dict]) -> None:
+    for album in albums:
+        # saved albums from the non-async getter and older snapshots wrap the album
+        if isinstance(album.get("album"), dict):
+            album = album["album"]
+        if ARTISTS_JOINED not in album:
+            enrich_album(album)
+
+
+@traced(count="playlist_tracks")
+def enrich_playlist_tracks(playlist_tracks: Dict[str, list]) -> None:
+    for tracks in playlist_tracks.values():
+        enrich_tracks(tracks or [])
+
+
+@traced(count="unique_playlist_tracks")
+def enrich_unique_playlist_tracks(unique_playlist_tracks: Dict[str, dict]) -> None:
+    enrich_tracks(unique_playlist_tracks.values())
+
+
+SNAPSHOT_ENRICHERS: Dict[str, Callable] = {
+    SAVED_TRACKS: enrich_tracks,
+    SAVED_ALBUMS: enrich_albums,
+    PLAYLIST_TRACKS: enrich_playlist_tracks,
+    UNIQUE_PLAYLIST_TRACKS: enrich_unique_playlist_tracks,
+}
+
+
+def enrich_snapshot(data_type: str, data):
+    """Enrich one snapshot's data in place, by its ``zip_data`` type."""
+    enrich = SNAPSHOT_ENRICHERS.get(data_type)
+    if enrich is not None and data:
+        enrich(data)
+    return data
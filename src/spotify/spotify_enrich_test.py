@@ -0,0 +1,92 @@
+import unittest
+
+from spotify.spotify_enrich import (
+    ARTISTS_JOINED,
+    DURATION_MIN,
+    RELEASE_YEAR,
+    duration_in_min,
+    enrich_albums,
+    enrich_playlist_tracks,
+    enrich_snapshot,
+)
+from spotify.spotify_utils import SAVED_TRACKS
+
+
+def make_track(name="Hyperballad", artists=("Björk",), release_date="1995-06-13"):
+    return {
+        "name": name,
+        "duration_ms": 321_400,
+        "artists": [{"name": artist} for artist in artists],
+        "album": {"release_date": release_date, "release_date_precision": "day"},
+    }
+
+
+class SpotifyEnrichTest(unittest.TestCase):
+    def test_duration_in_min(self):
+        self.assertEqual("0:00", duration_in_min(499))
+        self.assertEqual("0:45", duration_in_min(45_000))
+        self.assertEqual("1:00", duration_in_min(59_999))
+        self.assertEqual("5:21", duration_in_min(321_400))
+        self.assertEqual("10:00", duration_in_min(600_000))
+        self.assertEqual("62:03", duration_in_min(3_723_000))
+
+    def test_enriches_saved_tracks_once(self):
+        tracks = [make_track(artists=("Björk", "Tricky")), None]
+
+        enrich_snapshot(SAVED_TRACKS, tracks)
+
+        self.assertEqual("Björk, Tricky", tracks[0][ARTISTS_JOINED])
+        # the precision is compared to a list, so the full date is kept
+        self.assertEqual("1995-06-13", tracks[0][RELEASE_YEAR])
+        self.assertEqual("5:21", tracks[0][DURATION_MIN])
+
+        tracks[0][ARTISTS_JOINED] = "already enriched"
+        enrich_snapshot(SAVED_TRACKS, tracks)
+        self.assertEqual("already enriched", tracks[0][ARTISTS_JOINED])
+
+    def test_album_tracks_get_the_album_release_year(self):
+        album = {
+            "artists": [{"name": "Various Artists"}],
+            "release_date": "2001",
+            "release_date_precision": None,
+            "tracks": {
+                "items": [{"name": "t", "duration_ms": 60_000, "artists": [{"name": "Air"}]}]
+            },
+        }
+
+        enrich_albums([album])
+
+        self.assertEqual(-1, album[RELEASE_YEAR])
+        track = album["tracks"]["items"][0]
+        self.assertEqual(
+            ("Air", -1, "1:00"),
+            (track[ARTISTS_JOINED], track[RELEASE_YEAR], track[DURATION_MIN]),
+        )
+
+    def test_unwraps_saved_album_items(self):
+        album = {
+            "artists": [{"name": "Björk"}],
+            "release_date": "1995",
+            "release_date_precision": None,
+            "tracks": {"items": [{"name": "t", "artists": [{"name": "Björk"}]}]},
+        }
+        wrapped = {"added_at": "2024-01-01", "album": album}
+
+        enrich_albums([wrapped])
+
+        self.assertEqual({"added_at", "album"}, set(wrapped))
+        self.assertEqual(("Björk", -1), (album[ARTISTS_JOINED], album[RELEASE_YEAR]))
+        self.assertEqual("Björk", album["tracks"]["items"][0][ARTISTS_JOINED])
+
+    def test_unwraps_playlist_track_items(self):
+        wrapped = {"added_at": "2024-01-01", "track": make_track()}
+        flagged = dict(make_track(name="Army of Me"), track=True)
+
+        enrich_playlist_tracks({"p1": [wrapped, flagged], "p2": None})
+
+        self.assertEqual("Björk", wrapped["track"][ARTISTS_JOINED])
+        self.assertEqual("Björk", flagged[ARTISTS_JOINED])
+
+
+if __name__ == "__main__":
+    unittest.main()
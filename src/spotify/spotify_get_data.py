@@ -1,5 +1,6 @@
 import asyncio
 import datetime
+import functools
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
@@ -9,6 +10,11 @@ from typing import Optional, Any, Tuple, List, Generator, Dict
 
 from spotipy import Spotify, SpotifyException
 
+from spotify.spotify_enrich import (
+    enrich_albums,
+    enrich_playlist_tracks,
+    enrich_tracks,
+)
 from spotify.spotify_get_data_common import (
     LIMIT,
     SLEEP_BETWEEN_CALLS,
@@ -17,6 +23,8 @@ from spotify.spotify_get_data_common import (
     TOO_MANY_REQUESTS,
     READ_TIMEOUT,
     MAX_CONCURRENT_REQUESTS,
+    spotify_endpoint,
+    timed_spotify_call,
 )
 from spotify.spotify_utils import (
     SAVED_ARTISTS,
@@ -35,6 +43,8 @@ from spotify.spotify_utils import (
     zip_data,
     get_config_location,
 )
+from utils.metrics import dump_metrics
+from utils.tracing import span, traced
 from utils.rate_limiter.rate_limiter_interface import (
     RateLimiterInterface,
     RateLimiterConfig,
@@ -152,7 +162,7 @@ class BaseSpotifyDataGetter:
             try:
                 logger.debug("Waiting for token")
                 self.rate_limiter.wait_for_token()
-                response = request_func(*args, **kwargs)
+                response = timed_spotify_call(request_func, *args, **kwargs)
                 sleep(SLEEP_BETWEEN_CALLS)
                 return response
             except SpotifyException as e:
@@ -442,6 +452,7 @@ class BaseSpotifyDataGetter:
 class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
     """Async version of SpotifyDataGetter with parallel processing capabilities."""
 
+    @traced(count="batch")
     async def _process_batch(
             self, batch: List[Dict[str, Any]], process_func: callable
     ) -> List[Dict[str, Any]]:
@@ -471,30 +482,45 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
 
     async def _make_rate_limited_request_async(self, request_func, *args, **kwargs):
         """Make a rate-limited request to Spotify API in an async context without blocking."""
-        while True:
-            try:
-                logger.debug("Waiting for token")
-                await self._wait_for_token_async()
-
-                # Run the synchronous request in a thread pool
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None, lambda: request_func(*args, **kwargs)
-                )
-
-                # Small sleep to prevent overwhelming the API
-                await asyncio.sleep(SLEEP_BETWEEN_CALLS)
-                return response
-            except SpotifyException as e:
-                if self.check_http_status(e):
-                    logger.info(RATE_LIMITED_SLEEPING)
-                    await asyncio.sleep(self.rate_limiter.get_retry_after())
-                    continue
-                else:
+        endpoint = spotify_endpoint(request_func)
+        with span(
+            "spotify.request", endpoint=endpoint, offset=kwargs.get("offset")
+        ) as request_span:
+            rate_limited = 0
+            while True:
+                try:
+                    logger.debug("Waiting for token")
+                    with span("rate_limiter.wait"):
+                        await self._wait_for_token_async()
+
+                    # Run the synchronous request in a thread pool
+                    loop = asyncio.get_event_loop()
+                    with span("spotify.http", endpoint=endpoint):
+                        response = await loop.run_in_executor(
+                            None,
+                            functools.partial(
+                                timed_spotify_call, request_func, *args, **kwargs
+                            ),
+                        )
+
+                    # Small sleep to prevent overwhelming the API
+                    await asyncio.sleep(SLEEP_BETWEEN_CALLS)
+                    if isinstance(response, dict) and "items" in response:
+                        request_span.set_attribute("items", len(response["items"]))
+                    return response
+                except SpotifyException as e:
+                    if self.check_http_status(e):
+                        logger.info(RATE_LIMITED_SLEEPING)
+                        rate_limited += 1
+                        request_span.set_attribute("rate_limited", rate_limited)
+                        with span("spotify.retry_after", status=e.http_status):
+                            await asyncio.sleep(self.rate_limiter.get_retry_after())
+                        continue
+                    else:
+                        raise e
+                except Exception as e:
+                    logger.error(f"Request exception: {e}")
                     raise e
-            except Exception as e:
-                logger.error(f"Request exception: {e}")
-                raise e
 
     async def _get_all_items_parallel(
         self,
@@ -555,6 +581,7 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
         logger.info(f"Completed parallel retrieval. Total items: {len(all_items)}")
         return all_items
 
+    @traced()
     async def get_all_saved_tracks_parallel(self) -> List[Dict[str, Any]]:
         """Get all saved tracks using parallel processing."""
         logger.info("Starting parallel retrieval of saved tracks")
@@ -562,11 +589,13 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
             self.spotify.current_user_saved_tracks, lambda item: item['track']
         )
 
+    @traced()
     async def get_all_saved_albums_parallel(self) -> List[Dict[str, Any]]:
         """Get all saved albums using parallel processing."""
         logger.info("Starting parallel retrieval of saved albums")
         return await self._get_all_items_parallel(self.spotify.current_user_saved_albums, lambda item: item['album'])
 
+    @traced()
     async def get_all_playlists_parallel(self) -> List[Dict[str, Any]]:
         """Get all playlists using parallel processing."""
         logger.info("Starting parallel retrieval of playlists")
@@ -574,16 +603,18 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
             self.spotify.current_user_playlists, lambda item: item
         )
 
+    @traced()
     async def get_playlist_tracks_parallel(self, playlist_id: str) -> List[Dict[str, Any]]:
         """Get all tracks from a playlist using parallel processing."""
         logger.info(f"Starting parallel retrieval of tracks for playlist {playlist_id}")
         return await self._get_all_items_parallel(
-            lambda limit, offset: self.spotify.playlist_items(
-                playlist_id, limit=limit, offset=offset, additional_types=("track")
+            functools.partial(
+                self.spotify.playlist_items, playlist_id, additional_types=("track",)
             ),
             lambda item: item['track'],
         )
 
+    @traced()
     async def get_all_saved_artists_parallel(self) -> List[Dict[str, Any]]:
         """Get all saved artists using parallel processing."""
         logger.info("Starting parallel retrieval of saved artists")
@@ -633,6 +664,7 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
 
         return await get_all_artists_parallel()
 
+    @traced()
     async def get_all_data_parallel(self):
         """Get all Spotify data using parallel processing and zip the results."""
         logger.info("Starting parallel retrieval of all Spotify data")
@@ -647,6 +679,7 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
             for track in album.get("tracks", {}).get("items", []):
                 track.pop("available_markets", None)
         albums = list(self.dedupe_albums(albums))
+        enrich_albums(albums)
         zip_data(
             albums,
             data_type=SAVED_ALBUMS,
@@ -675,6 +708,7 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
         logger.info("Retrieving saved tracks")
         tracks = await self.get_all_saved_tracks_parallel()
         tracks = list(self.dedupe_tracks(tracks))
+        enrich_tracks(tracks)
         zip_data(
             tracks,
             data_type=SAVED_TRACKS,
@@ -733,6 +767,8 @@ class AsyncSpotifyDataGetter(BaseSpotifyDataGetter):
             tracks = await self.get_playlist_tracks_parallel(playlist_id)
             playlist_tracks[playlist_id] = tracks
             logger.info(f"Retrieved {len(tracks)} tracks for playlist {playlist_name}")
+        # the unique tracks below are the same objects, so get enriched too
+        enrich_playlist_tracks(playlist_tracks)
         zip_data(
             playlist_tracks,
             data_type=PLAYLIST_TRACKS,
@@ -776,7 +812,10 @@ async def main():
 
     # Get all data using parallel processing and zip the results
     start_time = time.time()
-    await spotify_data_getter.get_all_data_parallel()
+    try:
+        await spotify_data_getter.get_all_data_parallel()
+    finally:
+        dump_metrics()
     end_time = time.time()
 
     print(f"\nAll data retrieved and zipped in {end_time - start_time:.2f} seconds")
@@ -1,3 +1,9 @@
+import functools
+import time
+
+from spotipy import SpotifyException
+
+from utils.metrics import SPOTIFY_API_SECONDS
 
 # Spotify API scopes
 SPOTIFY_SCOPES = [
@@ -11,10 +17,39 @@ SPOTIFY_SCOPES = [
 ]
 
 LIMIT = 50
+# playlist_items allows larger pages than the library endpoints
+PLAYLIST_ITEMS_LIMIT = 100
 TOO_MANY_REQUESTS = 429
 READ_TIMEOUT = 443
 RATE_LIMITED_SLEEPING = "Rate limited, sleeping"
 SLEEP_BETWEEN_CALLS = 0.1
 RETRY_AFTER = 30
+MAX_SERVER_ERROR_RETRIES = 3
+SERVER_ERROR_BACKOFF = 1
 MAX_CONCURRENT_REQUESTS = 200
 
+
+
+def spotify_endpoint(request_func) -> str:
+    """The spotipy method name, used as the endpoint label."""
+    while isinstance(request_func, functools.partial):
+        request_func = request_func.func
+    return getattr(request_func, "__name__", "unknown")
+
+
+def timed_spotify_call(request_func, *args, **kwargs):
+    """Call ``request_func`` and record its latency by endpoint and HTTP status."""
+    endpoint = spotify_endpoint(request_func)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = request_func(*args, **kwargs)
+        status = "200"
+        return response
+    except SpotifyException as e:
+        status = str(e.http_status)
+        raise
+    finally:
+        SPOTIFY_API_SECONDS.observe(
+            time.perf_counter() - start, endpoint=endpoint, status=status
+        )
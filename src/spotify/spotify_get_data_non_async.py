@@ -7,13 +7,22 @@ from typing import Optional, Any, Tuple, List, Generator
 
 from spotipy import Spotify, SpotifyException
 
+from spotify.spotify_enrich import (
+    enrich_albums,
+    enrich_playlist_tracks,
+    enrich_tracks,
+)
 from spotify.spotify_get_data_common import (
     SPOTIFY_SCOPES,
     LIMIT,
+    PLAYLIST_ITEMS_LIMIT,
     SLEEP_BETWEEN_CALLS,
     TOO_MANY_REQUESTS,
     READ_TIMEOUT,
     RATE_LIMITED_SLEEPING,
+    MAX_SERVER_ERROR_RETRIES,
+    SERVER_ERROR_BACKOFF,
+    timed_spotify_call,
 )
 from spotify.spotify_utils import (
     SAVED_ARTISTS,
@@ -138,17 +147,28 @@ class SpotifyDataGetter:
         """
         Make a rate-limited request to Spotify API.
         """
+        server_error_retries = 0
         while True:
             try:
                 logger.debug("Waiting for token")
                 self.rate_limiter.wait_for_token()
-                response = request_func(*args, **kwargs)
+                response = timed_spotify_call(request_func, *args, **kwargs)
                 sleep(SLEEP_BETWEEN_CALLS)
                 return response
             except SpotifyException as e:
                 if self.check_http_status(e):
                     logger.info(RATE_LIMITED_SLEEPING)
-                    sleep(self.rate_limiter.get_retry_after())
+                    sleep(self.get_retry_after(e))
+                    continue
+                elif (
+                    self.is_server_error(e)
+                    and server_error_retries < MAX_SERVER_ERROR_RETRIES
+                ):
+                    server_error_retries += 1
+                    logger.info(
+                        f"Server error {e.http_status}, retry {server_error_retries}"
+                    )
+                    sleep(SERVER_ERROR_BACKOFF * 2 ** (server_error_retries - 1))
                     continue
                 else:
                     raise e
@@ -160,6 +180,7 @@ class SpotifyDataGetter:
         logger.debug("Getting all data")
         albums = list(self.get_library_saved_albums())
         albums = list(self.dedupe_albums(albums))
+        enrich_albums(albums)
         zip_data(
             albums,
             data_type=SAVED_ALBUMS,
@@ -175,6 +196,7 @@ class SpotifyDataGetter:
 
         tracks = list(self.get_library_saved_tracks())
         tracks = list(self.dedupe_tracks(tracks))
+        enrich_tracks(tracks)
         zip_data(
             tracks,
             data_type=SAVED_TRACKS,
@@ -201,6 +223,8 @@ class SpotifyDataGetter:
         )
 
         playlist_tracks = self.get_playlist_tracks(playlists)
+        # the unique tracks below are the same objects, so get enriched too
+        enrich_playlist_tracks(playlist_tracks)
         zip_data(
             playlist_tracks,
             data_type=PLAYLIST_TRACKS,
@@ -250,6 +274,21 @@ class SpotifyDataGetter:
     def check_http_status(e):
         return e.http_status == TOO_MANY_REQUESTS or e.http_status == READ_TIMEOUT
 
+    @staticmethod
+    def is_server_error(e):
+        return e.http_status is not None and 500 <= e.http_status < 600
+
+    def get_retry_after(self, e) -> float:
+        """Seconds to back off, preferring Spotify's Retry-After header."""
+        headers = getattr(e, "headers", None) or {}
+        retry_after = headers.get("Retry-After") or headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.rate_limiter.get_retry_after()
+
     def get_library_saved_albums(self) -> Generator:
         logger.debug("Getting library saved albums")
         offset = 0
@@ -288,7 +327,7 @@ class SpotifyDataGetter:
             yield from items
             last_artist_id = items[-1]["id"]
 
-    def get_playlists(self) -> Tuple[List, List]:
+    def get_playlists(self, include_generated: bool = False) -> Tuple[List, List]:
         logger.debug("Getting playlists")
 
         playlists = []
@@ -314,9 +353,10 @@ class SpotifyDataGetter:
             x for x in playlists if x["owner"]["display_name"] == display_name
         ]
         # filter out generated playlists with *generated in comments
-        my_playlists = [
-            x for x in my_playlists if "*generated" not in x["description"].lower()
-        ]
+        if not include_generated:
+            my_playlists = [
+                x for x in my_playlists if "*generated" not in x["description"].lower()
+            ]
 
         other_playlists = [
             x for x in playlists if x["owner"]["display_name"] != display_name
@@ -351,7 +391,7 @@ class SpotifyDataGetter:
             response = self._make_request(
                 self.spotify.playlist_items,
                 playlist_id=playlist_id,
-                limit=LIMIT,
+                limit=PLAYLIST_ITEMS_LIMIT,
                 offset=offset,
             )
             items = response["items"]
@@ -360,7 +400,10 @@ class SpotifyDataGetter:
                 break
 
             yield from items
-            offset += LIMIT
+            # no need for an extra empty page when Spotify says this was the last one
+            if response.get("next") is None:
+                break
+            offset += PLAYLIST_ITEMS_LIMIT
 
     def get_library_saved_tracks(self) -> Generator:
         logger.debug("Getting library saved tracks")
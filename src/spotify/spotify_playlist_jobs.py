@@ -0,0 +1,138 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Writes all go through the shared rate limiter, so more workers only help
+# to overlap network latency; a handful is enough to keep the bucket busy.
+DEFAULT_MAX_WORKERS = 8
+
+
+class PlaylistSpec(BaseModel):
+    """A playlist to regenerate: its name and the tracks it should contain."""
+
+    name: str
+    track_ids: List[str]
+    reorder: bool = True
+
+
+class PlaylistJobResult(BaseModel):
+    """Outcome and timings of regenerating a single playlist."""
+
+    name: str
+    playlist_id: Optional[str] = None
+    succeeded: bool = False
+    error: Optional[str] = None
+    removed: int = 0
+    moved: int = 0
+    added: int = 0
+    api_calls: int = 0
+    resolve_seconds: float = 0.0
+    sync_seconds: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return self.resolve_seconds + self.sync_seconds
+
+
+class PlaylistJobEngine:
+    """Regenerate many playlists at once.
+
+    Playlists are looked up (or created) one at a time so that two specs can
+    never race to create the same playlist, then the fetch/diff/write steps run
+    concurrently on a thread pool. Every Spotify call goes through the playlist
+    maker's rate limited ``_make_request``, which also retries rate limiting
+    and server errors. A failing playlist is reported in its result and does
+    not stop the others.
+    """
+
+    def __init__(self, playlist_maker, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        self.playlist_maker = playlist_maker
+        self.max_workers = max_workers
+
+    def run(self, specs: Iterable[PlaylistSpec]) -> List[PlaylistJobResult]:
+        specs = self.dedupe_specs(specs)
+        logger.info(
+            f"Regenerating {len(specs)} playlists with {self.max_workers} workers"
+        )
+        start = time.perf_counter()
+
+        results: Dict[str, PlaylistJobResult] = {}
+        playlists: Dict[str, dict] = {}
+        for spec in specs:
+            result = PlaylistJobResult(name=spec.name)
+            results[spec.name] = result
+            resolve_start = time.perf_counter()
+            try:
+                playlist = self.playlist_maker.get_or_create_playlist(spec.name)
+                playlists[spec.name] = playlist
+                result.playlist_id = playlist["id"]
+            except Exception as e:
+                logger.error(f"Could not get or create playlist {spec.name}: {e}")
+                result.error = str(e)
+            result.resolve_seconds = time.perf_counter() - resolve_start
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._sync, playlists[spec.name], spec, results[spec.name]
+                ): spec.name
+                for spec in specs
+                if spec.name in playlists
+            }
+            for future in as_completed(futures):
+                future.result()
+
+        ordered_results = [results[spec.name] for spec in specs]
+        self.log_summary(ordered_results, time.perf_counter() - start)
+        return ordered_results
+
+    def _sync(self, playlist: dict, spec: PlaylistSpec, result: PlaylistJobResult) -> None:
+        sync_start = time.perf_counter()
+        try:
+            diff = self.playlist_maker.sync_playlist_tracks(
+                playlist, spec.track_ids, reorder=spec.reorder
+            )
+            result.removed = len(diff.to_remove)
+            result.moved = len(diff.moves)
+            result.added = diff.num_added
+            result.api_calls = diff.api_calls()
+            result.succeeded = True
+        except Exception as e:
+            logger.error(f"Failed to regenerate playlist {spec.name}: {e}")
+            result.error = str(e)
+        result.sync_seconds = time.perf_counter() - sync_start
+        logger.debug(
+            f"Playlist {spec.name} done in {result.seconds:.2f}s "
+            f"({result.api_calls} write calls)"
+        )
+
+    @staticmethod
+    def dedupe_specs(specs: Iterable[PlaylistSpec]) -> List[PlaylistSpec]:
+        """Keep one spec per playlist name, later specs replacing earlier ones."""
+        specs_by_name: Dict[str, PlaylistSpec] = {}
+        for spec in specs:
+            if spec.name in specs_by_name:
+                logger.warning(f"Duplicate playlist spec {spec.name}, using the last one")
+            specs_by_name[spec.name] = spec
+        return list(specs_by_name.values())
+
+    @staticmethod
+    def log_summary(results: List[PlaylistJobResult], elapsed: float) -> None:
+        failed = [result.name for result in results if not result.succeeded]
+        logger.info(
+            f"Regenerated {len(results) - len(failed)}/{len(results)} playlists "
+            f"in {elapsed:.2f}s (sum of playlist times "
+            f"{sum(result.seconds for result in results):.2f}s)"
+        )
+        for result in sorted(results, key=lambda r: r.seconds, reverse=True):
+            logger.debug(
+                f"{result.name}: {result.seconds:.2f}s, -{result.removed} "
+                f"~{result.moved} +{result.added}"
+            )
+        if failed:
+            logger.warning(f"Failed playlists: {failed}")
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+
+from spotify.playlist_diff import compute_playlist_diff
+from spotify.spotify_playlist_jobs import PlaylistJobEngine, PlaylistSpec
+
+
+class FakePlaylistMaker:
+    """Stands in for SpotifyPlaylistMaker, recording lookups and syncs."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.created = []
+        self.synced = {}
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def get_or_create_playlist(self, playlist_name):
+        self.created.append(playlist_name)
+        return {"id": f"id-{playlist_name}", "name": playlist_name}
+
+    def sync_playlist_tracks(self, playlist, track_ids, reorder=True):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.02)
+            if playlist["name"] in self.failing:
+                raise RuntimeError("boom")
+            self.synced[playlist["name"]] = list(track_ids)
+            return compute_playlist_diff([], track_ids, reorder=reorder)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class PlaylistJobEngineTest(unittest.TestCase):
+    def test_runs_syncs_concurrently_and_reports_results_in_spec_order(self):
+        maker = FakePlaylistMaker()
+        specs = [
+            PlaylistSpec(name=f"Liked {year}", track_ids=[f"t{year}"])
+            for year in range(2000, 2010)
+        ]
+
+        results = PlaylistJobEngine(maker, max_workers=4).run(specs)
+
+        self.assertEqual([spec.name for spec in specs], [r.name for r in results])
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(["t2003"], maker.synced["Liked 2003"])
+        self.assertEqual(1, results[0].added)
+        self.assertGreater(maker.max_active, 1)
+        self.assertLessEqual(maker.max_active, 4)
+        self.assertGreater(results[0].sync_seconds, 0)
+
+    def test_failure_is_reported_without_stopping_other_playlists(self):
+        maker = FakePlaylistMaker(failing={"b"})
+        specs = [
+            PlaylistSpec(name="a", track_ids=["1"]),
+            PlaylistSpec(name="b", track_ids=["2"]),
+            PlaylistSpec(name="c", track_ids=["3"]),
+        ]
+
+        results = PlaylistJobEngine(maker, max_workers=2).run(specs)
+
+        self.assertEqual([True, False, True], [r.succeeded for r in results])
+        self.assertEqual("boom", results[1].error)
+        self.assertEqual({"a", "c"}, set(maker.synced))
+
+    def test_duplicate_names_keep_last_spec_and_resolve_once(self):
+        maker = FakePlaylistMaker()
+        specs = [
+            PlaylistSpec(name="a", track_ids=["1"]),
+            PlaylistSpec(name="a", track_ids=["2"]),
+        ]
+
+        results = PlaylistJobEngine(maker).run(specs)
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(["a"], maker.created)
+        self.assertEqual(["2"], maker.synced["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 import logging
 import os
 import random
+import threading
 from configparser import ConfigParser
-from typing import Optional, Any, List, Generator, Set
+from contextlib import contextmanager
+from typing import Optional, Any, List, Generator, Set, Dict, FrozenSet, Tuple, Iterator
 
 from spotipy import Spotify
 
@@ -18,10 +20,20 @@ from spotify.spotify_utils import (
     SAVED_ALBUMS,
     SAVED_TRACKS,
     PLAYLISTS,
+    PLAYLIST_REGISTRY,
     get_config_location,
     get_memory_usage,
     PLAYLIST_TRACKS,
-    UNIQUE_PLAYLIST_TRACKS, get_latest_zip, )
+    UNIQUE_PLAYLIST_TRACKS, get_latest_zip, zip_data, )
+from spotify.playlist_cache import PLAYLIST_CACHE_FILE, PlaylistCache
+from spotify.playlist_diff import PlaylistDiff, compute_playlist_diff, dedupe_track_ids
+from spotify.spotify_playlist_jobs import (
+    DEFAULT_MAX_WORKERS,
+    PlaylistJobEngine,
+    PlaylistJobResult,
+    PlaylistSpec,
+)
+from spotify.track_word_index import TrackWordIndex
 
 TOP = "Top"
 
@@ -50,9 +62,20 @@ class SpotifyPlaylistMaker:
     playlists = None
     saved_album_tracks = None
     unique_playlist_albums = None
+    track_word_index: Optional[TrackWordIndex] = None
+    _track_word_index_source = None
+    playlist_registry: Optional[Dict[str, dict]] = None
+    _playlist_registry_refreshed = False
+    snapshot_location: Optional[str] = None
+    playlist_cache: Optional[PlaylistCache] = None
 
     def __init__(self, use_zip=True, spotify=None, spotify_data=None) -> None:
         super().__init__()
+        # per instance, like the registry it guards; reentrant, as building
+        # the registry may refresh and save it
+        self._playlist_registry_lock = threading.RLock()
+        self._playlist_registry_dirty = False
+        self._playlist_registry_batch_depth = 0
         setup_app_logging(logger, logging.DEBUG)
         get_memory_usage()
         logger.debug(f"Starting SpotifyPlaylistMaker with use_zip={use_zip} ")
@@ -162,9 +185,9 @@ class SpotifyPlaylistMaker:
         self.saved_artists = unzip_data_from_zip(
             get_latest_zip(raw_data_location, file_name=SAVED_ARTISTS)
         )
-        self.playlists = unzip_data_from_zip(
-            get_latest_zip(raw_data_location, file_name=PLAYLISTS)
-        )
+        playlists_zip = get_latest_zip(raw_data_location, file_name=PLAYLISTS)
+        self.playlists = unzip_data_from_zip(playlists_zip)
+        self.snapshot_location = os.path.dirname(playlists_zip)
         self.saved_albums = unzip_data_from_zip(
             get_latest_zip(raw_data_location, file_name=SAVED_ALBUMS)
         )
@@ -180,6 +203,10 @@ class SpotifyPlaylistMaker:
         # get_latest_zip(raw_data_location, file_name=UNIQUE_PLAYLIST_ARTISTS)
         # )
 
+    def _make_request(self, request_func, *args, **kwargs):
+        """Make a Spotify call through the data getter's shared rate limiter."""
+        return self.spotify_data_getter._make_request(request_func, *args, **kwargs)
+
     def make_playlists_private(self, playlists: list):
         logger.debug("Making playlists private")
         for playlist in playlists:
@@ -187,22 +214,27 @@ class SpotifyPlaylistMaker:
             playlist_name = playlist["name"]
             public = playlist["public"]
             print(f"Playlist id {playlist_id}, name {playlist_name}, public {public}")
-            self.spotify.playlist_change_details(playlist_id, public=False)
+            self._make_request(
+                self.spotify.playlist_change_details, playlist_id, public=False
+            )
 
     def create_playlist(self, name: str):
         logger.debug(f"Creating playlist {name}")
-        playlist = self.spotify.user_playlist_create(
-            name=name, user=self.user, public=False
+        playlist = self._make_request(
+            self.spotify.user_playlist_create, name=name, user=self.user, public=False
         )
         if playlist is not None:
             playlist = self.mark_as_generated(playlist)
+            self.register_playlist(playlist)
         return playlist
 
     def mark_as_generated(self, playlist):
         playlist_description = playlist["description"]
         if "*generated" not in playlist_description:
-            self.spotify.playlist_change_details(
-                playlist["id"], description=f"{playlist_description} *generated"
+            self._make_request(
+                self.spotify.playlist_change_details,
+                playlist["id"],
+                description=f"{playlist_description} *generated",
             )
         return playlist
 
@@ -376,8 +408,7 @@ class SpotifyPlaylistMaker:
             set(random_track_ids) - set(random_album_track_ids)
         )
         playlist = self.get_or_create_playlist(playlist_name)
-        self.remove_tracks_from_playlist(playlist)
-        self.add_tracks_to_playlist(playlist=playlist, track_ids=playlist_track_ids)
+        self.sync_playlist_tracks(playlist=playlist, track_ids=playlist_track_ids)
 
     """
     Create a playlist from all liked albums, with one track from each album
@@ -390,8 +421,7 @@ class SpotifyPlaylistMaker:
         library_saved_albums = self.spotify_data_getter.get_library_saved_albums()
         album_track_ids = self.get_one_track_from_albums(library_saved_albums)
         playlist = self.get_or_create_playlist("Liked Albums - one track from each")
-        self.remove_tracks_from_playlist(playlist)
-        self.add_tracks_to_playlist(playlist, album_track_ids)
+        self.sync_playlist_tracks(playlist, album_track_ids)
 
     def create_random_playlist(
         self,
@@ -476,19 +506,17 @@ class SpotifyPlaylistMaker:
         self, tracks, start_year, end_year, playlist_prefix=LIKED
     ):
         logger.debug(f"Creating playlists by year from {start_year} to {end_year}")
-        for year in range(start_year, end_year + 1):
-            self.create_playlist_for_year(
-                str(year), f"{playlist_prefix} {year}", tracks
-            )
+        self.regenerate_playlists(
+            self.get_playlist_specs_by_year(tracks, start_year, end_year, playlist_prefix)
+        )
 
     def create_playlists_by_decade(
         self, tracks, start_year, end_year, playlist_prefix="Liked"
     ):
         logger.debug(f"Creating playlists by decade from {start_year} to {end_year}")
-        for year in range(start_year, end_year + 1):
-            self.create_playlist_for_year(
-                str(year), f"{playlist_prefix} {year}0s", tracks
-            )
+        self.regenerate_playlists(
+            self.get_playlist_specs_by_decade(tracks, start_year, end_year, playlist_prefix)
+        )
 
     def create_playlist_for_year(self, year, playlist_name, tracks: list = None):
         logger.debug(f"Creating playlist {playlist_name} for year {year}")
@@ -503,7 +531,8 @@ class SpotifyPlaylistMaker:
             self, search_term, playlist_name, tracks: list = None
     ):
         logger.debug(f"Creating playlist {playlist_name} for search term {search_term}")
-        filtered_tracks = self.filter_tracks_by_search_term_any(tracks, [search_term])
+        word_index = self.get_track_word_index(tracks)
+        filtered_tracks = word_index.tracks_at(word_index.lookup(search_term))
         track_ids: List = [track["id"] for track in filtered_tracks]
         self.create_playlist_with_tracks(
             track_ids=track_ids, playlist_name=playlist_name
@@ -513,12 +542,113 @@ class SpotifyPlaylistMaker:
             self, search_terms: list, playlist_name: str, tracks: list = None
     ):
         logger.debug(f"Creating playlist {playlist_name} for search terms {search_terms}")
-        filtered_tracks = self.filter_tracks_by_search_term_any(tracks, search_terms)
+        word_index = self.get_track_word_index(tracks)
+        filtered_tracks = word_index.tracks_at(word_index.lookup_any(search_terms))
         track_ids: List = [track["id"] for track in filtered_tracks]
         self.create_playlist_with_tracks(
             track_ids=track_ids, playlist_name=playlist_name
         )
 
+    def create_playlists_for_search_terms(
+            self, search_terms: list, playlist_prefix: str, tracks: list = None
+    ):
+        """Create one playlist per search term, e.g. "colours - Red", "colours - Blue"."""
+        logger.debug(
+            f"Creating {len(search_terms)} playlists with prefix {playlist_prefix}"
+        )
+        self.regenerate_playlists(
+            self.get_playlist_specs_for_search_terms(search_terms, playlist_prefix, tracks)
+        )
+
+    def get_playlist_specs_by_year(
+        self, tracks, start_year, end_year, playlist_prefix=LIKED
+    ) -> List[PlaylistSpec]:
+        return [
+            PlaylistSpec(
+                name=f"{playlist_prefix} {year}",
+                track_ids=[
+                    track["id"] for track in self.filter_tracks_by_year(tracks, str(year))
+                ],
+            )
+            for year in range(start_year, end_year + 1)
+        ]
+
+    def get_playlist_specs_by_decade(
+        self, tracks, start_year, end_year, playlist_prefix="Liked"
+    ) -> List[PlaylistSpec]:
+        # decades are given by their first three digits, e.g. 199 for the 1990s
+        return [
+            PlaylistSpec(
+                name=f"{playlist_prefix} {year}0s",
+                track_ids=[
+                    track["id"] for track in self.filter_tracks_by_year(tracks, str(year))
+                ],
+            )
+            for year in range(start_year, end_year + 1)
+        ]
+
+    def get_playlist_specs_for_search_terms(
+        self, search_terms: list, playlist_prefix: str, tracks: list = None
+    ) -> List[PlaylistSpec]:
+        """One spec per search term that matches any track, e.g. "colours - Red"."""
+        word_index = self.get_track_word_index(tracks)
+        hits_by_term: Dict[str, FrozenSet[int]] = word_index.lookup_terms(search_terms)
+        specs = []
+        for search_term, hits in hits_by_term.items():
+            if not hits:
+                logger.debug(f"No tracks for search term {search_term}, skipping")
+                continue
+            specs.append(
+                PlaylistSpec(
+                    name=f"{playlist_prefix} - {search_term}",
+                    track_ids=[track["id"] for track in word_index.tracks_at(hits)],
+                )
+            )
+        return specs
+
+    def get_playlist_specs_for_artists(
+        self, artists: list, playlist_prefix: str, tracks: list = None
+    ) -> List[PlaylistSpec]:
+        """One spec per artist that matches any track, e.g. "Liked - Beach Boys"."""
+        specs = []
+        for artist in artists:
+            track_ids = [
+                track["id"] for track in self.filter_tracks_by_artist(tracks, [artist])
+            ]
+            if not track_ids:
+                logger.debug(f"No tracks for artist {artist}, skipping")
+                continue
+            specs.append(
+                PlaylistSpec(name=f"{playlist_prefix} - {artist}", track_ids=track_ids)
+            )
+        return specs
+
+    def regenerate_playlists(
+        self, specs: List[PlaylistSpec], max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> List[PlaylistJobResult]:
+        """Bring many playlists up to date concurrently, see ``PlaylistJobEngine``."""
+        with self.playlist_registry_batch():
+            return PlaylistJobEngine(self, max_workers=max_workers).run(specs)
+
+    def get_track_word_index(
+            self, tracks: list, fold_accents: bool = False, use_stemming: bool = False
+    ) -> TrackWordIndex:
+        """Word index over the given tracks, rebuilt only when the tracks or options change."""
+        index = self.track_word_index
+        if (
+            index is None
+            or self._track_word_index_source is not tracks
+            or index.fold_accents != fold_accents
+            or index.use_stemming != use_stemming
+        ):
+            logger.debug(f"Building word index for {len(tracks)} tracks")
+            index = TrackWordIndex(
+                tracks, fold_accents=fold_accents, use_stemming=use_stemming
+            )
+            self.track_word_index = index
+            self._track_word_index_source = tracks
+        return index
+
     def create_playlist_for_artist(
             self, artist: str, playlist_name: str, tracks: list = None
     ):
@@ -559,15 +689,9 @@ class SpotifyPlaylistMaker:
     @staticmethod
     def filter_tracks_by_search_term_any(tracks, search_terms: list):
         logger.debug(f"Filtering {len(tracks)} tracks by search term {search_terms}")
-        filtered_tracks: List = list(
-            filter(
-                lambda track: any(
-                    search_term.lower() == word.lower()
-                    for search_term in search_terms
-                    for word in track["name"].lower().split()
-                ),
-                tracks,
-            )
+        word_index = TrackWordIndex(tracks)
+        filtered_tracks: List = word_index.tracks_at(
+            word_index.lookup_any(search_terms)
         )
 
         return filtered_tracks
@@ -613,22 +737,142 @@ class SpotifyPlaylistMaker:
 
     def create_playlist_with_tracks(self, track_ids, playlist_name):
         logger.debug(f"Creating playlist {playlist_name} with {len(track_ids)} tracks")
-        playlist = self.get_or_create_playlist(playlist_name)
-        self.remove_tracks_from_playlist(playlist)
-        self.add_tracks_to_playlist(playlist, track_ids)
+        with self.playlist_registry_batch():
+            playlist = self.get_or_create_playlist(playlist_name)
+            self.sync_playlist_tracks(playlist, track_ids)
+
+    def sync_playlist_tracks(
+        self, playlist: dict, track_ids: list, reorder: bool = True
+    ) -> PlaylistDiff:
+        """Make the playlist contain exactly ``track_ids``, in that order.
+
+        The current contents come from the playlist cache, or are fetched once,
+        and only the differing tracks are removed, moved or added. Removals and
+        moves pass the ``snapshot_id`` the diff was computed against, or the id
+        returned by the write before them. Additions can't be tied to a
+        snapshot; the id they return is chained on to the next write.
+        """
+        playlist_id = playlist["id"]
+        playlist_name = playlist["name"]
+        current_track_ids, has_unmanaged_items, current_snapshot_id = (
+            self.get_playlist_track_ids(playlist)
+        )
+        if reorder and has_unmanaged_items:
+            # local or unavailable items shift positions we cannot address by id
+            logger.debug(f"Playlist {playlist_name} has local items, appending only")
+            reorder = False
+
+        diff = compute_playlist_diff(current_track_ids, track_ids, reorder=reorder)
+        logger.debug(
+            f"Syncing playlist {playlist_name}: remove {len(diff.to_remove)}, "
+            f"move {len(diff.moves)}, add {diff.num_added} in {diff.api_calls()} calls"
+        )
+
+        snapshot_id = current_snapshot_id
+        all_added = True
+        for chunk in self.batch_list(diff.to_remove, BATCH_SIZE_PLAYLIST_ADD):
+            response = self._make_request(
+                self.spotify.playlist_remove_all_occurrences_of_items,
+                playlist_id=playlist_id,
+                items=chunk,
+                snapshot_id=snapshot_id,
+            )
+            snapshot_id = response["snapshot_id"]
+        for move in diff.moves:
+            response = self._make_request(
+                self.spotify.playlist_reorder_items,
+                playlist_id,
+                range_start=move.range_start,
+                insert_before=move.insert_before,
+                snapshot_id=snapshot_id,
+            )
+            snapshot_id = response["snapshot_id"]
+        for addition in diff.additions:
+            try:
+                response = self._make_request(
+                    self.spotify.playlist_add_items,
+                    playlist_id,
+                    addition.track_ids,
+                    position=addition.position,
+                )
+                snapshot_id = response["snapshot_id"]
+            except Exception as e:
+                print(
+                    f"Error adding batch {addition.track_ids} to playlist {playlist_name} exception {e}"
+                )
+                all_added = False
+                self.handle_individual_error(
+                    addition.track_ids, playlist_id, playlist_name, addition.position
+                )
+
+        if not all_added or has_unmanaged_items:
+            # we can't tell exactly what the playlist holds now
+            self.get_playlist_cache().invalidate(playlist_id)
+        elif snapshot_id is not None:
+            self.get_playlist_cache().put(
+                playlist_id, snapshot_id, dedupe_track_ids(track_ids)
+            )
+        if snapshot_id is not None:
+            # keep the new snapshot id for the next run's cache lookups
+            with self.playlist_registry_batch(), self._playlist_registry_lock:
+                playlist["snapshot_id"] = snapshot_id
+                self._playlist_registry_dirty = True
+        return diff
+
+    def get_playlist_track_ids(self, playlist: dict) -> Tuple[List[str], bool, str]:
+        """Current track ids of a playlist, whether it holds items without one,
+        and the snapshot id they belong to.
+
+        The snapshot id is always read from Spotify, the stored one may predate
+        edits made elsewhere; the items are only read on a cache miss.
+        """
+        playlist_id = playlist["id"]
+        snapshot_id = self.get_current_snapshot_id(playlist_id)
+        cached_track_ids = self.get_playlist_cache().get(playlist_id, snapshot_id)
+        if cached_track_ids is not None:
+            return cached_track_ids, False, snapshot_id
+
+        playlist_items = self.spotify_data_getter.get_tracks_for_playlist(
+            playlist_id, playlist["name"]
+        )
+        track_ids, has_unmanaged_items = self.get_playlist_item_ids(playlist_items)
+        if not has_unmanaged_items:
+            self.get_playlist_cache().put(playlist_id, snapshot_id, track_ids)
+        return track_ids, has_unmanaged_items, snapshot_id
+
+    def get_current_snapshot_id(self, playlist_id: str) -> str:
+        response = self._make_request(
+            self.spotify.playlist, playlist_id, fields="snapshot_id"
+        )
+        return response["snapshot_id"]
+
+    def get_playlist_cache(self) -> PlaylistCache:
+        if self.playlist_cache is None:
+            os.makedirs(self.save_location, exist_ok=True)
+            self.playlist_cache = PlaylistCache(
+                os.path.join(self.save_location, PLAYLIST_CACHE_FILE)
+            )
+        return self.playlist_cache
+
+    @staticmethod
+    def get_playlist_item_ids(playlist_items) -> Tuple[List[str], bool]:
+        """Track ids of a playlist's items, and whether it holds items without one."""
+        track_ids = []
+        has_unmanaged_items = False
+        for item in playlist_items:
+            track = item.get("track")
+            if track is None or track.get("is_local") or track.get("id") is None:
+                has_unmanaged_items = True
+                continue
+            track_ids.append(track["id"])
+        return track_ids, has_unmanaged_items
 
     def add_tracks_to_playlist(self, playlist: dict, track_ids: list):
         logger.debug(f"Adding {len(track_ids)} tracks to playlist {playlist['name']}")
         playlist_id = playlist["id"]
         playlist_name = playlist["name"]
-        existing_tracks = self.spotify_data_getter.get_tracks_for_playlist(
-            playlist_id, playlist_name
-        )
-        existing_track_ids: list = [
-            item["track"]["id"]
-            for item in existing_tracks
-            if item["track"]["is_local"] is False
-        ]
+        existing_track_ids, _, _ = self.get_playlist_track_ids(playlist)
+        self.get_playlist_cache().invalidate(playlist_id)
 
         track_ids_to_add = list(set(track_ids) - set(existing_track_ids))
         batch_list: Generator[List] = self.batch_list(
@@ -637,7 +881,7 @@ class SpotifyPlaylistMaker:
         for batch in batch_list:
             if batch is not None and len(batch) > 0:
                 try:
-                    self.spotify.playlist_add_items(playlist_id, batch)
+                    self._make_request(self.spotify.playlist_add_items, playlist_id, batch)
                 except Exception as e:
                     print(
                         f"Error adding batch {batch} to playlist {playlist_name} exception {e}"
@@ -645,10 +889,14 @@ class SpotifyPlaylistMaker:
                     self.handle_individual_error(batch, playlist_id, playlist_name)
                     continue
 
-    def handle_individual_error(self, batch, playlist_id, playlist_name):
+    def handle_individual_error(self, batch, playlist_id, playlist_name, position=None):
         for batch_id in batch:
             try:
-                self.spotify.playlist_add_items(playlist_id, [batch_id])
+                self._make_request(
+                    self.spotify.playlist_add_items, playlist_id, [batch_id], position=position
+                )
+                if position is not None:
+                    position += 1
             except Exception as e:
                 print(e)
                 print(f"Error adding {batch_id} to playlist {playlist_name}")
@@ -683,7 +931,7 @@ class SpotifyPlaylistMaker:
         playlist_id = playlist["id"]
         num_tracks_added = 0
         for batch in batch_list:
-            self.spotify.playlist_add_items(playlist_id, batch)
+            self._make_request(self.spotify.playlist_add_items, playlist_id, batch)
             num_tracks_added += len(batch)
             if num_tracks_added >= tracks_per_playlist:
                 num_tracks_added = 0
@@ -715,8 +963,7 @@ class SpotifyPlaylistMaker:
         )
 
         playlist = self.get_or_create_playlist("All Top Songs")
-        self.remove_tracks_from_playlist(playlist)
-        self.add_tracks_to_playlist(
+        self.sync_playlist_tracks(
             playlist=playlist, track_ids=list(all_top_playlist_track_ids)
         )
 
@@ -725,21 +972,16 @@ class SpotifyPlaylistMaker:
         logger.debug(f"Removing tracks from playlist {playlist_name}")
         playlist_id = playlist["id"]
 
-        playlist_items = self.spotify_data_getter.get_tracks_for_playlist(
-            playlist_id, playlist_name
-        )
-        playlist_item_ids: list = [
-            item["track"]["id"]
-            for item in playlist_items
-            if "is_local" in item["track"]
-            if item["track"]["is_local"] is False
-        ]
+        playlist_item_ids, _, _ = self.get_playlist_track_ids(playlist)
+        self.get_playlist_cache().invalidate(playlist_id)
         logger.debug(f"Removing {len(playlist_item_ids)} tracks from playlist")
         chunks = self.batch_list(playlist_item_ids, 100)
         for chunk in chunks:
             logger.debug(f"Removing {len(chunk)} tracks from playlist")
-            self.spotify.playlist_remove_all_occurrences_of_items(
-                playlist_id=playlist_id, items=chunk
+            self._make_request(
+                self.spotify.playlist_remove_all_occurrences_of_items,
+                playlist_id=playlist_id,
+                items=chunk,
             )
 
     def make_decade_playlists(self):
@@ -782,8 +1024,7 @@ class SpotifyPlaylistMaker:
             if len(playlist_track_ids[decade]) > 0:
                 print(f"Number of {decade} tracks: {len(playlist_track_ids[decade])}")
                 playlist = self.get_or_create_playlist(f"{decade} Top Songs")
-                self.remove_tracks_from_playlist(playlist)
-                self.add_tracks_to_playlist(playlist, list(playlist_track_ids[decade]))
+                self.sync_playlist_tracks(playlist, list(playlist_track_ids[decade]))
 
     def get_or_create_playlist(self, playlist_name: str) -> dict:
         logger.debug(f"Getting or creating playlist {playlist_name}")
@@ -807,21 +1048,102 @@ class SpotifyPlaylistMaker:
         track_ids = [track["id"] for track in tracks]
 
         playlist = self.get_or_create_playlist(f"{playlist_name}")
-        self.remove_tracks_from_playlist(playlist)
-        self.add_tracks_to_playlist(playlist, track_ids)
+        self.sync_playlist_tracks(playlist, track_ids)
 
     def find_playlist_by_name(self, playlist_name: str):
         logger.debug(f"Finding playlist by name {playlist_name}")
-        logger.debug(f"Number of playlists: {len(self.playlists)}")
-        if len(self.playlists) == 0:
-            logger.debug("Fetching playlists from Spotify")
-            self.playlists, _ = self.spotify_data_getter.get_playlists()
+        playlist = self.get_playlist_registry().get(playlist_name)
+        if playlist is None and not self._playlist_registry_refreshed:
+            # the snapshot may predate playlists made elsewhere, check Spotify once
+            self.refresh_playlist_registry()
+            playlist = self.playlist_registry.get(playlist_name)
+
+        if playlist is None:
+            logger.debug(f"Playlist {playlist_name} not found")
         else:
-            logger.debug("Using cached playlists")
-        for playlist in self.playlists:
-            if playlist["name"] == playlist_name:
-                logger.debug(f"Found playlist {playlist_name}")
-                return playlist
-
-        logger.debug(f"Playlist {playlist_name} not found")
-        return None
+            logger.debug(f"Found playlist {playlist_name}")
+        return playlist
+
+    def get_playlist_registry(self) -> Dict[str, dict]:
+        """Owned playlists by name, built on first use.
+
+        Starts from the playlists in the snapshot, overlaid with the registry
+        persisted by earlier runs, which also knows about playlists created
+        since the snapshot was taken. Only crawls Spotify when both are empty.
+        """
+        with self._playlist_registry_lock:
+            if self.playlist_registry is None:
+                registry: Dict[str, dict] = {}
+                for playlist in self.playlists or []:
+                    # first match wins, as it did when scanning the list
+                    registry.setdefault(playlist["name"], playlist)
+                registry.update(self.load_playlist_registry())
+                self.playlist_registry = registry
+                logger.debug(f"Playlist registry has {len(registry)} playlists")
+                if len(registry) == 0:
+                    self.refresh_playlist_registry()
+            return self.playlist_registry
+
+    def refresh_playlist_registry(self) -> Dict[str, dict]:
+        """Rebuild the registry from Spotify, including generated playlists."""
+        logger.debug("Fetching playlists from Spotify")
+        playlists, _ = self.spotify_data_getter.get_playlists(include_generated=True)
+        registry: Dict[str, dict] = {}
+        for playlist in playlists:
+            registry.setdefault(playlist["name"], playlist)
+        with self.playlist_registry_batch(), self._playlist_registry_lock:
+            self.playlist_registry = registry
+            self._playlist_registry_refreshed = True
+            self._playlist_registry_dirty = True
+        return registry
+
+    def register_playlist(self, playlist: dict) -> None:
+        registry = self.get_playlist_registry()
+        with self.playlist_registry_batch(), self._playlist_registry_lock:
+            registry[playlist["name"]] = playlist
+            if self.playlists is not None:
+                self.playlists.append(playlist)
+            self._playlist_registry_dirty = True
+
+    @contextmanager
+    def playlist_registry_batch(self) -> Iterator[None]:
+        """Save registry changes once, when the outermost batch ends.
+
+        Playlists are created and synced from several job threads at once; the
+        registry is only changed and written under ``_playlist_registry_lock``.
+        """
+        with self._playlist_registry_lock:
+            self._playlist_registry_batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._playlist_registry_lock:
+                self._playlist_registry_batch_depth -= 1
+                if self._playlist_registry_batch_depth == 0:
+                    self.save_playlist_registry()
+
+    def get_playlist_registry_location(self) -> str:
+        # not the dated snapshot folder, the registry outlives each snapshot
+        return self.save_location
+
+    def load_playlist_registry(self) -> Dict[str, dict]:
+        locations = [self.get_playlist_registry_location()]
+        if self.snapshot_location:
+            # written next to the snapshot by earlier versions
+            locations.append(self.snapshot_location)
+        for location in locations:
+            registry_zip = os.path.join(location, f"{PLAYLIST_REGISTRY}.gz")
+            if os.path.exists(registry_zip):
+                return unzip_data_from_zip(registry_zip)
+        return {}
+
+    def save_playlist_registry(self) -> None:
+        with self._playlist_registry_lock:
+            if self.playlist_registry is None or not self._playlist_registry_dirty:
+                return
+            zip_data(
+                self.playlist_registry,
+                data_type=PLAYLIST_REGISTRY,
+                data_location=self.get_playlist_registry_location(),
+            )
+            self._playlist_registry_dirty = False
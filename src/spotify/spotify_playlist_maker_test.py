@@ -0,0 +1,177 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from spotify.spotify_playlist_maker import SpotifyPlaylistMaker
+from spotify.spotify_utils import zip_data
+
+
+def make_playlist_maker(save_location, playlists):
+    """A playlist maker wired to mocks, skipping config and zip loading."""
+    maker = SpotifyPlaylistMaker.__new__(SpotifyPlaylistMaker)
+    maker._playlist_registry_lock = threading.RLock()
+    maker._playlist_registry_dirty = False
+    maker._playlist_registry_batch_depth = 0
+    maker.save_location = save_location
+    maker.user = "user"
+    maker.playlists = playlists
+    maker.spotify = MagicMock()
+    maker.spotify_data_getter = MagicMock()
+    maker.spotify_data_getter._make_request.side_effect = (
+        lambda request_func, *args, **kwargs: request_func(*args, **kwargs)
+    )
+    maker.spotify_data_getter.get_playlists.return_value = ([], [])
+    return maker
+
+
+def fake_created_playlist(name, user, public):
+    return {"id": f"id-{name}", "name": name, "description": ""}
+
+
+class PlaylistRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.save_location = tempfile.mkdtemp()
+
+    def test_finds_snapshot_playlists_without_crawling(self):
+        maker = make_playlist_maker(
+            self.save_location, [{"id": "1", "name": "Liked 1999", "description": ""}]
+        )
+
+        playlist = maker.get_or_create_playlist("Liked 1999")
+
+        self.assertEqual("1", playlist["id"])
+        maker.spotify_data_getter.get_playlists.assert_not_called()
+        maker.spotify.user_playlist_create.assert_not_called()
+
+    def test_created_playlist_is_reused_and_persisted(self):
+        maker = make_playlist_maker(self.save_location, [])
+        maker.spotify.user_playlist_create.side_effect = fake_created_playlist
+
+        first = maker.get_or_create_playlist("colours - Red")
+        second = maker.get_or_create_playlist("colours - Red")
+
+        self.assertIs(first, second)
+        self.assertEqual(1, maker.spotify.user_playlist_create.call_count)
+        # one crawl for the empty registry, none for the later lookups
+        self.assertEqual(1, maker.spotify_data_getter.get_playlists.call_count)
+
+        next_run = make_playlist_maker(self.save_location, [])
+        self.assertEqual(
+            "id-colours - Red", next_run.find_playlist_by_name("colours - Red")["id"]
+        )
+        next_run.spotify_data_getter.get_playlists.assert_not_called()
+
+    def test_registry_is_saved_once_per_batch_outside_the_snapshot(self):
+        maker = make_playlist_maker(
+            self.save_location, [{"id": "1", "name": "Liked 1999", "description": ""}]
+        )
+        maker.snapshot_location = os.path.join(self.save_location, "raw", "2024-01-01")
+        maker.spotify.user_playlist_create.side_effect = fake_created_playlist
+
+        with patch("spotify.spotify_playlist_maker.zip_data", wraps=zip_data) as save:
+            with maker.playlist_registry_batch():
+                maker.get_or_create_playlist("colours - Red")
+                maker.get_or_create_playlist("colours - Blue")
+            self.assertEqual(1, save.call_count)
+        self.assertEqual(self.save_location, save.call_args.kwargs["data_location"])
+
+        # a later snapshot still finds the playlists created before it
+        next_run = make_playlist_maker(self.save_location, [])
+        next_run.snapshot_location = os.path.join(self.save_location, "raw", "2024-02-01")
+        self.assertEqual(
+            "id-colours - Blue", next_run.find_playlist_by_name("colours - Blue")["id"]
+        )
+
+    def test_miss_checks_spotify_once_for_generated_playlists(self):
+        maker = make_playlist_maker(
+            self.save_location, [{"id": "1", "name": "Liked 1999", "description": ""}]
+        )
+        maker.spotify_data_getter.get_playlists.return_value = (
+            [{"id": "2", "name": "Liked 2000", "description": "*generated"}],
+            [],
+        )
+
+        self.assertEqual("2", maker.find_playlist_by_name("Liked 2000")["id"])
+        self.assertIsNone(maker.find_playlist_by_name("Liked 2001"))
+        maker.spotify_data_getter.get_playlists.assert_called_once_with(
+            include_generated=True
+        )
+
+
+def playlist_items(track_ids):
+    return [{"track": {"id": track_id, "is_local": False}} for track_id in track_ids]
+
+
+class PlaylistCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.save_location = tempfile.mkdtemp()
+        self.playlist = {"id": "p1", "name": "Liked 1999", "snapshot_id": "s1"}
+
+    def make_maker(self, current_snapshot_id="s1"):
+        maker = make_playlist_maker(self.save_location, [dict(self.playlist)])
+        maker.spotify.playlist.return_value = {"snapshot_id": current_snapshot_id}
+        maker.spotify_data_getter.get_tracks_for_playlist.return_value = iter(
+            playlist_items(["a", "b"])
+        )
+        maker.spotify.playlist_add_items.return_value = {"snapshot_id": "s2"}
+        return maker
+
+    def test_rerun_on_unchanged_playlist_needs_no_reads(self):
+        maker = self.make_maker()
+        maker.sync_playlist_tracks(
+            maker.find_playlist_by_name("Liked 1999"), ["a", "b", "c"]
+        )
+        maker.spotify_data_getter.get_tracks_for_playlist.assert_called_once()
+
+        next_run = self.make_maker(current_snapshot_id="s2")
+        diff = next_run.sync_playlist_tracks(
+            next_run.find_playlist_by_name("Liked 1999"), ["a", "b", "c"]
+        )
+
+        self.assertTrue(diff.is_empty)
+        next_run.spotify_data_getter.get_tracks_for_playlist.assert_not_called()
+
+    def test_removals_use_the_diffed_snapshot_and_adds_chain_theirs(self):
+        maker = self.make_maker()
+        maker.spotify.playlist_remove_all_occurrences_of_items.return_value = {
+            "snapshot_id": "s2"
+        }
+        maker.spotify.playlist_add_items.return_value = {"snapshot_id": "s3"}
+
+        playlist = maker.find_playlist_by_name("Liked 1999")
+        maker.sync_playlist_tracks(playlist, ["b", "c"])
+
+        remove = maker.spotify.playlist_remove_all_occurrences_of_items.call_args
+        self.assertEqual("s1", remove.kwargs["snapshot_id"])
+        maker.spotify.playlist_add_items.assert_called_once_with("p1", ["c"], position=1)
+        self.assertEqual(["b", "c"], maker.get_playlist_cache().get("p1", "s3"))
+        self.assertEqual("s3", playlist["snapshot_id"])
+
+    def test_changed_snapshot_is_a_miss(self):
+        maker = self.make_maker()
+        maker.get_playlist_cache().put("p1", "old", ["x"])
+
+        track_ids, _, snapshot_id = maker.get_playlist_track_ids(self.playlist)
+
+        self.assertEqual(["a", "b"], track_ids)
+        self.assertEqual("s1", snapshot_id)
+        self.assertEqual(["a", "b"], maker.get_playlist_cache().get("p1", "s1"))
+
+    def test_edits_made_elsewhere_are_a_miss(self):
+        maker = self.make_maker()
+        maker.get_playlist_cache().put("p1", "s1", ["x"])
+        # edited in the Spotify app since the stored snapshot id
+        maker.spotify.playlist.return_value = {"snapshot_id": "s9"}
+
+        track_ids, _, snapshot_id = maker.get_playlist_track_ids(self.playlist)
+
+        self.assertEqual((["a", "b"], "s9"), (track_ids, snapshot_id))
+        maker.spotify.playlist.assert_called_once_with("p1", fields="snapshot_id")
+        self.assertEqual(["a", "b"], maker.get_playlist_cache().get("p1", "s9"))
+        self.assertIsNone(maker.get_playlist_cache().get("p1", "s1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
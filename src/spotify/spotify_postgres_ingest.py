@@ -0,0 +1,233 @@
+"""Parallel, pipelined loading of a Spotify snapshot into Postgres.
+
+Each data type is decoded and normalized into rows in a worker process. As
+soon as a data type's rows arrive, its tables are merged over their own pool
+connections, while other data types are still being decoded. A table only
+starts once the tables its foreign keys point at are complete, and merges
+into the same table are serialized so concurrent upserts can't deadlock.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from spotify.spotify_postgres_rows import (
+    SpotifyRows,
+    ARTISTS_TABLE,
+    EMBEDDED_ARTISTS,
+    ALBUMS_TABLE,
+    ALBUM_ARTISTS_TABLE,
+    TRACKS_TABLE,
+    TRACK_ARTISTS_TABLE,
+    PLAYLISTS_TABLE,
+    PLAYLIST_TRACKS_TABLE,
+    Row,
+)
+from spotify.spotify_utils import (
+    SAVED_ARTISTS,
+    SAVED_ALBUMS,
+    SAVED_TRACKS,
+    PLAYLISTS,
+    PLAYLIST_TRACKS,
+    get_latest_zip,
+    unzip_data_from_zip,
+)
+from utils.tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+ALL_DATA = "all_data"
+
+# Row sources each data type produces
+DATA_TYPE_SOURCES = {
+    SAVED_ARTISTS: (ARTISTS_TABLE,),
+    SAVED_ALBUMS: (EMBEDDED_ARTISTS, ALBUMS_TABLE, ALBUM_ARTISTS_TABLE),
+    SAVED_TRACKS: (EMBEDDED_ARTISTS, TRACKS_TABLE, TRACK_ARTISTS_TABLE),
+    PLAYLISTS: (PLAYLISTS_TABLE,),
+    PLAYLIST_TRACKS: (
+        EMBEDDED_ARTISTS, TRACKS_TABLE, TRACK_ARTISTS_TABLE, PLAYLIST_TRACKS_TABLE,
+    ),
+}
+DATA_TYPE_SOURCES[ALL_DATA] = tuple(
+    dict.fromkeys(source for sources in DATA_TYPE_SOURCES.values() for source in sources)
+)
+
+# Sources that must be fully merged before a source can start (foreign keys)
+SOURCE_DEPENDENCIES = {
+    ALBUM_ARTISTS_TABLE: (ALBUMS_TABLE, EMBEDDED_ARTISTS),
+    TRACK_ARTISTS_TABLE: (TRACKS_TABLE, EMBEDDED_ARTISTS),
+    PLAYLIST_TRACKS_TABLE: (PLAYLISTS_TABLE, TRACKS_TABLE),
+}
+
+
+class IngestTiming(BaseModel):
+    """How long one decode or merge step took."""
+
+    step: str
+    rows: int = 0
+    seconds: float = 0.0
+
+
+def normalize_zip(
+    data_type: str, zip_filename: str, strict: bool = False
+) -> Dict[str, List[Row]]:
+    """Worker process entry point: decode one snapshot zip into table rows."""
+    data = unzip_data_from_zip(zip_filename)
+    return normalize_data(data_type, data, strict)
+
+
+def normalize_data(data_type: str, data: Any, strict: bool = False) -> Dict[str, List[Row]]:
+    """Worker process entry point: normalize one data type into table rows."""
+    data = data if data_type == ALL_DATA else {data_type: data}
+    return SpotifyRows(strict=strict).add_all(data).rows
+
+
+def find_snapshot_zips(data_location: str) -> Dict[str, str]:
+    """Per data type zips of the latest snapshot, or its all_data zip."""
+    zip_files = {}
+    for data_type in (SAVED_ARTISTS, SAVED_ALBUMS, SAVED_TRACKS, PLAYLISTS, PLAYLIST_TRACKS):
+        zip_filename = get_latest_zip(data_location, file_name=data_type)
+        if zip_filename:
+            zip_files[data_type] = zip_filename
+    if not zip_files:
+        zip_filename = get_latest_zip(data_location, file_name=ALL_DATA)
+        if zip_filename:
+            zip_files[ALL_DATA] = zip_filename
+    logger.info(f"Found snapshot zips: {zip_files}")
+    return zip_files
+
+
+class PostgresIngestor:
+    """Load several data types concurrently, respecting foreign key order.
+
+    ``merge_steps`` and ``copy_and_merge`` come from ``SpotifyPostgresSaver``;
+    every merge runs in its own transaction on its own pool connection, so a
+    failure leaves the tables merged so far in place.
+    """
+
+    def __init__(
+        self,
+        pool,
+        merge_steps,
+        copy_and_merge: Callable[[Any, Any, List[Row]], Awaitable[None]],
+        max_workers: Optional[int] = None,
+        strict: bool = False,
+    ) -> None:
+        self.pool = pool
+        self.strict = strict
+        self.merge_steps = merge_steps
+        self.copy_and_merge = copy_and_merge
+        self.max_workers = max_workers or min(len(DATA_TYPE_SOURCES), os.cpu_count() or 1)
+        self.timings: List[IngestTiming] = []
+
+    @traced()
+    async def ingest_zips(self, zip_files: Dict[str, str]) -> List[IngestTiming]:
+        """Ingest ``{data_type: zip_filename}``, decoding the zips in worker processes."""
+        return await self._ingest(zip_files, normalize_zip)
+
+    @traced()
+    async def ingest_data(self, data: Dict[str, Any]) -> List[IngestTiming]:
+        """Ingest already loaded data, normalizing each data type in a worker process."""
+        data = {
+            data_type: items
+            for data_type, items in data.items()
+            if data_type in DATA_TYPE_SOURCES
+        }
+        return await self._ingest(data, normalize_data)
+
+    async def _ingest(self, inputs: Dict[str, Any], worker) -> List[IngestTiming]:
+        start_time = time.time()
+        self.timings = []
+        self._remaining = {}
+        for data_type in inputs:
+            for source in DATA_TYPE_SOURCES[data_type]:
+                self._remaining[source] = self._remaining.get(source, 0) + 1
+        self._done = {step.source: asyncio.Event() for step in self.merge_steps}
+        for source, event in self._done.items():
+            if source not in self._remaining:
+                event.set()
+        self._table_locks = {step.table: asyncio.Lock() for step in self.merge_steps}
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            tasks = [
+                asyncio.create_task(
+                    self._load(
+                        data_type,
+                        loop.run_in_executor(
+                            executor, worker, data_type, value, self.strict
+                        ),
+                    )
+                )
+                for data_type, value in inputs.items()
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.timings.append(IngestTiming(step="total", seconds=time.time() - start_time))
+        for timing in self.timings:
+            logger.info(f"{timing.step}: {timing.rows} rows in {timing.seconds:.2f}s")
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+        return self.timings
+
+    async def _load(self, data_type: str, rows_future) -> None:
+        decode_start = time.time()
+        try:
+            # the decoding itself runs in a worker process, outside the trace
+            with span("postgres.decode", data_type=data_type) as decode_span:
+                rows = await rows_future
+                decode_span.set_attribute(
+                    "rows", sum(len(records) for records in rows.values())
+                )
+        except BaseException:
+            # nothing will be merged for this data type, don't block dependents
+            for source in DATA_TYPE_SOURCES[data_type]:
+                self._mark_merged(source)
+            raise
+        self.timings.append(
+            IngestTiming(
+                step=f"decode {data_type}",
+                rows=sum(len(records) for records in rows.values()),
+                seconds=time.time() - decode_start,
+            )
+        )
+
+        merges = [
+            self._merge(data_type, step, rows.get(step.source, []))
+            for step in self.merge_steps
+            if step.source in DATA_TYPE_SOURCES[data_type]
+        ]
+        results = await asyncio.gather(*merges, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+    async def _merge(self, data_type: str, step, records: List[Row]) -> None:
+        try:
+            with span("postgres.wait_for_dependencies", table=step.table):
+                for dependency in SOURCE_DEPENDENCIES.get(step.source, ()):
+                    await self._done[dependency].wait()
+            async with self._table_locks[step.table]:
+                merge_start = time.time()
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await self.copy_and_merge(conn, step, records)
+                self.timings.append(
+                    IngestTiming(
+                        step=f"merge {data_type} {step.source}",
+                        rows=len(records),
+                        seconds=time.time() - merge_start,
+                    )
+                )
+        finally:
+            self._mark_merged(step.source)
+
+    def _mark_merged(self, source: str) -> None:
+        self._remaining[source] -= 1
+        if self._remaining[source] == 0:
+            self._done[source].set()
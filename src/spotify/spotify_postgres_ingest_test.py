@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+
+from spotify.spotify_postgres_ingest import SOURCE_DEPENDENCIES, PostgresIngestor
+from spotify.spotify_postgres_rows import (
+    ALBUM_ARTISTS_TABLE,
+    PLAYLIST_TRACKS_TABLE,
+    TRACKS_TABLE,
+)
+from spotify.spotify_postgres_saver import BULK_MERGE_STEPS
+from spotify.spotify_utils import PLAYLIST_TRACKS, PLAYLISTS, SAVED_ALBUMS, SAVED_TRACKS
+
+
+class FakeConnection:
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection()
+
+
+def artist(artist_id):
+    return {"id": artist_id, "name": artist_id, "uri": "u", "href": "h"}
+
+
+def track(track_id):
+    return {
+        "id": track_id,
+        "name": track_id,
+        "duration_ms": 1,
+        "album": {"id": "al1"},
+        "artists": [artist("a1")],
+    }
+
+
+DATA = {
+    SAVED_ALBUMS: [
+        {
+            "id": "al1",
+            "name": "al1",
+            "uri": "u",
+            "href": "h",
+            "release_date": "1999",
+            "total_tracks": 1,
+            "album_type": "album",
+            "artists": [artist("a1")],
+        }
+    ],
+    SAVED_TRACKS: [track("t1")],
+    PLAYLISTS: [
+        {
+            "id": "p1",
+            "name": "p1",
+            "uri": "u",
+            "owner": {"display_name": "me"},
+            "tracks": {"total": 1},
+        }
+    ],
+    PLAYLIST_TRACKS: {"p1": [{"added_at": "2024-01-01T00:00:00Z", "track": track("t2")}]},
+}
+
+
+class PostgresIngestorTest(unittest.IsolatedAsyncioTestCase):
+    async def test_merges_after_dependencies_and_one_at_a_time_per_table(self):
+        merged = []
+        active_tables = set()
+
+        async def copy_and_merge(conn, step, records):
+            for dependency in SOURCE_DEPENDENCIES.get(step.source, ()):
+                self.assertNotIn(dependency, pending_sources())
+            self.assertNotIn(step.table, active_tables)
+            active_tables.add(step.table)
+            await asyncio.sleep(0.01)
+            active_tables.discard(step.table)
+            merged.append((step.source, len(records)))
+
+        ingestor = PostgresIngestor(FakePool(), BULK_MERGE_STEPS, copy_and_merge, 2)
+
+        def pending_sources():
+            return {s for s, event in ingestor._done.items() if not event.is_set()}
+
+        await ingestor.ingest_data(DATA)
+
+        self.assertIn((PLAYLIST_TRACKS_TABLE, 1), merged)
+        self.assertIn((ALBUM_ARTISTS_TABLE, 1), merged)
+        # tracks come from both saved tracks and playlist tracks
+        self.assertEqual(2, [source for source, _ in merged].count(TRACKS_TABLE))
+        self.assertEqual("total", ingestor.timings[-1].step)
+
+    async def test_failed_merge_is_raised_without_hanging(self):
+        async def copy_and_merge(conn, step, records):
+            if step.source == TRACKS_TABLE:
+                raise RuntimeError("copy failed")
+
+        ingestor = PostgresIngestor(FakePool(), BULK_MERGE_STEPS, copy_and_merge, 2)
+
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(ingestor.ingest_data(DATA), timeout=30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Versioned schema changes for the ``spot_*`` tables.
+
+``create_tables.sql`` only creates the tables; anything added afterwards
+(indexes, generated columns) lives in ``schema/migrations`` as numbered SQL
+files. Each file runs once, in its own transaction, and is recorded in
+``spot_schema_migrations`` so later connects skip it.
+"""
+import logging
+import os
+from typing import Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "spot_schema_migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "schema", "migrations")
+# Any constant works, it only has to be the same for every process migrating
+MIGRATIONS_LOCK_ID = 4_201_736
+
+CREATE_MIGRATIONS_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+        version TEXT PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+
+def list_migrations(migrations_dir: str = MIGRATIONS_DIR) -> List[Tuple[str, str]]:
+    """``(version, path)`` for every migration file, in the order they apply."""
+    return [
+        (os.path.splitext(file_name)[0], os.path.join(migrations_dir, file_name))
+        for file_name in sorted(os.listdir(migrations_dir))
+        if file_name.endswith(".sql")
+    ]
+
+
+def pending_migrations(
+    migrations: List[Tuple[str, str]], applied: Iterable[str]
+) -> List[Tuple[str, str]]:
+    applied = set(applied)
+    return [(version, path) for version, path in migrations if version not in applied]
+
+
+async def apply_migrations(conn, migrations_dir: str = MIGRATIONS_DIR) -> List[str]:
+    """Apply the migrations this database hasn't seen yet, returning their versions.
+
+    An advisory lock keeps two processes connecting at once from running
+    the same migration twice.
+    """
+    await conn.execute(CREATE_MIGRATIONS_TABLE)
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_ID)
+    try:
+        applied = [
+            record["version"]
+            for record in await conn.fetch(f"SELECT version FROM {MIGRATIONS_TABLE}")
+        ]
+        pending = pending_migrations(list_migrations(migrations_dir), applied)
+        for version, path in pending:
+            with open(path, "r") as f:
+                migration_sql = f.read()
+            logger.info(f"Applying migration {version}")
+            async with conn.transaction():
+                await conn.execute(migration_sql)
+                await conn.execute(
+                    f"INSERT INTO {MIGRATIONS_TABLE} (version) VALUES ($1)", version
+                )
+        if not pending:
+            logger.debug("Schema is up to date")
+        return [version for version, _ in pending]
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_ID)
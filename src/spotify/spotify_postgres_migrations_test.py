@@ -0,0 +1,45 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+from spotify.spotify_postgres_migrations import (
+    MIGRATIONS_TABLE,
+    apply_migrations,
+    list_migrations,
+)
+
+
+class FakeConnection:
+    def __init__(self, applied):
+        self.executed = []
+        self.fetch = AsyncMock(return_value=[{"version": version} for version in applied])
+
+    async def execute(self, sql, *args):
+        self.executed.append(sql)
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class MigrationsTest(unittest.IsolatedAsyncioTestCase):
+    def test_migrations_apply_in_file_order(self):
+        versions = [version for version, _ in list_migrations()]
+
+        self.assertEqual(sorted(versions), versions)
+        self.assertEqual("001_search_indexes", versions[0])
+
+    async def test_only_pending_migrations_run_and_are_recorded(self):
+        versions = [version for version, _ in list_migrations()]
+        conn = FakeConnection(applied=versions[:-1])
+
+        applied = await apply_migrations(conn)
+
+        self.assertEqual(versions[-1:], applied)
+        inserts = [sql for sql in conn.executed if sql.startswith(f"INSERT INTO {MIGRATIONS_TABLE}")]
+        self.assertEqual(1, len(inserts))
+        self.assertIn("pg_advisory_unlock", conn.executed[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+"""Flatten raw Spotify JSON into rows for the ``spot_*`` tables.
+
+Used by the bulk loader, which streams these rows into staging tables with
+COPY, and by the row-by-row save methods. Each ``*_row`` function maps a raw
+dict straight to a tuple in the order of the matching ``*_COLUMNS`` constant,
+checking only the keys the table needs. Entity rows end with ``created_at``
+and a ``content_hash`` of everything before it, so an upsert can tell whether
+a stored row actually changed.
+
+The Pydantic models in ``spotify_models`` are much slower to build and are
+only used in strict mode, to validate each entity before it is converted.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from postgres.postgres_driver import JsonText
+from spotify.spotify_models import (
+    SpotifyAlbum,
+    SpotifyArtist,
+    SpotifyPlaylist,
+    SpotifyTrack,
+)
+from spotify.spotify_utils import (
+    SAVED_ARTISTS,
+    SAVED_ALBUMS,
+    SAVED_TRACKS,
+    PLAYLISTS,
+    PLAYLIST_TRACKS,
+)
+
+logger = logging.getLogger(__name__)
+
+ARTISTS_TABLE = "spot_artists"
+ALBUMS_TABLE = "spot_albums"
+ALBUM_ARTISTS_TABLE = "spot_album_artists"
+TRACKS_TABLE = "spot_tracks"
+TRACK_ARTISTS_TABLE = "spot_track_artists"
+PLAYLISTS_TABLE = "spot_playlists"
+PLAYLIST_TRACKS_TABLE = "spot_playlist_tracks"
+# Simplified artists embedded in albums and tracks, only inserted when missing
+EMBEDDED_ARTISTS = "embedded_artists"
+
+ARTIST_COLUMNS = (
+    "id", "name", "uri", "href", "external_urls", "image", "genres",
+    "popularity", "followers", "spotify_url", "created_at", "content_hash",
+)
+ALBUM_COLUMNS = (
+    "id", "name", "uri", "href", "external_urls", "image", "release_date",
+    "release_date_precision", "total_tracks", "album_type", "label",
+    "available_markets", "spotify_url", "created_at", "content_hash",
+)
+TRACK_COLUMNS = (
+    "id", "name", "uri", "href", "external_urls", "duration_ms", "preview_url",
+    "album_id", "isrc", "spotify_url", "created_at", "content_hash",
+)
+PLAYLIST_COLUMNS = (
+    "id", "name", "uri", "href", "external_urls", "description", "owner",
+    "public", "tracks_count", "spotify_url", "created_at", "content_hash",
+)
+ALBUM_ARTIST_COLUMNS = ("album_id", "artist_id")
+TRACK_ARTIST_COLUMNS = ("track_id", "artist_id")
+PLAYLIST_TRACK_COLUMNS = ("playlist_id", "track_id", "added_at", "created_at")
+
+Row = Tuple[Any, ...]
+
+
+def to_jsonb(value: Any) -> JsonText:
+    """Convert a Python value to a JSON string for PostgreSQL JSONB.
+
+    Serialized here rather than by the driver so ``content_hash`` covers the
+    same text that is stored.
+    """
+    return JsonText(json.dumps(value))
+
+
+def content_hash(values: Tuple[Any, ...]) -> str:
+    return hashlib.md5(json.dumps(values).encode("utf-8")).hexdigest()
+
+
+def with_hash(values: Tuple[Any, ...], created_at: datetime) -> Row:
+    return values + (created_at, content_hash(values))
+
+
+def largest_image_url(images: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    if not images:
+        return None
+    return max(images, key=lambda image: image.get("height") or 0)["url"]
+
+
+def spotify_url(item: Dict[str, Any]) -> Optional[str]:
+    return (item.get("external_urls") or {}).get("spotify")
+
+
+def parse_added_at(added_at: str) -> datetime:
+    return datetime.fromisoformat(added_at.replace("Z", ".000"))
+
+
+def unwrap(item: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Saved albums and tracks come wrapped as ``{"added_at": ..., key: {...}}``."""
+    wrapped = item.get(key)
+    if isinstance(wrapped, dict) and "added_at" in item:
+        return wrapped
+    return item
+
+
+def artist_row(artist: Dict[str, Any], created_at: datetime) -> Row:
+    # artists embedded in albums and tracks have no followers, keep them NULL
+    # so followed artists can be told apart
+    followers = artist.get("followers")
+    return with_hash(
+        (
+            artist["id"],
+            artist["name"],
+            artist["uri"],
+            artist["href"],
+            to_jsonb(artist.get("external_urls", {})),
+            largest_image_url(artist.get("images")),
+            to_jsonb(artist.get("genres", [])),
+            artist.get("popularity") or 0,
+            (followers.get("total") or 0) if followers is not None else None,
+            spotify_url(artist),
+        ),
+        created_at,
+    )
+
+
+def album_row(album: Dict[str, Any], created_at: datetime) -> Row:
+    return with_hash(
+        (
+            album["id"],
+            album["name"],
+            album["uri"],
+            album["href"],
+            to_jsonb(album.get("external_urls", {})),
+            largest_image_url(album.get("images")),
+            album["release_date"],
+            album.get("release_date_precision"),
+            album["total_tracks"],
+            album["album_type"],
+            album.get("label"),
+            to_jsonb(album.get("available_markets", [])),
+            spotify_url(album),
+        ),
+        created_at,
+    )
+
+
+def track_row(track: Dict[str, Any], created_at: datetime) -> Row:
+    return with_hash(
+        (
+            track["id"],
+            track["name"],
+            track.get("uri"),
+            track.get("href"),
+            to_jsonb(track.get("external_urls", {})),
+            track["duration_ms"],
+            track.get("preview_url"),
+            (track.get("album") or {}).get("id"),
+            (track.get("external_ids") or {}).get("isrc"),
+            spotify_url(track),
+        ),
+        created_at,
+    )
+
+
+def playlist_row(playlist: Dict[str, Any], created_at: datetime) -> Row:
+    return with_hash(
+        (
+            playlist["id"],
+            playlist["name"],
+            playlist["uri"],
+            playlist.get("href"),
+            to_jsonb(playlist.get("external_urls", {})),
+            playlist.get("description"),
+            playlist["owner"]["display_name"],
+            bool(playlist.get("public")),
+            playlist["tracks"]["total"],
+            spotify_url(playlist),
+        ),
+        created_at,
+    )
+
+
+class SpotifyRows:
+    """Rows for every table, collected from any mix of Spotify data types.
+
+    Tracks and embedded artists are converted once per id, however many
+    albums, playlists or tracks they appear in. With ``strict`` every saved
+    artist, album, track and playlist is validated with its Pydantic model.
+    """
+
+    def __init__(self, created_at: Optional[datetime] = None, strict: bool = False) -> None:
+        self.created_at = created_at or datetime.now()
+        self.strict = strict
+        self._track_ids: Set[str] = set()
+        self._embedded_artist_ids: Set[str] = set()
+        self.rows: Dict[str, List[Row]] = {
+            ARTISTS_TABLE: [],
+            EMBEDDED_ARTISTS: [],
+            ALBUMS_TABLE: [],
+            ALBUM_ARTISTS_TABLE: [],
+            TRACKS_TABLE: [],
+            TRACK_ARTISTS_TABLE: [],
+            PLAYLISTS_TABLE: [],
+            PLAYLIST_TRACKS_TABLE: [],
+        }
+
+    def __getitem__(self, table: str) -> List[Row]:
+        return self.rows[table]
+
+    def counts(self) -> Dict[str, int]:
+        return {table: len(rows) for table, rows in self.rows.items()}
+
+    def add_artists(self, artists: Iterable[Dict[str, Any]]) -> None:
+        rows = self.rows[ARTISTS_TABLE]
+        created_at = self.created_at
+        for artist in artists:
+            if self.strict:
+                SpotifyArtist(**artist)
+            rows.append(artist_row(artist, created_at))
+
+    def add_albums(self, albums: Iterable[Dict[str, Any]]) -> None:
+        rows = self.rows[ALBUMS_TABLE]
+        album_artist_rows = self.rows[ALBUM_ARTISTS_TABLE]
+        created_at = self.created_at
+        for item in albums:
+            album = unwrap(item, "album")
+            if self.strict:
+                SpotifyAlbum(**album)
+            rows.append(album_row(album, created_at))
+            album_id = album["id"]
+            for artist in album.get("artists", ()):
+                self._add_embedded_artist(artist)
+                album_artist_rows.append((album_id, artist["id"]))
+
+    def add_tracks(self, tracks: Iterable[Dict[str, Any]]) -> None:
+        for item in tracks:
+            track = unwrap(item, "track")
+            if self.strict:
+                SpotifyTrack(**track)
+            self._add_track(track)
+
+    def _add_track(self, track: Dict[str, Any]) -> None:
+        track_id = track["id"]
+        if track_id in self._track_ids:
+            return
+        self._track_ids.add(track_id)
+        self.rows[TRACKS_TABLE].append(track_row(track, self.created_at))
+        track_artist_rows = self.rows[TRACK_ARTISTS_TABLE]
+        for artist in track.get("artists", ()):
+            if artist.get("id") is None:
+                continue
+            self._add_embedded_artist(artist)
+            track_artist_rows.append((track_id, artist["id"]))
+
+    def _add_embedded_artist(self, artist: Dict[str, Any]) -> None:
+        artist_id = artist["id"]
+        if artist_id not in self._embedded_artist_ids:
+            self._embedded_artist_ids.add(artist_id)
+            self.rows[EMBEDDED_ARTISTS].append(artist_row(artist, self.created_at))
+
+    def add_playlists(self, playlists: Iterable[Dict[str, Any]]) -> None:
+        rows = self.rows[PLAYLISTS_TABLE]
+        created_at = self.created_at
+        for playlist in playlists:
+            if self.strict:
+                SpotifyPlaylist(**playlist)
+            rows.append(playlist_row(playlist, created_at))
+
+    def add_playlist_tracks(
+        self, playlist_tracks: Dict[str, List[Dict[str, Any]]]
+    ) -> None:
+        for playlist_id, items in playlist_tracks.items():
+            for item in items:
+                track = item.get("track")
+                if not track or track.get("id") is None:
+                    # local files and removed tracks have no id to store
+                    continue
+                self._add_track(track)
+                self.rows[PLAYLIST_TRACKS_TABLE].append(
+                    (
+                        playlist_id,
+                        track["id"],
+                        parse_added_at(item["added_at"]),
+                        self.created_at,
+                    )
+                )
+
+    def add_all(self, data: Dict[str, Any]) -> "SpotifyRows":
+        if SAVED_ARTISTS in data:
+            self.add_artists(data[SAVED_ARTISTS])
+        if SAVED_ALBUMS in data:
+            self.add_albums(data[SAVED_ALBUMS])
+        if SAVED_TRACKS in data:
+            self.add_tracks(data[SAVED_TRACKS])
+        if PLAYLISTS in data:
+            self.add_playlists(data[PLAYLISTS])
+        if PLAYLIST_TRACKS in data:
+            self.add_playlist_tracks(data[PLAYLIST_TRACKS])
+        logger.debug(f"Normalized rows: {self.counts()}")
+        return self
@@ -0,0 +1,138 @@
+import unittest
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from spotify.spotify_postgres_rows import (
+    ALBUM_COLUMNS,
+    ALBUMS_TABLE,
+    ALBUM_ARTISTS_TABLE,
+    ARTIST_COLUMNS,
+    ARTISTS_TABLE,
+    EMBEDDED_ARTISTS,
+    PLAYLIST_TRACKS_TABLE,
+    TRACK_ARTISTS_TABLE,
+    TRACK_COLUMNS,
+    TRACKS_TABLE,
+    SpotifyRows,
+)
+from spotify.spotify_utils import (
+    PLAYLIST_TRACKS,
+    SAVED_ALBUMS,
+    SAVED_ARTISTS,
+    SAVED_TRACKS,
+)
+
+CREATED_AT = datetime(2024, 1, 1)
+
+
+def artist(artist_id, **extra):
+    return {
+        "id": artist_id,
+        "name": f"Artist {artist_id}",
+        "uri": f"spotify:artist:{artist_id}",
+        "href": f"https://api/{artist_id}",
+        "external_urls": {"spotify": f"https://open/{artist_id}"},
+        **extra,
+    }
+
+
+def track(track_id, artist_ids):
+    return {
+        "id": track_id,
+        "name": f"Track {track_id}",
+        "uri": f"spotify:track:{track_id}",
+        "href": f"https://api/{track_id}",
+        "external_urls": {},
+        "duration_ms": 1000,
+        "album": {"id": "al1"},
+        "external_ids": {"isrc": "ISRC"},
+        "artists": [artist(artist_id) for artist_id in artist_ids],
+    }
+
+
+ALBUM = {
+    "id": "al1",
+    "name": "Album",
+    "uri": "spotify:album:al1",
+    "href": "https://api/al1",
+    "external_urls": {},
+    "images": [
+        {"url": "small", "height": 64, "width": 64},
+        {"url": "large", "height": 640, "width": 640},
+    ],
+    "release_date": "1999-01-01",
+    "release_date_precision": "day",
+    "total_tracks": 10,
+    "album_type": "album",
+    "artists": [artist("a1")],
+}
+
+
+class SpotifyRowsTest(unittest.TestCase):
+    def test_rows_match_column_order(self):
+        data = {
+            SAVED_ARTISTS: [
+                artist("a1", followers={"total": 5}, popularity=7, genres=["rock"])
+            ],
+            SAVED_ALBUMS: [{"added_at": "2024-01-01T00:00:00Z", "album": ALBUM}],
+            SAVED_TRACKS: [track("t1", ["a1", "a2"])],
+        }
+
+        rows = SpotifyRows(CREATED_AT).add_all(data)
+
+        artist_row = dict(zip(ARTIST_COLUMNS, rows[ARTISTS_TABLE][0]))
+        self.assertEqual(5, artist_row["followers"])
+        self.assertEqual('["rock"]', artist_row["genres"])
+        self.assertEqual("https://open/a1", artist_row["spotify_url"])
+        album_row = dict(zip(ALBUM_COLUMNS, rows[ALBUMS_TABLE][0]))
+        self.assertEqual("large", album_row["image"])
+        track_row = dict(zip(TRACK_COLUMNS, rows[TRACKS_TABLE][0]))
+        self.assertEqual(("al1", "ISRC"), (track_row["album_id"], track_row["isrc"]))
+        self.assertEqual([("al1", "a1")], rows[ALBUM_ARTISTS_TABLE])
+        self.assertEqual([("t1", "a1"), ("t1", "a2")], rows[TRACK_ARTISTS_TABLE])
+        # a1 appears on the album and the track but is converted once
+        self.assertEqual(2, len(rows[EMBEDDED_ARTISTS]))
+        embedded_row = dict(zip(ARTIST_COLUMNS, rows[EMBEDDED_ARTISTS][0]))
+        self.assertIsNone(embedded_row["followers"])
+
+    def test_playlist_tracks_skip_local_items(self):
+        data = {
+            PLAYLIST_TRACKS: {
+                "p1": [
+                    {"added_at": "2024-01-02T03:04:05Z", "track": track("t1", ["a1"])},
+                    {"added_at": "2024-01-02T03:04:05Z", "track": {"id": None}},
+                    {"added_at": "2024-01-02T03:04:05Z", "track": None},
+                ]
+            }
+        }
+
+        rows = SpotifyRows(CREATED_AT).add_all(data)
+
+        self.assertEqual(
+            [("p1", "t1", datetime(2024, 1, 2, 3, 4, 5), CREATED_AT)],
+            rows[PLAYLIST_TRACKS_TABLE],
+        )
+        self.assertEqual(1, len(rows[TRACKS_TABLE]))
+
+    def test_content_hash_ignores_created_at_but_not_content(self):
+        first = SpotifyRows(CREATED_AT)
+        first.add_artists([artist("a1", popularity=1)])
+        later = SpotifyRows(datetime(2024, 2, 1))
+        later.add_artists([artist("a1", popularity=1), artist("a1", popularity=2)])
+
+        same, changed = later[ARTISTS_TABLE]
+        self.assertEqual(first[ARTISTS_TABLE][0][-1], same[-1])
+        self.assertNotEqual(same[-1], changed[-1])
+
+    def test_models_are_only_built_in_strict_mode(self):
+        # a simplified artist, fine for the table but not a full SpotifyArtist
+        artists = [artist("a1")]
+
+        SpotifyRows(CREATED_AT).add_artists(artists)
+        with self.assertRaises(ValidationError):
+            SpotifyRows(CREATED_AT, strict=True).add_artists(artists)
+
+
+if __name__ == "__main__":
+    unittest.main()
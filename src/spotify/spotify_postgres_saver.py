@@ -1,9 +1,7 @@
 import asyncio
-import json
 import logging
 import os
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 
 import asyncpg
 import sys
@@ -19,14 +17,31 @@ from spotify.spotify_utils import (
     unzip_data_from_zip,
     get_data_location,
 )
-from src.spotify.spotify_get_data import AsyncSpotifyDataGetter
-from src.spotify.spotify_models import (
-    SpotifyArtist,
-    SpotifyAlbum,
-    SpotifyTrack,
-    SpotifyPlaylist,
-    SpotifyImage,
+from spotify.spotify_postgres_rows import (
+    SpotifyRows,
+    ARTISTS_TABLE,
+    EMBEDDED_ARTISTS,
+    ALBUMS_TABLE,
+    ALBUM_ARTISTS_TABLE,
+    TRACKS_TABLE,
+    TRACK_ARTISTS_TABLE,
+    PLAYLISTS_TABLE,
+    PLAYLIST_TRACKS_TABLE,
+    ARTIST_COLUMNS,
+    ALBUM_COLUMNS,
+    ALBUM_ARTIST_COLUMNS,
+    TRACK_COLUMNS,
+    TRACK_ARTIST_COLUMNS,
+    PLAYLIST_COLUMNS,
+    PLAYLIST_TRACK_COLUMNS,
 )
+from spotify.spotify_postgres_ingest import PostgresIngestor, find_snapshot_zips
+from postgres.postgres_driver import close_shared_pools, get_shared_pool
+from spotify.spotify_postgres_migrations import apply_migrations
+from spotify.spotify_postgres_stats import refresh_stats_views
+from utils.metrics import dump_metrics, record_ingest
+from utils.tracing import span, traced
+from src.spotify.spotify_get_data import AsyncSpotifyDataGetter
 
 # Set up logging
 logging.basicConfig(
@@ -38,24 +53,83 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def to_jsonb(value: Any) -> str:
-    """Convert a Python value to a JSON string for PostgreSQL JSONB."""
-    return json.dumps(value)
+class MergeStep(NamedTuple):
+    """Stage one kind of row and merge it into its ``spot_*`` table."""
+
+    source: str
+    table: str
+    columns: Tuple[str, ...]
+    key_columns: Tuple[str, ...]
+    # update existing rows whose content_hash differs, instead of skipping them
+    update: bool = False
+
+
+# Staging table column numbering the rows in the order they were copied
+STAGING_ORDINAL = "staging_ordinal"
+
+# Parents before the rows referencing them; full artists before the embedded
+# copies so the richer row is the one that gets inserted.
+BULK_MERGE_STEPS = [
+    MergeStep(ARTISTS_TABLE, ARTISTS_TABLE, ARTIST_COLUMNS, ("id",), update=True),
+    MergeStep(EMBEDDED_ARTISTS, ARTISTS_TABLE, ARTIST_COLUMNS, ("id",)),
+    MergeStep(ALBUMS_TABLE, ALBUMS_TABLE, ALBUM_COLUMNS, ("id",), update=True),
+    MergeStep(
+        ALBUM_ARTISTS_TABLE, ALBUM_ARTISTS_TABLE, ALBUM_ARTIST_COLUMNS,
+        ALBUM_ARTIST_COLUMNS,
+    ),
+    MergeStep(TRACKS_TABLE, TRACKS_TABLE, TRACK_COLUMNS, ("id",), update=True),
+    MergeStep(
+        TRACK_ARTISTS_TABLE, TRACK_ARTISTS_TABLE, TRACK_ARTIST_COLUMNS,
+        TRACK_ARTIST_COLUMNS,
+    ),
+    MergeStep(
+        PLAYLISTS_TABLE, PLAYLISTS_TABLE, PLAYLIST_COLUMNS, ("id",), update=True
+    ),
+    MergeStep(
+        PLAYLIST_TRACKS_TABLE, PLAYLIST_TRACKS_TABLE, PLAYLIST_TRACK_COLUMNS,
+        ("playlist_id", "track_id"),
+    ),
+]
+
+
+def merge_query(step: MergeStep, staging_table: str) -> str:
+    """INSERT merging ``staging_table`` into the step's table.
+
+    The same artist or track can appear many times in a snapshot, and DO
+    UPDATE may only touch each row once per statement, so only one staged row
+    per key is merged: the first one staged, as ``SpotifyRows`` keeps the
+    first occurrence of the tracks and artists it deduplicates itself.
+    """
+    columns = ", ".join(step.columns)
+    key_columns = ", ".join(step.key_columns)
+    return f"""
+        INSERT INTO {step.table} ({columns})
+        SELECT DISTINCT ON ({key_columns}) {columns} FROM {staging_table}
+        ORDER BY {key_columns}, {STAGING_ORDINAL}
+        {merge_conflict_clause(step)}
+    """
 
 
-def get_largest_image(images: List[SpotifyImage]) -> Optional[SpotifyImage]:
-    """Get the largest image from a list of SpotifyImage instances based on height."""
-    if not images:
-        logger.debug("No images provided")
-        return None
+def merge_conflict_clause(step: MergeStep) -> str:
+    """ON CONFLICT clause for a merge step.
 
-    try:
-        largest = max(images, key=lambda img: img.height)
-        logger.debug(f"Largest image found: {largest}")
-        return largest.url
-    except Exception as e:
-        logger.error(f"Error finding largest image: {e}", exc_info=True)
-        return None
+    Updating steps rewrite a row only when its content hash changed, so daily
+    loads of an unchanged library write (and vacuum) nothing. ``created_at``
+    keeps its original value and ``updated_at`` records the change.
+    """
+    key_columns = ", ".join(step.key_columns)
+    if not step.update:
+        return f"ON CONFLICT ({key_columns}) DO NOTHING"
+
+    assignments = ", ".join(
+        f"{column} = EXCLUDED.{column}"
+        for column in step.columns
+        if column not in step.key_columns and column != "created_at"
+    )
+    return (
+        f"ON CONFLICT ({key_columns}) DO UPDATE SET {assignments}, updated_at = now() "
+        f"WHERE {step.table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+    )
 
 
 class SpotifyPostgresSaver:
@@ -69,6 +143,7 @@ class SpotifyPostgresSaver:
         db_user: str = "postgres",
         db_password: str = "postgres",
         schema: str = "public",
+        strict: bool = False,
     ):
         """Initialize the PostgreSQL saver.
 
@@ -79,6 +154,7 @@ class SpotifyPostgresSaver:
             db_user: Database user
             db_password: Database password
             schema: Database schema
+            strict: Validate every entity with the Pydantic models before saving
         """
         self.db_host = db_host
         self.db_port = db_port
@@ -86,6 +162,7 @@ class SpotifyPostgresSaver:
         self.db_user = db_user
         self.db_password = db_password
         self.schema = schema
+        self.strict = strict
         self.pool = None
 
     async def connect(self):
@@ -100,14 +177,16 @@ class SpotifyPostgresSaver:
                 f"Connection parameters: host={self.db_host}, port={self.db_port}, database={self.db_name}, user={self.db_user}"
             )
 
-            # Create connection pool
-            logger.debug("Creating connection pool...")
-            self.pool = await asyncpg.create_pool(
+            # Shared with the other Postgres components in this process
+            logger.debug("Getting connection pool...")
+            self.pool = await get_shared_pool(
                 host=self.db_host,
                 port=self.db_port,
                 database=self.db_name,
                 user=self.db_user,
                 password=self.db_password,
+                # every pooled connection, not just the first, uses the schema
+                server_settings={"search_path": self.schema},
             )
 
             if not self.pool:
@@ -148,9 +227,9 @@ class SpotifyPostgresSaver:
             raise
 
     async def disconnect(self):
-        """Disconnect from the PostgreSQL database."""
+        """Release the shared pool, which stays open for the rest of the process."""
         if self.pool:
-            await self.pool.close()
+            self.pool = None
             logger.info("Disconnected from PostgreSQL database")
 
     async def _create_tables(self):
@@ -165,7 +244,10 @@ class SpotifyPostgresSaver:
         async with self.pool.acquire() as conn:
             await conn.execute(create_tables_sql)
             logger.info("Created or verified all necessary tables")
+            applied = await apply_migrations(conn)
+            logger.info(f"Applied schema migrations: {applied}")
 
+    @traced(count="artists")
     async def save_artists(self, artists: List[Dict[str, Any]]):
         """Save artists to the database.
 
@@ -178,44 +260,15 @@ class SpotifyPostgresSaver:
 
         logger.info(f"Saving {len(artists)} artists to database")
 
-        # Convert to Pydantic models
-        artist_models = [SpotifyArtist(**artist) for artist in artists]
-
-        async with self.pool.acquire() as conn:
-            # Use a transaction to ensure all artists are saved or none
-            async with conn.transaction():
-                for artist in artist_models:
-                    # Check if artist already exists
-                    existing = await conn.fetchval(
-                        "SELECT id FROM spot_artists WHERE id = $1", artist.id
-                    )
-
-                    if not existing:
-                        # Insert artist
-                        await conn.execute(
-                            """
-                            INSERT INTO spot_artists (
-                                id, name, uri, href, external_urls, image, genres, 
-                                popularity, followers, spotify_url, created_at
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                        """,
-                            artist.id,
-                            artist.name,
-                            artist.uri,
-                            artist.href,
-                            to_jsonb(artist.external_urls),
-                            get_largest_image(artist.images),
-                            to_jsonb(artist.genres),
-                            artist.popularity,
-                            artist.followers.total,
-                            artist.spotify_url,
-                            artist.created_at,
-                        )
+        rows = SpotifyRows(strict=self.strict)
+        rows.add_artists(artists)
+        await self.save_rows(rows)
 
         logger.info(f"Saved {len(artists)} artists to database")
 
+    @traced(count="albums")
     async def save_albums(self, albums: List[Dict[str, Any]]):
-        """Save albums to the database.
+        """Save albums, their artists and album-artist links to the database.
 
         Args:
             albums: List of album dictionaries
@@ -226,86 +279,15 @@ class SpotifyPostgresSaver:
 
         logger.info(f"Saving {len(albums)} albums to database")
 
-        # Convert to Pydantic models
-        album_models = [SpotifyAlbum(**album["album"]) for album in albums]
-
-        async with self.pool.acquire() as conn:
-            # Use a transaction to ensure all albums are saved or none
-            async with conn.transaction():
-                for album in album_models:
-                    # Check if album already exists
-                    existing = await conn.fetchval(
-                        "SELECT id FROM spot_albums WHERE id = $1", album.id
-                    )
-
-                    if not existing:
-                        # Insert album
-                        await conn.execute(
-                            """
-                            INSERT INTO spot_albums (
-                                id, name, uri, href, external_urls, image, 
-                                release_date, release_date_precision, total_tracks, 
-                                album_type, available_markets, spotify_url, created_at
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                        """,
-                            album.id,
-                            album.name,
-                            album.uri,
-                            album.href,
-                            to_jsonb(album.external_urls),
-                            get_largest_image(album.images),
-                            album.release_date,
-                            album.release_date_precision,
-                            album.total_tracks,
-                            album.album_type,
-                            to_jsonb(album.available_markets),
-                            album.spotify_url,
-                            album.created_at,
-                        )
-
-                        # Insert album-artist relationships
-                        for artist in album.artists:
-                            # Check if artist exists, if not, insert it
-                            artist_exists = await conn.fetchval(
-                                "SELECT id FROM spot_artists WHERE id = $1", artist.id
-                            )
-
-                            if not artist_exists:
-                                await conn.execute(
-                                    """
-                                    INSERT INTO spot_artists (
-                                        id, name, uri, href, external_urls, image, 
-                                        genres, popularity, followers, spotify_url, created_at
-                                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                                """,
-                                    artist.id,
-                                    artist.name,
-                                    artist.uri,
-                                    artist.href,
-                                    to_jsonb(artist.external_urls),
-                                    get_largest_image(artist.images),
-                                    to_jsonb(artist.genres),
-                                    artist.popularity,
-                                    artist.followers.total,
-                                    artist.spotify_url,
-                                    artist.created_at,
-                                )
-
-                            # Insert album-artist relationship
-                            await conn.execute(
-                                """
-                                INSERT INTO spot_album_artists (album_id, artist_id)
-                                VALUES ($1, $2)
-                                ON CONFLICT (album_id, artist_id) DO NOTHING
-                            """,
-                                album.id,
-                                artist.id,
-                            )
+        rows = SpotifyRows(strict=self.strict)
+        rows.add_albums(albums)
+        await self.save_rows(rows)
 
         logger.info(f"Saved {len(albums)} albums to database")
 
+    @traced(count="tracks")
     async def save_tracks(self, tracks: List[Dict[str, Any]]):
-        """Save tracks to the database.
+        """Save tracks, their artists and track-artist links to the database.
 
         Args:
             tracks: List of track dictionaries
@@ -316,82 +298,13 @@ class SpotifyPostgresSaver:
 
         logger.info(f"Saving {len(tracks)} tracks to database")
 
-        # Convert to Pydantic models
-        track_models = [SpotifyTrack(**track["track"]) for track in tracks]
-
-        async with self.pool.acquire() as conn:
-            # Use a transaction to ensure all tracks are saved or none
-            async with conn.transaction():
-                for track in track_models:
-                    # Check if track already exists
-                    existing = await conn.fetchval(
-                        "SELECT id FROM spot_tracks WHERE id = $1", track.id
-                    )
-
-                    if not existing:
-                        # Insert track
-                        await conn.execute(
-                            """
-                            INSERT INTO spot_tracks (
-                                id, name, uri, href, external_urls, duration_ms, 
-                                preview_url, album_id, isrc, 
-                                spotify_url, created_at
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                        """,
-                            track.id,
-                            track.name,
-                            track.uri,
-                            track.href,
-                            to_jsonb(track.external_urls),
-                            track.duration_ms,
-                            track.preview_url,
-                            track.album.id,
-                            track.external_ids.isrc,
-                            track.spotify_url,
-                            track.created_at,
-                        )
-
-                        # Insert track-artist relationships
-                        for artist in track.artists:
-                            # Check if artist exists, if not, insert it
-                            artist_exists = await conn.fetchval(
-                                "SELECT id FROM spot_artists WHERE id = $1", artist.id
-                            )
-
-                            if not artist_exists:
-                                await conn.execute(
-                                    """
-                                    INSERT INTO spot_artists (
-                                        id, name, uri, href, external_urls, image, 
-                                        genres, popularity, followers, spotify_url, created_at
-                                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                                """,
-                                    artist.id,
-                                    artist.name,
-                                    artist.uri,
-                                    artist.href,
-                                    to_jsonb(artist.external_urls),
-                                    get_largest_image(artist.images),
-                                    to_jsonb(artist.genres),
-                                    artist.popularity,
-                                    artist.followers.total,
-                                    artist.spotify_url,
-                                    artist.created_at,
-                                )
-
-                            # Insert track-artist relationship
-                            await conn.execute(
-                                """
-                                INSERT INTO spot_track_artists (track_id, artist_id)
-                                VALUES ($1, $2)
-                                ON CONFLICT (track_id, artist_id) DO NOTHING
-                            """,
-                                track.id,
-                                artist.id,
-                            )
+        rows = SpotifyRows(strict=self.strict)
+        rows.add_tracks(tracks)
+        await self.save_rows(rows)
 
         logger.info(f"Saved {len(tracks)} tracks to database")
 
+    @traced(count="playlists")
     async def save_playlists(self, playlists: List[Dict[str, Any]]):
         """Save playlists to the database.
 
@@ -404,43 +317,13 @@ class SpotifyPostgresSaver:
 
         logger.info(f"Saving {len(playlists)} playlists to database")
 
-        # Convert to Pydantic models
-        playlist_models = [SpotifyPlaylist(**playlist) for playlist in playlists]
-
-        async with self.pool.acquire() as conn:
-            # Use a transaction to ensure all playlists are saved or none
-            async with conn.transaction():
-                for playlist in playlist_models:
-                    # Check if playlist already exists
-                    existing = await conn.fetchval(
-                        "SELECT id FROM spot_playlists WHERE id = $1", playlist.id
-                    )
-
-                    if not existing:
-                        # Insert playlist
-                        await conn.execute(
-                            """
-                            INSERT INTO spot_playlists (
-                                id, name, uri, href, external_urls, description, 
-                                owner, public, tracks_count, spotify_url, created_at
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                        """,
-                            playlist.id,
-                            playlist.name,
-                            playlist.uri,
-                            playlist.href,
-                            to_jsonb(playlist.external_urls),
-                            playlist.description,
-                            # get_largest_image(playlist.images),
-                            playlist.owner.display_name,
-                            playlist.public,
-                            playlist.tracks.total,
-                            playlist.spotify_url,
-                            playlist.created_at,
-                        )
+        rows = SpotifyRows(strict=self.strict)
+        rows.add_playlists(playlists)
+        await self.save_rows(rows)
 
         logger.info(f"Saved {len(playlists)} playlists to database")
 
+    @traced(count="playlist_tracks")
     async def save_playlist_tracks(
         self, playlist_tracks: Dict[str, List[Dict[str, Any]]]
     ):
@@ -455,110 +338,116 @@ class SpotifyPostgresSaver:
 
         logger.info(f"Saving tracks for {len(playlist_tracks)} playlists to database")
 
+        rows = SpotifyRows(strict=self.strict)
+        rows.add_playlist_tracks(playlist_tracks)
+        await self.save_rows(rows)
+
+        logger.info(f"Saved tracks for {len(playlist_tracks)} playlists to database")
+
+    @traced()
+    async def save_rows(self, rows: SpotifyRows):
+        """Upsert normalized rows with one batched ``executemany`` per table.
+
+        Entities are only rewritten when their content hash changed, see
+        ``merge_conflict_clause``.
+        """
         async with self.pool.acquire() as conn:
-            # Use a transaction to ensure all playlist tracks are saved or none
+            # Use a transaction to ensure all rows are saved or none
             async with conn.transaction():
-                for playlist_id, tracks in playlist_tracks.items():
-                    for track in tracks:
-                        # Check if track exists in the database
-                        track_exists = await conn.fetchval(
-                            "SELECT id FROM spot_tracks WHERE id = $1",
-                            track["track"]["id"],
+                for step in BULK_MERGE_STEPS:
+                    records = rows[step.source]
+                    if not records:
+                        continue
+                    placeholders = ", ".join(
+                        f"${i}" for i in range(1, len(step.columns) + 1)
+                    )
+                    with record_ingest(step.table, len(records)), span(
+                        "postgres.upsert", table=step.table, rows=len(records)
+                    ):
+                        await conn.executemany(
+                            f"""
+                            INSERT INTO {step.table} ({", ".join(step.columns)})
+                            VALUES ({placeholders})
+                            {merge_conflict_clause(step)}
+                        """,
+                            records,
                         )
+                    logger.debug(f"Upserted {len(records)} {step.source} rows")
 
-                        if not track_exists:
-                            # Insert track
-                            await conn.execute(
-                                """
-                                INSERT INTO spot_tracks (
-                                id, name, uri, href, external_urls, duration_ms, 
-                                preview_url, album_id, isrc, 
-                                spotify_url, created_at
-                                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                            """,
-                                track["track"]["id"],
-                                track["track"]["name"],
-                                track["track"]["uri"],
-                                track["track"]["href"],
-                                to_jsonb(track["track"]["external_urls"]),
-                                track["track"]["duration_ms"],
-                                track["track"].get("preview_url"),
-                                track["track"]["album"]["id"],
-                                track["track"].get("external_ids", {}).get("isrc"),
-                                track["track"].get("external_urls", {}).get("spotify"),
-                                datetime.now(),
-                            )
-
-                            # Insert track-artist relationships
-                            for artist in track["track"]["artists"]:
-                                # Check if artist exists, if not, insert it
-                                artist_exists = await conn.fetchval(
-                                    "SELECT id FROM spot_artists WHERE id = $1",
-                                    artist["id"],
-                                )
-
-                                if not artist_exists:
-                                    if "followers" in artist:
-                                        followers_total = artist.get("followers").get("total",0)
-                                    else:
-                                        followers_total = 0
-                                    await conn.execute(
-                                        """
-                                        INSERT INTO spot_artists (
-                                            id, name, uri, href, external_urls, image, 
-                                            genres, popularity, followers, spotify_url, created_at
-                                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                                    """,
-                                        artist["id"],
-                                        artist["name"],
-                                        artist["uri"],
-                                        artist["href"],
-                                        to_jsonb(artist["external_urls"]),
-                                        get_largest_image(artist.get("images", [])),
-                                        to_jsonb(artist.get("genres")),
-                                        artist.get("popularity"),
-                                        followers_total,
-                                        artist.get("external_urls", {}).get("spotify"),
-                                        datetime.now(),
-                                    )
-
-                                # Insert track-artist relationship
-                                await conn.execute(
-                                    """
-                                    INSERT INTO spot_track_artists (track_id, artist_id)
-                                    VALUES ($1, $2)
-                                    ON CONFLICT (track_id, artist_id) DO NOTHING
-                                """,
-                                    track["track"]["id"],
-                                    artist["id"],
-                                )
-
-                        # Insert playlist-track relationship
-                        added_at = datetime.fromisoformat(
-                            track["added_at"].replace("Z", ".000")
-                        )
+    @traced()
+    async def bulk_save_all_data(self, data: Dict[str, Any]):
+        """Save all Spotify data using COPY into staging tables.
 
-                        created_at = datetime.now()
-                        logger.debug(f"added_at: {added_at}, created_at: {created_at}")
-                        await conn.execute(
-                            """
-                            INSERT INTO spot_playlist_tracks (playlist_id, track_id, added_at, created_at)
-                            VALUES ($1, $2, $3, $4)
-                            ON CONFLICT (playlist_id, track_id) DO NOTHING
-                        """,
-                            playlist_id,
-                            track["track"]["id"],
-                            added_at,
-                            created_at,
-                        )
+        Rows for every table are streamed into temporary staging tables with
+        ``copy_records_to_table`` and merged into the ``spot_*`` tables with one
+        set-based ``INSERT ... ON CONFLICT`` per table, all in one transaction.
+        As in the row-by-row methods, only changed entities are updated.
 
-        logger.info(f"Saved tracks for {len(playlist_tracks)} playlists to database")
+        Args:
+            data: Dictionary containing all Spotify data
+        """
+        start_time = time.time()
+        rows = SpotifyRows(strict=self.strict).add_all(data)
+        logger.info(
+            f"Normalized rows in {time.time() - start_time:.2f} seconds: {rows.counts()}"
+        )
+        await self.bulk_save_rows(rows)
+        logger.info(f"Bulk saved all data in {time.time() - start_time:.2f} seconds")
+
+    @traced()
+    async def bulk_save_rows(self, rows: SpotifyRows):
+        """Copy and merge already normalized rows in one transaction."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                for step in BULK_MERGE_STEPS:
+                    await self._copy_and_merge(conn, step, rows[step.source])
 
-    async def save_all_data(self, data: Dict[str, Any]):
+    async def _copy_and_merge(self, conn, step: MergeStep, records: List[tuple]):
+        if not records:
+            logger.debug(f"No {step.source} rows to merge")
+            return
+
+        staging_table = f"staging_{step.source}"
+        with record_ingest(step.table, len(records)), span(
+            "postgres.copy_and_merge", table=step.table, rows=len(records)
+        ):
+            # the ordinal numbers the rows in the order they are copied
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging_table} "
+                f"(LIKE {step.table} INCLUDING DEFAULTS, {STAGING_ORDINAL} bigserial) "
+                "ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(
+                staging_table, records=records, columns=list(step.columns)
+            )
+            result = await conn.execute(merge_query(step, staging_table))
+        logger.info(f"Merged {len(records)} staged {step.source} rows: {result}")
+
+    @traced()
+    async def refresh_stats_views(self):
+        """Bring the stats materialized views up to date with the tables."""
+        await refresh_stats_views(self.pool)
+
+    def get_ingestor(self, max_workers: Optional[int] = None) -> PostgresIngestor:
+        """Ingestor loading tables concurrently over this saver's pool."""
+        return PostgresIngestor(
+            self.pool,
+            BULK_MERGE_STEPS,
+            self._copy_and_merge,
+            max_workers=max_workers,
+            strict=self.strict,
+        )
+
+    @traced()
+    async def save_all_data(
+        self, data: Dict[str, Any], bulk: bool = False, parallel: bool = False
+    ):
         """Save all Spotify data to the database.
 
         Args:
             data: Dictionary containing all Spotify data
+            bulk: Use the COPY based bulk loader instead of row-by-row inserts
+            parallel: Use the bulk loader with independent tables loaded concurrently
         """
         logger.info("Saving all Spotify data to database")
 
@@ -566,32 +455,39 @@ class SpotifyPostgresSaver:
         await self.connect()
 
         try:
-            # Save artists
-            if SAVED_ARTISTS in data:
-                await self.save_artists(data[SAVED_ARTISTS])
-
-            # Save albums
-            if SAVED_ALBUMS in data:
-                await self.save_albums(data[SAVED_ALBUMS])
-
-            # Save tracks
-            if SAVED_TRACKS in data:
-                await self.save_tracks(data[SAVED_TRACKS])
-
-            # Save playlists
-            if PLAYLISTS in data:
-                await self.save_playlists(data[PLAYLISTS])
-
-            # Save playlist tracks
-            if PLAYLIST_TRACKS in data:
-                await self.save_playlist_tracks(data[PLAYLIST_TRACKS])
-
+            if parallel:
+                await self.get_ingestor().ingest_data(data)
+            elif bulk:
+                await self.bulk_save_all_data(data)
+            else:
+                # Save artists
+                if SAVED_ARTISTS in data:
+                    await self.save_artists(data[SAVED_ARTISTS])
+
+                # Save albums
+                if SAVED_ALBUMS in data:
+                    await self.save_albums(data[SAVED_ALBUMS])
+
+                # Save tracks
+                if SAVED_TRACKS in data:
+                    await self.save_tracks(data[SAVED_TRACKS])
+
+                # Save playlists
+                if PLAYLISTS in data:
+                    await self.save_playlists(data[PLAYLISTS])
+
+                # Save playlist tracks
+                if PLAYLIST_TRACKS in data:
+                    await self.save_playlist_tracks(data[PLAYLIST_TRACKS])
+
+            await self.refresh_stats_views()
             logger.info("All Spotify data saved to database")
         finally:
             # Disconnect from the database
             await self.disconnect()
 
 
+@traced()
 async def save_spotify_data_to_postgres(
     db_host: str = "localhost",
     db_port: int = 5432,
@@ -601,6 +497,9 @@ async def save_spotify_data_to_postgres(
     schema: str = "public",
     zip_first: bool = True,
     use_zip_data: bool = False,
+    bulk: bool = False,
+    parallel: bool = False,
+    strict: bool = False,
 ) -> None:
     """
     Save Spotify data to PostgreSQL database.
@@ -614,6 +513,9 @@ async def save_spotify_data_to_postgres(
         schema: Database schema
         zip_first: Whether to zip data before saving to database
         use_zip_data: Whether to use the latest saved zip data instead of fetching from Spotify API
+        bulk: Whether to load zip data with the COPY based bulk loader
+        parallel: Whether to decode and load the zip data per data type concurrently
+        strict: Whether to validate entities with the Pydantic models before saving
     """
     logger.info("Initializing Spotify data export to PostgreSQL")
     start_time = time.time()
@@ -626,6 +528,7 @@ async def save_spotify_data_to_postgres(
         db_user=db_user,
         db_password=db_password,
         schema=schema,
+        strict=strict,
     )
     logger.debug("Database saver initialized")
 
@@ -639,6 +542,13 @@ async def save_spotify_data_to_postgres(
             # Load data from zip files
             logger.info("Loading data from zip files...")
             data_location = await get_data_location()
+
+            if parallel:
+                await db_saver.get_ingestor().ingest_zips(
+                    find_snapshot_zips(data_location)
+                )
+                await db_saver.refresh_stats_views()
+                return
             latest_zip = get_latest_zip(data_location)
             
             if not latest_zip:
@@ -647,7 +557,12 @@ async def save_spotify_data_to_postgres(
                 
             logger.info(f"Using zip file: {latest_zip}")
             all_data = unzip_data_from_zip(latest_zip)
-            
+
+            if bulk:
+                await db_saver.bulk_save_all_data(all_data)
+                await db_saver.refresh_stats_views()
+                return
+
             # Save artists
             if SAVED_ARTISTS in all_data:
                 logger.debug("Saving artists from zip data...")
@@ -742,6 +657,7 @@ async def save_spotify_data_to_postgres(
             #     await db_saver.save_playlist_tracks(playlist_id, tracks)
             #     logger.debug(f"Saved {len(tracks)} tracks for playlist {playlist_id}")
 
+        await db_saver.refresh_stats_views()
         end_time = time.time()
         logger.info(f"Data export completed in {end_time - start_time:.2f} seconds")
 
@@ -752,6 +668,7 @@ async def save_spotify_data_to_postgres(
         # Disconnect from database
         logger.info("Disconnecting from database...")
         await db_saver.disconnect()
+        await close_shared_pools()
         logger.info("Disconnected from database")
 
 
@@ -778,6 +695,21 @@ def main():
         action="store_true",
         help="Use the latest saved zip data instead of fetching from Spotify API",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load with COPY into staging tables and set-based merges",
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Bulk load with decoding in worker processes and tables loaded concurrently",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Validate every entity with the Pydantic models before saving",
+    )
 
     args = parser.parse_args()
 
@@ -804,6 +736,9 @@ def main():
                 schema=args.schema,
                 zip_first=False,
                 use_zip_data=True,
+                bulk=args.bulk,
+                parallel=args.parallel,
+                strict=args.strict,
             )
         )
     except RuntimeError as e:
@@ -820,6 +755,9 @@ def main():
             # Re-raise other RuntimeErrors
             raise
 
+    finally:
+        dump_metrics()
+
     end_time = time.time()
     print(f"\nAll data saved in {end_time - start_time:.2f} seconds")
 
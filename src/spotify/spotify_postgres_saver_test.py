@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from spotify.spotify_postgres_rows import (
+    ARTISTS_TABLE,
+    EMBEDDED_ARTISTS,
+    PLAYLIST_TRACKS_TABLE,
+    SpotifyRows,
+)
+from spotify.spotify_postgres_saver import (
+    BULK_MERGE_STEPS,
+    SpotifyPostgresSaver,
+    merge_conflict_clause,
+    merge_query,
+)
+
+
+def step_for(source):
+    return next(step for step in BULK_MERGE_STEPS if step.source == source)
+
+
+class MergeConflictClauseTest(unittest.TestCase):
+    def test_entities_update_only_changed_rows(self):
+        clause = merge_conflict_clause(step_for(ARTISTS_TABLE))
+
+        self.assertIn("DO UPDATE SET name = EXCLUDED.name", clause)
+        self.assertNotIn("created_at = EXCLUDED", clause)
+        self.assertIn("updated_at = now()", clause)
+        self.assertTrue(
+            clause.endswith(
+                "WHERE spot_artists.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+            )
+        )
+
+    def test_embedded_artists_never_overwrite(self):
+        self.assertEqual(
+            "ON CONFLICT (id) DO NOTHING",
+            merge_conflict_clause(step_for(EMBEDDED_ARTISTS)),
+        )
+
+    def test_first_staged_row_wins_each_key(self):
+        sql = merge_query(step_for(PLAYLIST_TRACKS_TABLE), "staging_tracks")
+
+        self.assertIn(
+            "SELECT DISTINCT ON (playlist_id, track_id) playlist_id, track_id, ", sql
+        )
+        self.assertIn(
+            "FROM staging_tracks\n        ORDER BY playlist_id, track_id, staging_ordinal",
+            sql,
+        )
+        self.assertTrue(sql.strip().endswith("ON CONFLICT (playlist_id, track_id) DO NOTHING"))
+
+
+class SaveRowsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_one_executemany_per_table_with_rows(self):
+        conn = MagicMock()
+        conn.executemany = AsyncMock()
+        conn.transaction.return_value.__aenter__ = AsyncMock()
+        conn.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+        saver = SpotifyPostgresSaver()
+        saver.pool = MagicMock()
+        saver.pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        saver.pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        rows = SpotifyRows()
+        rows.add_artists(
+            [
+                {"id": f"a{i}", "name": "n", "uri": "u", "href": "h"}
+                for i in range(500)
+            ]
+        )
+
+        await saver.save_rows(rows)
+
+        conn.executemany.assert_awaited_once()
+        sql, records = conn.executemany.await_args.args
+        self.assertIn("INSERT INTO spot_artists", sql)
+        self.assertEqual(500, len(records))
+
+
+if __name__ == "__main__":
+    unittest.main()
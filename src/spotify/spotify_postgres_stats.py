@@ -0,0 +1,51 @@
+"""Library stats kept in materialized views over the ``spot_*`` tables.
+
+The views are created by ``schema/migrations/006_stats_views.sql`` and
+refreshed concurrently after each ingestion, so reads never block on a
+refresh. Reading a stat is then a scan of a few hundred pre-aggregated rows
+rather than a pass over the whole library.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class StatsView(NamedTuple):
+    view: str
+    order_by: str
+
+
+TRACKS_PER_DECADE = "tracks_per_decade"
+TOP_GENRES = "top_genres"
+ALBUMS_PER_LABEL = "albums_per_label"
+TOP_ARTISTS = "top_artists"
+
+STATS_VIEWS: Dict[str, StatsView] = {
+    TRACKS_PER_DECADE: StatsView("spot_stats_tracks_per_decade", "decade"),
+    TOP_GENRES: StatsView("spot_stats_top_genres", "track_count DESC, genre"),
+    ALBUMS_PER_LABEL: StatsView("spot_stats_albums_per_label", "album_count DESC, label"),
+    TOP_ARTISTS: StatsView("spot_stats_artist_tracks", "track_count DESC, name"),
+}
+
+
+def stats_query(name: str) -> str:
+    """Query for one stat, ``$1`` being the number of rows to return."""
+    stats_view = STATS_VIEWS[name]
+    return f"SELECT * FROM {stats_view.view} ORDER BY {stats_view.order_by} LIMIT $1"
+
+
+async def refresh_stats_views(pool) -> None:
+    """Refresh every stats view concurrently, each on its own connection."""
+    start_time = time.time()
+
+    async def refresh(view: str) -> None:
+        async with pool.acquire() as conn:
+            await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+
+    await asyncio.gather(
+        *(refresh(stats_view.view) for stats_view in STATS_VIEWS.values())
+    )
+    logger.info(f"Refreshed stats views in {time.time() - start_time:.2f} seconds")
@@ -16,11 +16,15 @@ from spotipy import (
     MemoryCacheHandler,
 )
 
+from utils.metrics import PROCESS_RSS, SNAPSHOT_LOAD_SECONDS, SNAPSHOT_WRITE_SECONDS
+from utils.tracing import span
+
 UNIQUE_PLAYLIST_ARTISTS = "unique_playlist_artists"
 UNIQUE_PLAYLIST_TRACKS = "unique_playlist_tracks"
 PLAYLIST_TRACKS = "playlist_trm_tacks"
 OTHER_PLAYLIST_TRACKS = "other_playlist_tracks"
 PLAYLISTS = "playlists"
+PLAYLIST_REGISTRY = "playlist_registry"
 OTHER_PLAYLISTS = "other_playlists"
 SAVED_TRACKS = "saved_tracks"
 SAVED_ARTISTS = "saved_artists"
@@ -106,12 +110,20 @@ def zip_data(data, data_type, data_location):
     save_dir = f"{data_location}"
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
-    json_string = json.dumps(data, ensure_ascii=False, indent=4)
-    logger.debug(f"Data size before compression: {len(json_string)} bytes")
-    get_memory_usage()
-    zip_filename = f"{data_location}/{data_type}.gz"
-    with gzip.open(zip_filename, "wb", compresslevel=5) as handle:
-        handle.write(json_string.encode('utf-8'))
+    with SNAPSHOT_WRITE_SECONDS.time(data_type=data_type), span(
+        "snapshot.write", data_type=data_type, items=len(data)
+    ) as write_span:
+        with span("snapshot.encode"):
+            encoded = json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+        logger.debug(f"Data size before compression: {len(encoded)} bytes")
+        get_memory_usage()
+        zip_filename = f"{data_location}/{data_type}.gz"
+        with span("snapshot.compress"), gzip.open(
+            zip_filename, "wb", compresslevel=5
+        ) as handle:
+            handle.write(encoded)
+        write_span.set_attribute("bytes", len(encoded))
+        write_span.set_attribute("compressed_bytes", os.path.getsize(zip_filename))
     logger.debug(f"Data compressed to {zip_filename}")
 
 
@@ -130,10 +142,19 @@ def unzip_data(data_location):
 def unzip_data_from_zip(zip_filename):
     logger.debug(f"Unzipping data from {zip_filename}")
     get_memory_usage()
-    with open(zip_filename, "rb") as handle:
+    data_type = os.path.basename(zip_filename).removesuffix(".gz")
+    with SNAPSHOT_LOAD_SECONDS.time(data_type=data_type), span(
+        "snapshot.load", data_type=data_type
+    ) as load_span, open(zip_filename, "rb") as handle:
         get_memory_usage()
-        read = gzip.decompress(handle.read()).decode('utf-8')
-        data = json.loads(read)
+        compressed = handle.read()
+        with span("snapshot.decompress"):
+            read = gzip.decompress(compressed).decode('utf-8')
+        with span("snapshot.decode"):
+            data = json.loads(read)
+        load_span.set_attribute("compressed_bytes", len(compressed))
+        load_span.set_attribute("bytes", len(read))
+        load_span.set_attribute("items", len(data))
         logger.debug(f"Decompressed data size: {len(data)}")
         get_memory_usage()
         logger.debug(f"Data loaded from {zip_filename}")
@@ -199,6 +220,7 @@ def get_memory_usage():
     # Get the memory usage in bytes
     process = psutil.Process(os.getpid())
     memory_usage = process.memory_info().rss
+    PROCESS_RSS.set(memory_usage)
     # Convert to megabytes
     memory_usage_mb = memory_usage / (1024**2)
     # Log the memory usage
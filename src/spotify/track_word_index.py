@@ -0,0 +1,84 @@
+import logging
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Longest suffixes first so "ing" wins over "s" etc.
+STEM_SUFFIXES = ("ing", "ed", "s")
+MIN_STEM_LENGTH = 3
+
+
+def fold_accents(word: str) -> str:
+    """Strip combining marks, e.g. "rosé" -> "rose"."""
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """Very light suffix stripping, enough to match "blues" with "blue"."""
+    for suffix in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[: -len(suffix)]
+    return word
+
+
+class TrackWordIndex:
+    """Inverted index of normalized track name words to positions in the
+    track list.
+
+    With the default options a word matches exactly when
+    ``SpotifyPlaylistMaker.filter_tracks_by_search_term_any`` would match it,
+    i.e. the lower-cased term equals one of the whitespace separated words of
+    the lower-cased track name. Tracks are indexed by position, not id, so
+    tracks without an id and repeated tracks are matched like any other.
+    """
+
+    def __init__(
+        self, tracks: Iterable[dict], fold_accents: bool = False, use_stemming: bool = False
+    ) -> None:
+        self.fold_accents = fold_accents
+        self.use_stemming = use_stemming
+        self.tracks: List[dict] = list(tracks)
+        self.words: Dict[str, FrozenSet[int]] = {}
+        self._build()
+
+    def _build(self) -> None:
+        words: Dict[str, Set[int]] = {}
+        for position, track in enumerate(self.tracks):
+            for word in track["name"].lower().split():
+                words.setdefault(self.normalize(word), set()).add(position)
+        # frozen, so the sets handed out by lookup can't change the index
+        self.words = {word: frozenset(positions) for word, positions in words.items()}
+        logger.debug(
+            f"Indexed {len(self.tracks)} tracks with {len(self.words)} distinct words"
+        )
+
+    def normalize(self, word: str) -> str:
+        word = word.lower()
+        if self.fold_accents:
+            word = fold_accents(word)
+        if self.use_stemming:
+            word = stem(word)
+        return word
+
+    def lookup(self, search_term: str) -> FrozenSet[int]:
+        """Positions of the tracks whose name contains the given word."""
+        return self.words.get(self.normalize(search_term), frozenset())
+
+    def lookup_terms(self, search_terms: Iterable[str]) -> Dict[str, FrozenSet[int]]:
+        """Resolve a whole term list in one pass, returning the hits per term."""
+        return {search_term: self.lookup(search_term) for search_term in search_terms}
+
+    def lookup_any(self, search_terms: Iterable[str]) -> Set[int]:
+        """Positions of the tracks whose name contains at least one of the given words."""
+        hits: Set[int] = set()
+        for positions in self.lookup_terms(search_terms).values():
+            hits |= positions
+        return hits
+
+    def tracks_at(self, positions: Optional[Iterable[int]]) -> List[dict]:
+        """Tracks at the given positions, in the order they appear in the source list."""
+        if not positions:
+            return []
+        return [self.tracks[position] for position in sorted(positions)]
@@ -0,0 +1,76 @@
+import unittest
+
+from spotify.spotify_playlist_maker import SpotifyPlaylistMaker
+from spotify.track_word_index import TrackWordIndex, fold_accents, stem
+
+TRACKS = [
+    {"id": "1", "name": "Red Red Wine"},
+    {"id": "2", "name": "Blue Monday"},
+    {"id": "3", "name": "Kind of Blue"},
+    {"id": "4", "name": "Rosé Blues"},
+    {"id": "5", "name": "Redemption Song"},
+]
+
+
+class TrackWordIndexTest(unittest.TestCase):
+    def test_matches_whole_words_case_insensitively(self):
+        index = TrackWordIndex(TRACKS)
+
+        self.assertEqual({0}, index.lookup("RED"))
+        self.assertEqual({1, 2}, index.lookup("blue"))
+        self.assertEqual(set(), index.lookup("song of"))
+
+    def test_lookup_results_cannot_change_the_index(self):
+        index = TrackWordIndex(TRACKS)
+
+        with self.assertRaises(AttributeError):
+            index.lookup("red").add(1)
+        index.lookup_any(["red", "blue"])
+
+        self.assertEqual({0}, index.lookup("red"))
+
+    def test_resolves_term_list_per_term(self):
+        index = TrackWordIndex(TRACKS)
+
+        self.assertEqual(
+            {"red": {0}, "blue": {1, 2}, "green": set()},
+            index.lookup_terms(["red", "blue", "green"]),
+        )
+
+    def test_returns_tracks_in_source_order(self):
+        index = TrackWordIndex(TRACKS)
+
+        tracks = index.tracks_at(index.lookup_any(["blue", "red"]))
+
+        self.assertEqual(["1", "2", "3"], [track["id"] for track in tracks])
+
+    def test_tracks_without_or_with_repeated_ids_are_kept(self):
+        tracks = TRACKS + [
+            {"id": None, "name": "Red Light"},
+            {"id": "1", "name": "Red Red Wine"},
+        ]
+        index = TrackWordIndex(tracks)
+
+        self.assertEqual(
+            SpotifyPlaylistMaker.filter_tracks_by_search_term_any(tracks, ["red"]),
+            [track for track in tracks if "red" in track["name"].lower().split()],
+        )
+        self.assertEqual(
+            [tracks[0], tracks[5], tracks[6]], index.tracks_at(index.lookup("red"))
+        )
+
+    def test_optional_accent_folding_and_stemming(self):
+        index = TrackWordIndex(TRACKS, fold_accents=True, use_stemming=True)
+
+        self.assertEqual({3}, index.lookup("rose"))
+        self.assertEqual({1, 2, 3}, index.lookup("blue"))
+
+    def test_normalization_helpers(self):
+        self.assertEqual("creme brulee", fold_accents("crème brûlée"))
+        self.assertEqual("blue", stem("blues"))
+        self.assertEqual("sing", stem("singing"))
+        self.assertEqual("is", stem("is"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,36 @@
 import codecs
+import copy
 import csv
 import datetime
+import io
 import logging
 import os
 import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from configparser import ConfigParser
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
-
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+from spotify.spotify_enrich import (
+    ARTISTS_JOINED,
+    DURATION_MIN,
+    RELEASE_YEAR,
+    duration_in_min,
+    enrich_albums,
+    enrich_tracks,
+)
 from spotify.spotify_save import SpotifySave
 from spotify.spotify_utils import (
     setup_app_logging,
     most_recent_directory,
     unzip_data_from_zip, get_config_location,
 )
+from utils.metrics import dump_metrics
+from utils.tracing import traced
 
 XLSX = ".xlsx"
 
@@ -30,18 +46,116 @@ SPOTIFY_LIBRARY_ALBUM_TRACKS = (
 
 SPOTIFY_LIBRARY_TRACKS = "spotify_library_tracks_" + str(datetime.date.today()) + CSV
 
+# every sheet is written by its own process, so more workers than cores only adds overhead
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# where save_individual_playlists writes each playlist
+INDIVIDUAL_PLAYLISTS_DIRECTORY = "directory"
+INDIVIDUAL_PLAYLISTS_ZIP = "zip"
+INDIVIDUAL_PLAYLISTS_WORKBOOK = "workbook"
+INDIVIDUAL_PLAYLIST_OUTPUTS = (
+    INDIVIDUAL_PLAYLISTS_DIRECTORY,
+    INDIVIDUAL_PLAYLISTS_ZIP,
+    INDIVIDUAL_PLAYLISTS_WORKBOOK,
+)
+
+INDIVIDUAL_PLAYLIST_COLUMNS = [
+    "Artist",
+    "Track",
+    "Album",
+    "Spotify_URI",
+    "ID",
+    "Playlist",
+    "Release_Year",
+    "Release_Date",
+    "Release_Date_Precision",
+    "Track_Length_min",
+]
+
+MAX_SHEET_TITLE_LENGTH = 31
+
 logger = logging.getLogger(__name__)
 
 
+class SheetWriter:
+    """Writes rows to a CSV file and, in the same pass, to an XLSX file.
+
+    The workbook is write-only, so openpyxl streams rows to disk instead of
+    keeping a cell object for each of them, and the CSV never has to be read
+    back. The XLSX is saved when the context exits cleanly; leave either file
+    name out to write only the other format.
+    """
+
+    def __init__(
+        self, csv_file_name: Optional[str], excel_file_name: Optional[str] = None
+    ):
+        self.csv_file_name = csv_file_name
+        self.excel_file_name = excel_file_name
+        self.csv_file = None
+        self.csv_writer = None
+        self.workbook = None
+        self.worksheet = None
+
+    def __enter__(self) -> "SheetWriter":
+        if self.csv_file_name:
+            self.csv_file = open(
+                self.csv_file_name, "w", encoding="utf-8", newline="\n"
+            )
+            self.csv_writer = SpotifyToFile.get_csv_writer(self.csv_file)
+        if self.excel_file_name:
+            self.workbook = openpyxl.Workbook(write_only=True)
+            self.worksheet = self.workbook.create_sheet()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.csv_file is not None:
+            self.csv_file.close()
+            logger.debug(f"Wrote file: {self.csv_file_name}")
+        if self.workbook is not None:
+            # saving is also what finishes the streamed sheet's temporary file
+            self.workbook.save(self.excel_file_name)
+            if exc_type is None:
+                logger.debug(f"Wrote file: {self.excel_file_name}")
+            else:
+                os.remove(self.excel_file_name)
+
+    def write_header(self, header_columns: List[str]) -> None:
+        if self.csv_writer is not None:
+            # the BOM is only there so spreadsheet apps detect the CSV's encoding
+            self.csv_writer.writerow(
+                [SpotifyToFile.add_bom(header_columns[0])] + header_columns[1:]
+            )
+        if self.worksheet is not None:
+            self.worksheet.append(header_columns)
+
+    def write_row(self, row: list) -> None:
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(row)
+        if self.worksheet is not None:
+            self.worksheet.append(row)
+
+
 class SpotifyToFile(SpotifySave):
     user_id = ""
     save_location = ""
     playlist_location = ""
     individual_playlist_location = ""
-
-    def __init__(self, user_id: str = "") -> None:
+    max_workers = DEFAULT_MAX_WORKERS
+    formats: Tuple[str, ...] = (CSV, XLSX)
+    individual_playlist_output = INDIVIDUAL_PLAYLISTS_DIRECTORY
+
+    def __init__(
+        self,
+        user_id: str = "",
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        formats: Tuple[str, ...] = (CSV, XLSX),
+        individual_playlist_output: str = INDIVIDUAL_PLAYLISTS_DIRECTORY,
+    ) -> None:
         super().__init__()
         self.user_id = user_id
+        self.max_workers = max_workers
+        self.formats = formats
+        self.individual_playlist_output = individual_playlist_output
         self.config_location = get_config_location()
         self.config_parser = ConfigParser()
         self.config_parser.read(self.config_location)
@@ -78,58 +192,81 @@ class SpotifyToFile(SpotifySave):
                 + self.individual_playlist_location
             )
 
+    @traced(count="unique_tracks_in_playlists")
     def save_unique_tracks_in_playlists(self, unique_tracks_in_playlists: dict):
         csv_file_name = (
             "spotify_all_tracks_in_a_playlist_" + str(datetime.date.today()) + CSV
         )
         excel_file_name = csv_file_name.replace(CSV, XLSX)
         tracks = list(unique_tracks_in_playlists.values())
-        for track in tracks:
-            track["artists_joined"] = ", ".join(
-                [artist["name"] for artist in track["artists"]]
-            )
-            track["release_year"] = calc_release_year(
-                track["album"]["release_date"],
-                track["album"]["release_date_precision"],
-            )
-        tracks = sorted(tracks, key=lambda k: (k["artists_joined"], k["name"]))
-
-        with open(csv_file_name, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = [
-                "Artist",
-                "Track",
-                "Album",
-                "URI",
-                "ID",
-                "Playlist",
-                "ISRC",
-                "Release_Year",
-                "Release_Date",
-                "Release_Date_Precision",
-            ]
-            header_columns[0] = self.add_bom(header_columns[0])
+        enrich_tracks(tracks)
+        tracks = sorted(tracks, key=lambda k: (k[ARTISTS_JOINED], k["name"]))
 
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(csv_file_name, excel_file_name) as sheet_writer:
+            sheet_writer.write_header(
+                [
+                    "Artist",
+                    "Track",
+                    "Album",
+                    "URI",
+                    "ID",
+                    "Playlist",
+                    "ISRC",
+                    "Release_Year",
+                    "Release_Date",
+                    "Release_Date_Precision",
+                ]
+            )
             for track in tracks:
-                artist = ", ".join([artist["name"] for artist in track["artists"]])
-                csv_writer.writerow(
+                sheet_writer.write_row(
                     [
-                        artist,
+                        track[ARTISTS_JOINED],
                         track["name"],
                         track["album"]["name"],
                         track["uri"],
                         track["id"],
                         "",
                         self.get_external_id(track["external_ids"], "isrc"),
-                        track["release_year"],
+                        track[RELEASE_YEAR],
                         track["album"]["release_date"],
                         track["album"]["release_date_precision"],
                     ]
                 )
-            logger.debug(f"Wrote file: {csv_file_name}")
-            self.make_excel_file(csv_file_name, excel_file_name)
-            logger.debug(f"Wrote file: {excel_file_name}")
+
+    def output_path(self, file_name: str) -> str:
+        """Where a library sheet is written, without relying on the working
+        directory, so exports can run inside the API and in pool workers."""
+        return os.path.join(self.playlist_location, file_name)
+
+    def sheet_writer(self, csv_file_name: str, excel_file_name: str) -> SheetWriter:
+        """A writer for the file names in the formats this exporter writes."""
+        return SheetWriter(
+            self.output_path(csv_file_name) if CSV in self.formats else None,
+            self.output_path(excel_file_name) if XLSX in self.formats else None,
+        )
+
+    def with_formats(self, *formats: str) -> "SpotifyToFile":
+        spotify_to_file = copy.copy(self)
+        spotify_to_file.formats = formats
+        return spotify_to_file
+
+    def run_in_pool(self, calls: Iterable[tuple]) -> None:
+        """Run each ``(function, *args)`` call, in worker processes if allowed.
+
+        Calls must be picklable, and share nothing but the files they write.
+        The first call to fail re-raises its error here once the rest finish.
+        """
+        calls = list(calls)
+        if self.max_workers <= 1 or len(calls) <= 1:
+            for function, *args in calls:
+                function(*args)
+            return
+        max_workers = min(self.max_workers, len(calls))
+        logger.debug(f"Running {len(calls)} exports with {max_workers} workers")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, *args) for function, *args in calls]
+            for future in as_completed(futures):
+                future.result()
 
     @staticmethod
     def get_csv_writer(f):
@@ -145,6 +282,7 @@ class SpotifyToFile(SpotifySave):
     def add_bom(string):
         return (codecs.BOM_UTF8 + string.encode("utf-8")).decode("utf-8")
 
+    @traced(count="unique_artists_in_playlists")
     def save_unique_artists_in_playlists(self, unique_artists_in_playlists: dict):
 
         csv_all_artist_filename = (
@@ -152,62 +290,53 @@ class SpotifyToFile(SpotifySave):
         )
         excel_all_artist_filename = csv_all_artist_filename.replace(CSV, XLSX)
 
-        with open(csv_all_artist_filename, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = ["Name", "ID", "URI", "Href"]
-            header_columns[0] = self.add_bom(header_columns[0])
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(
+            csv_all_artist_filename, excel_all_artist_filename
+        ) as sheet_writer:
+            sheet_writer.write_header(["Name", "ID", "URI", "Href"])
 
             artists = unique_artists_in_playlists.values()
             for artist in artists:
-                csv_writer.writerow(
+                sheet_writer.write_row(
                     [artist["name"], artist["id"], artist["uri"], artist["href"]]
                 )
-            logger.debug("Wrote file: " + csv_all_artist_filename)
-
-        self.make_excel_file(csv_all_artist_filename, excel_all_artist_filename)
 
+    @traced(count="playlists")
     def save_playlist_tracks(self, playlists: list, playlist_tracks: dict):
         track_filename = "spotify_playlist_tracks_" + str(datetime.date.today()) + CSV
         excel_track_filename = track_filename.replace(CSV, XLSX)
 
-        with open(track_filename, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = [
-                "Artist",
-                "Track",
-                "Album",
-                "Release_Year",
-                "URI",
-                "ID",
-                "Playlist",
-                "ISRC",
-                "Release_Date",
-                "Release_Date_Precision",
-            ]
-            header_columns[0] = self.add_bom(header_columns[0])
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(track_filename, excel_track_filename) as sheet_writer:
+            sheet_writer.write_header(
+                [
+                    "Artist",
+                    "Track",
+                    "Album",
+                    "Release_Year",
+                    "URI",
+                    "ID",
+                    "Playlist",
+                    "ISRC",
+                    "Release_Date",
+                    "Release_Date_Precision",
+                ]
+            )
 
             for playlist in playlists:
                 playlist_name = playlist["name"]
                 logger.debug(playlist["name"])
                 tracks = playlist_tracks[playlist["id"]]
+                enrich_tracks(tracks)
                 for track in tracks:
                     track_1 = track
                     if track_1 is None:
                         continue
-                    artist = ", ".join(
-                        [artist["name"] for artist in track_1["artists"]]
-                    )
-                    csv_writer.writerow(
+                    sheet_writer.write_row(
                         [
-                            artist,
+                            track_1[ARTISTS_JOINED],
                             track_1["name"],
                             track_1["album"]["name"],
-                            calc_release_year(
-                                track_1["album"]["release_date"],
-                                track_1["album"]["release_date_precision"],
-                            ),
+                            track_1[RELEASE_YEAR],
                             track_1["uri"],
                             track_1["id"],
                             playlist_name,
@@ -216,30 +345,30 @@ class SpotifyToFile(SpotifySave):
                             track_1["album"]["release_date_precision"],
                         ]
                     )
-            logger.debug("Wrote file: " + track_filename)
-            self.make_excel_file(track_filename, excel_track_filename)
 
+    @traced(count="playlists")
     def save_playlist_details(self, playlists: list, playlist_tracks: dict):
         logger.debug("save_playlist_details_to_file")
         playlist_filename = "spotify_playlists_" + str(datetime.date.today()) + CSV
         excel_playlist_filename = playlist_filename.replace(CSV, XLSX)
 
-        with open(playlist_filename, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = [
-                "Playlist",
-                # "Number_of_Tracks",
-                "Owner",
-                "External_URL",
-                "ID",
-            ]
-            header_columns[0] = self.add_bom(header_columns[0])
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(
+            playlist_filename, excel_playlist_filename
+        ) as sheet_writer:
+            sheet_writer.write_header(
+                [
+                    "Playlist",
+                    # "Number_of_Tracks",
+                    "Owner",
+                    "External_URL",
+                    "ID",
+                ]
+            )
             for playlist in playlists:
                 playlist_name = playlist["name"]
                 logger.debug(playlist["name"])
                 # tracks: list = playlist_tracks.get(playlist["id"])
-                csv_writer.writerow(
+                sheet_writer.write_row(
                     [
                         playlist_name,
                         # len(tracks),
@@ -249,21 +378,12 @@ class SpotifyToFile(SpotifySave):
                     ]
                 )
 
-        logger.debug("Wrote file: " + playlist_filename)
-        self.make_excel_file(playlist_filename, excel_playlist_filename)
-
+    @traced(count="albums")
     def save_albums(self, albums: list):
-        for album in albums:
-            album["artists_joined"] = ", ".join(
-                [artist["name"] for artist in album["artists"]]
-            )
-            album["release_year"] = calc_release_year(
-                album["release_date"],
-                album["release_date_precision"],
-            )
+        enrich_albums(albums)
         albums = sorted(
             albums,
-            key=lambda k: (k["artists_joined"], k["release_year"]),
+            key=lambda k: (k[ARTISTS_JOINED], k[RELEASE_YEAR]),
             reverse=False,
         )
         csv_album_file_name = (
@@ -273,61 +393,55 @@ class SpotifyToFile(SpotifySave):
         csv_album_track_file_name = SPOTIFY_LIBRARY_ALBUM_TRACKS
         excel_album_track_file_name = csv_album_track_file_name.replace(CSV, XLSX)
 
-        with open(csv_album_file_name, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer_album = self.get_csv_writer(f)
-            with open(
-                csv_album_track_file_name, "w", encoding="utf-8", newline="\n"
-            ) as g:
-                csv_writer_album_track = self.get_csv_writer(g)
-                album_header_rows = [
-                    "Album",
-                    "Artist",
-                    "Release_Year",
-                    "Label",
-                    "Spotify_URI",
-                    "Release_Date",
-                    "Total_Tracks",
-                    "Cover",
-                    "Group",
-                    "Type",
-                    "ID",
-                    "Genres",
-                    "UPC",
-                    "mbid",
-                    "Artist_Album_(Year)",
-                    "Artist_Album_(Year)_{Label}",
-                ]
-                album_header_rows[0] = self.add_bom(album_header_rows[0])
-                csv_writer_album.writerow(album_header_rows)
-                album_track_header_rows = [
-                    "Album",
-                    "Artist",
-                    "Track",
-                    "Release_Year",
-                    "Track_Length_min",
-                    "Release_Date",
-                    "Release_Date_Precision",
-                    "ID",
-                    "Spotify_URI",
-                ]
-
-                album_track_header_rows[0] = self.add_bom(album_track_header_rows[0])
-                csv_writer_album_track.writerow(album_track_header_rows)
+        with self.sheet_writer(
+            csv_album_file_name, excel_album_file_name
+        ) as album_writer:
+            with self.sheet_writer(
+                csv_album_track_file_name, excel_album_track_file_name
+            ) as album_track_writer:
+                album_writer.write_header(
+                    [
+                        "Album",
+                        "Artist",
+                        "Release_Year",
+                        "Label",
+                        "Spotify_URI",
+                        "Release_Date",
+                        "Total_Tracks",
+                        "Cover",
+                        "Group",
+                        "Type",
+                        "ID",
+                        "Genres",
+                        "UPC",
+                        "mbid",
+                        "Artist_Album_(Year)",
+                        "Artist_Album_(Year)_{Label}",
+                    ]
+                )
+                album_track_writer.write_header(
+                    [
+                        "Album",
+                        "Artist",
+                        "Track",
+                        "Release_Year",
+                        "Track_Length_min",
+                        "Release_Date",
+                        "Release_Date_Precision",
+                        "ID",
+                        "Spotify_URI",
+                    ]
+                )
 
                 for album in albums:
                     album_tracks = album["tracks"]["items"]
                     external_ids = album["external_ids"]
                     upc = self.get_external_id(external_ids, "upc")
                     album_name = album["name"]
-                    artists = ", ".join(
-                        [artist["name"] for artist in album["artists"]]
-                    )
+                    artists = album[ARTISTS_JOINED]
                     # mbid = get_album_mbid(album_name, artists, upc)
                     mbid = ""
-                    release_year = calc_release_year(
-                        album["release_date"],
-                        album["release_date_precision"],
-                    )
+                    release_year = album[RELEASE_YEAR]
                     extra = f"{artists} - {album_name} ({release_year})"
                     extra2 = f"{artists} - {album_name} ({release_year}) {{{album['label']}}}"
                     # handle if album_group does not exist
@@ -341,11 +455,11 @@ class SpotifyToFile(SpotifySave):
                         image_url = images[0]["url"]
                     else:
                         image_url = ""
-                    csv_writer_album.writerow(
+                    album_writer.write_row(
                         [
                             album_name,
-                            album["artists_joined"],
-                            album["release_year"],
+                            artists,
+                            release_year,
                             album["label"],
                             album["uri"],
                             album["release_date"],
@@ -361,21 +475,18 @@ class SpotifyToFile(SpotifySave):
                             extra2,
                         ]
                     )
+                    # compilations span years, so their tracks get none
+                    track_release_year = (
+                        release_year if album_type != "compilation" else ""
+                    )
                     for track in album_tracks:
-                        duration_min = self.get_duration_in_min(track["duration_ms"])
-                        artist = ", ".join(
-                            [artist["name"] for artist in track["artists"]]
-                        )
-                        release_year = (
-                            release_year if album_type != "compilation" else ""
-                        )
-                        csv_writer_album_track.writerow(
+                        album_track_writer.write_row(
                             [
                                 album_name,
-                                artist,
+                                track[ARTISTS_JOINED],
                                 track["name"],
-                                release_year,
-                                duration_min,
+                                track_release_year,
+                                track[DURATION_MIN],
                                 "",
                                 "",
                                 "",
@@ -383,12 +494,6 @@ class SpotifyToFile(SpotifySave):
                                 track["uri"],
                             ]
                         )
-        logger.debug("Wrote file: " + csv_album_file_name)
-        logger.debug("Wrote file: " + csv_album_track_file_name)
-        self.make_excel_file(csv_album_file_name, excel_album_file_name)
-        self.make_excel_file(csv_album_track_file_name, excel_album_track_file_name)
-        logger.debug("Wrote file: " + excel_album_file_name)
-        logger.debug("Wrote file: " + excel_album_track_file_name)
 
     @staticmethod
     def get_external_id(external_ids, key):
@@ -398,74 +503,59 @@ class SpotifyToFile(SpotifySave):
             value = ""
         return value
 
+    @traced(count="tracks")
     def save_tracks(self, tracks: list):
         csv_file_name = SPOTIFY_LIBRARY_TRACKS
         excel_file_name = csv_file_name.replace(CSV, XLSX)
 
-        for track in tracks:
-            track["artists_joined"] = ", ".join(
-                [track["name"] for track in track["artists"]]
-            )
-            track["release_year"] = calc_release_year(
-                track["album"]["release_date"],
-                track["album"]["release_date_precision"],
-            )
-            track["duration_min"] = self.get_duration_in_min(
-                track["duration_ms"]
-            )
-
+        enrich_tracks(tracks)
         tracks = sorted(
             tracks,
-            key=lambda k: (k["artists_joined"], k["name"]),
+            key=lambda k: (k[ARTISTS_JOINED], k["name"]),
             reverse=False,
         )
 
-        with open(csv_file_name, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = [
-                "Artist",
-                "Track",
-                "Album",
-                "Release_Year",
-                "Track_Length_min",
-                "Release_Date",
-                "Release_Date_Precision",
-                "ID",
-                "Spotify_URI",
-                "ISRC",
-                "Artist_Track",
-            ]
-            header_columns[0] = self.add_bom(header_columns[0])
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(csv_file_name, excel_file_name) as sheet_writer:
+            sheet_writer.write_header(
+                [
+                    "Artist",
+                    "Track",
+                    "Album",
+                    "Release_Year",
+                    "Track_Length_min",
+                    "Release_Date",
+                    "Release_Date_Precision",
+                    "ID",
+                    "Spotify_URI",
+                    "ISRC",
+                    "Artist_Track",
+                ]
+            )
 
             for track in tracks:
                 # track = t["track"]
-                csv_writer.writerow(
+                sheet_writer.write_row(
                     [
-                        (track["artists_joined"]),
+                        track[ARTISTS_JOINED],
                         track["name"],
                         track["album"]["name"],
-                        track["release_year"],
-                        track["duration_min"],
+                        track[RELEASE_YEAR],
+                        track[DURATION_MIN],
                         track["album"]["release_date"],
                         track["album"]["release_date_precision"],
                         track["id"],
                         track["uri"],
                         self.get_external_id(track["external_ids"], "isrc"),
-                        f"{track['artists_joined']} - {track['name']}",
+                        f"{track[ARTISTS_JOINED]} - {track['name']}",
                     ]
                 )
 
-        logger.debug("Wrote file: " + csv_file_name)
-
-        self.make_excel_file(csv_file_name, excel_file_name)
-        logger.debug("Wrote file: " + excel_file_name)
-
     @staticmethod
     def make_excel_file(csv_file_name, excel_file_name):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        with open(csv_file_name) as f:
+        """Convert a CSV written earlier; the exporters write XLSX directly."""
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        with open(csv_file_name, encoding="utf-8-sig") as f:
             csv_reader = csv.reader(
                 f,
                 delimiter=",",
@@ -479,12 +569,9 @@ class SpotifyToFile(SpotifySave):
 
     @staticmethod
     def get_duration_in_min(duration_ms):
-        duration_sec: int = round((duration_ms / 1000), 0)
-        duration_min = str(datetime.timedelta(seconds=duration_sec))[3:]
-        if duration_min[0] == "0":
-            duration_min = duration_min[1:]
-        return duration_min
+        return duration_in_min(duration_ms)
 
+    @traced(count="artists")
     def save_artists(self, artists: list):
         file_name = "spotify_library_artists_" + str(datetime.date.today())
         csv_file_name = file_name + CSV
@@ -495,52 +582,63 @@ class SpotifyToFile(SpotifySave):
             reverse=False,
         )
 
-        with open(csv_file_name, "w", encoding="utf-8", newline="\n") as f:
-            csv_writer = self.get_csv_writer(f)
-            header_columns = [
-                "Artist",
-                "Spotify_URI",
-                "ID",
-                "Followers",
-                "Popularity",
-                "Genres",
-                "Artist_Image_URL",
-            ]
-            header_columns[0] = self.add_bom(header_columns[0])
-            csv_writer.writerow(header_columns)
+        with self.sheet_writer(csv_file_name, excel_file_name) as sheet_writer:
+            sheet_writer.write_header(
+                [
+                    "Artist",
+                    "Spotify_URI",
+                    "ID",
+                    "Followers",
+                    "Popularity",
+                    "Genres",
+                    "Artist_Image_URL",
+                ]
+            )
             for artist in artists:
                 artist_image_url = (
                     artist["images"][0]["url"] if len(artist["images"]) > 0 else ""
                 )
                 genres = ", ".join(genre for genre in artist["genres"])
-                csv_writer.writerow(
+                # the API sends {"href": ..., "total": ...}
+                followers = artist["followers"]
+                if isinstance(followers, dict):
+                    followers = followers.get("total")
+                sheet_writer.write_row(
                     [
                         artist["name"],
                         artist["uri"],
                         artist["id"],
-                        artist["followers"],
+                        followers,
                         artist["popularity"],
                         genres,
                         artist_image_url,
                     ]
                 )
-        logger.debug("Wrote file: " + csv_file_name)
-        self.make_excel_file(csv_file_name, excel_file_name)
-        logger.debug("Wrote file: " + excel_file_name)
 
+    @traced()
     def save_all_library_tracks(self):
-        wb = openpyxl.Workbook()
-        ws: Worksheet = wb.active
-        excel_file_name = SPOTIFY_LIBRARY_ALL_TRACKS
-        self.append_to_worksheet(ws, SPOTIFY_LIBRARY_TRACKS)
-        self.append_to_worksheet(ws, SPOTIFY_LIBRARY_ALBUM_TRACKS, skip_header=True)
-        ws.auto_filter()
+        wb = openpyxl.Workbook(write_only=True)
+        ws: WriteOnlyWorksheet = wb.create_sheet()
+        excel_file_name = self.output_path(SPOTIFY_LIBRARY_ALL_TRACKS)
+        row_count, column_count = self.append_to_worksheet(
+            ws, self.output_path(SPOTIFY_LIBRARY_TRACKS)
+        )
+        album_row_count, album_column_count = self.append_to_worksheet(
+            ws, self.output_path(SPOTIFY_LIBRARY_ALBUM_TRACKS), skip_header=True
+        )
+        row_count += album_row_count
+        column_count = max(column_count, album_column_count)
+        # a streamed sheet is written out on save, so set the filter range first
+        ws.auto_filter.ref = f"A1:{get_column_letter(column_count)}{row_count}"
 
         wb.save(excel_file_name)
 
     @staticmethod
-    def append_to_worksheet(ws, tracks, skip_header=False):
-        with open(tracks) as f:
+    def append_to_worksheet(ws, tracks, skip_header=False) -> Tuple[int, int]:
+        """Append a CSV's rows, returning how many rows and columns it had."""
+        row_count = 0
+        column_count = 0
+        with open(tracks, encoding="utf-8-sig") as f:
             csv_reader = csv.reader(
                 f,
                 delimiter=",",
@@ -554,71 +652,152 @@ class SpotifyToFile(SpotifySave):
                     skip_header = False
                     continue
                 ws.append(row)
-
-    def save_individual_playlists(self, playlists: list, playlist_tracks: dict):
-        os.chdir(self.individual_playlist_location)
-        for playlist in playlists:
-            playlist_name = playlist["name"]
-            logger.debug(f"Playlist name is {playlist_name}")
-            playlist_id = playlist["id"]
-
-            indiv_playlist_filename = (
-                self.sanitize_playlist_name(playlist_name)
-                + "_"
-                + playlist_id
-                + "_"
-                + str(datetime.date.today())
-                + CSV
+                row_count += 1
+                column_count = max(column_count, len(row))
+        return row_count, column_count
+
+    @traced(count="playlists")
+    def save_individual_playlists(
+        self, playlists: list, playlist_tracks: dict, output: Optional[str] = None
+    ) -> str:
+        """Write one CSV per playlist, or one sheet per playlist.
+
+        ``output`` is one of ``INDIVIDUAL_PLAYLIST_OUTPUTS``, by default the
+        exporter's ``individual_playlist_output``:
+
+        - ``directory``: a CSV file per playlist, written by the worker pool
+        - ``zip``: the same CSVs as entries of a single zip archive
+        - ``workbook``: a single XLSX with a sheet per playlist
+
+        Everything goes under ``individual_playlist_location`` by absolute
+        path, and the archive and workbook hold only one playlist open at a
+        time. Returns where the playlists were written.
+        """
+        output = output or self.individual_playlist_output
+        if output == INDIVIDUAL_PLAYLISTS_ZIP:
+            return self.save_individual_playlists_zip(playlists, playlist_tracks)
+        if output == INDIVIDUAL_PLAYLISTS_WORKBOOK:
+            return self.save_individual_playlists_workbook(playlists, playlist_tracks)
+        if output != INDIVIDUAL_PLAYLISTS_DIRECTORY:
+            raise ValueError(
+                f"Unknown individual playlist output {output!r}, "
+                f"expected one of {INDIVIDUAL_PLAYLIST_OUTPUTS}"
             )
-            with open(
-                indiv_playlist_filename, "w", encoding="utf-8", newline="\n"
-            ) as f:
-                csv_writer = self.get_csv_writer(f)
-                header_columns = [
-                    "Artist",
-                    "Track",
-                    "Album",
-                    "Spotify_URI",
-                    "ID",
-                    "Playlist",
-                    "Release_Year",
-                    "Release_Date",
-                    "Release_Date_Precision",
-                    "Track_Length_min",
-                ]
-                header_columns[0] = self.add_bom(header_columns[0])
-                csv_writer.writerow(header_columns)
-                logger.debug(playlist["name"])
-                tracks: list = playlist_tracks[playlist_id]
-                for track in tracks:
-                    track_1 = track
-                    if track_1 is None:
-                        continue
-                    artists = track_1["artists"]
-                    artists = ", ".join(artist["name"] for artist in artists)
+        # each playlist goes to its own worker with just its own tracks
+        self.run_in_pool(
+            (self.save_individual_playlist, playlist, playlist_tracks[playlist["id"]])
+            for playlist in playlists
+        )
+        return self.individual_playlist_location
 
-                    release_year = calc_release_year(
-                        track_1["album"]["release_date"],
-                        track_1["album"]["release_date_precision"],
-                    )
-                    track_1["duration_min"] = self.get_duration_in_min(
-                        track_1["duration_ms"]
-                    )
+    @traced()
+    def save_individual_playlist(self, playlist: dict, tracks: list):
+        indiv_playlist_filename = os.path.join(
+            self.individual_playlist_location,
+            self.individual_playlist_file_name(playlist),
+        )
+        with SheetWriter(indiv_playlist_filename) as sheet_writer:
+            sheet_writer.write_header(INDIVIDUAL_PLAYLIST_COLUMNS)
+            for row in self.individual_playlist_rows(playlist, tracks):
+                sheet_writer.write_row(row)
+
+    @traced(count="playlists")
+    def save_individual_playlists_zip(
+        self, playlists: list, playlist_tracks: dict
+    ) -> str:
+        zip_file_name = os.path.join(
+            self.individual_playlist_location,
+            "spotify_playlists_" + str(datetime.date.today()) + ".zip",
+        )
+        with zipfile.ZipFile(
+            zip_file_name, "w", compression=zipfile.ZIP_DEFLATED
+        ) as zip_file:
+            for playlist in playlists:
+                entry_name = self.individual_playlist_file_name(playlist)
+                # entries are compressed as they are written, one at a time
+                with zip_file.open(entry_name, "w") as entry, io.TextIOWrapper(
+                    entry, encoding="utf-8", newline="\n"
+                ) as f:
+                    csv_writer = self.get_csv_writer(f)
                     csv_writer.writerow(
-                        [
-                            artists,
-                            track_1["name"],
-                            track_1["album"]["name"],
-                            track_1["uri"],
-                            track_1["id"],
-                            playlist_name,
-                            release_year,
-                            track_1["album"]["release_date"],
-                            track_1["album"]["release_date_precision"],
-                            track_1["duration_min"],
-                        ]
+                        [self.add_bom(INDIVIDUAL_PLAYLIST_COLUMNS[0])]
+                        + INDIVIDUAL_PLAYLIST_COLUMNS[1:]
                     )
-            logger.debug("Wrote file: " + str(indiv_playlist_filename))
+                    csv_writer.writerows(
+                        self.individual_playlist_rows(
+                            playlist, playlist_tracks[playlist["id"]]
+                        )
+                    )
+        logger.debug(f"Wrote {len(playlists)} playlists to {zip_file_name}")
+        return zip_file_name
+
+    @traced(count="playlists")
+    def save_individual_playlists_workbook(
+        self, playlists: list, playlist_tracks: dict
+    ) -> str:
+        excel_file_name = os.path.join(
+            self.individual_playlist_location,
+            "spotify_playlists_" + str(datetime.date.today()) + XLSX,
+        )
+        wb = openpyxl.Workbook(write_only=True)
+        sheet_titles = set()
+        for playlist in playlists:
+            ws = wb.create_sheet(self.sheet_title(playlist, sheet_titles))
+            ws.append(INDIVIDUAL_PLAYLIST_COLUMNS)
+            for row in self.individual_playlist_rows(
+                playlist, playlist_tracks[playlist["id"]]
+            ):
+                ws.append(row)
+            # finishes the sheet's temporary file, so only one is open at a time
+            ws.close()
+        wb.save(excel_file_name)
+        logger.debug(f"Wrote {len(playlists)} playlists to {excel_file_name}")
+        return excel_file_name
+
+    def individual_playlist_file_name(self, playlist: dict) -> str:
+        return (
+            self.sanitize_playlist_name(playlist["name"])
+            + "_"
+            + playlist["id"]
+            + "_"
+            + str(datetime.date.today())
+            + CSV
+        )
+
+    @staticmethod
+    def individual_playlist_rows(playlist: dict, tracks: list) -> Iterator[list]:
+        playlist_name = playlist["name"]
+        logger.debug(f"Playlist name is {playlist_name}")
+        enrich_tracks(tracks)
+        for track in tracks:
+            if track is None:
+                continue
+            yield [
+                track[ARTISTS_JOINED],
+                track["name"],
+                track["album"]["name"],
+                track["uri"],
+                track["id"],
+                playlist_name,
+                track[RELEASE_YEAR],
+                track["album"]["release_date"],
+                track["album"]["release_date_precision"],
+                track[DURATION_MIN],
+            ]
+
+    @staticmethod
+    def sheet_title(playlist: dict, used_titles: set) -> str:
+        """A unique worksheet title, within Excel's 31 characters."""
+        title = re.sub(r"[\[\]:*?/\\]", "_", playlist["name"]).strip("' ")
+        title = title or "Playlist"
+        title = title[:MAX_SHEET_TITLE_LENGTH]
+        count = 1
+        while title.lower() in used_titles:
+            count += 1
+            suffix = f" ({count})"
+            title = title[: MAX_SHEET_TITLE_LENGTH - len(suffix)].rstrip() + suffix
+        used_titles.add(title.lower())
+        return title
 
     @staticmethod
     def sanitize_playlist_name(playlist_name: str) -> str:
@@ -636,62 +815,53 @@ class SpotifyToFile(SpotifySave):
 
         return sanitized_name
 
+    @traced(count="tracks")
     def save_album_tracks(self, tracks: list):
         # not implemented
         pass
 
+    @traced()
     def save_all_data(self, all_data: dict):
         most_recent = most_recent_directory(self.raw_data_location)
         logger.debug(f"Most recent directory: {most_recent}")
         zip_folder = f"{self.raw_data_location}/{most_recent}"
-        self.save_artists(
-            unzip_data_from_zip(f"{zip_folder}/saved_artists.gz")
-        )
-        self.save_albums(
-            unzip_data_from_zip(f"{zip_folder}/saved_albums.gz")
-        )
-        # self.save_album_tracks(
-        #     unzip_data_from_zip(f"{zip_folder}/saved_album_tracks.gz")
-        # )
-        self.save_tracks(
-            unzip_data_from_zip(f"{zip_folder}/saved_tracks.gz")
-        )
-        # self.save_playlist_tracks(
-        #     unzip_data_from_zip(f"{zip_folder}/playlists.gz"),
-        #     unzip_data_from_zip(f"{zip_folder}/playlist_tracks.gz"),
-        # )
-        self.save_playlist_details(
-            unzip_data_from_zip(f"{zip_folder}/playlists.gz"),
-            None
-            # unzip_data_from_zip(f"{zip_folder}/playlist_tracks.gz"),
+        # exporter method, then the data files it is called with
+        exports = [
+            ("save_artists", f"{zip_folder}/saved_artists.gz"),
+            ("save_albums", f"{zip_folder}/saved_albums.gz"),
+            # ("save_album_tracks", f"{zip_folder}/saved_album_tracks.gz"),
+            ("save_tracks", f"{zip_folder}/saved_tracks.gz"),
+            # ("save_playlist_tracks", f"{zip_folder}/playlists.gz", f"{zip_folder}/playlist_tracks.gz"),
+            ("save_playlist_details", f"{zip_folder}/playlists.gz", None),
+            # ("save_unique_tracks_in_playlists", f"{zip_folder}/unique_playlist_tracks.gz"),
+            # ("save_unique_artists_in_playlists", f"{zip_folder}/unique_playlist_artists.gz"),
+        ]
+        # every sheet in every format is independent, so all of them run at once
+        self.run_in_pool(
+            (export_from_files, self.with_formats(file_format), method, *data_files)
+            for method, *data_files in exports
+            for file_format in self.formats
         )
-        # self.save_individual_playlists(
-        #     unzip_data_from_zip(f"{zip_folder}/playlists.gz"),
-        #     None
-        #     unzip_data_from_zip(f"{zip_folder}/playlist_tracks.gz"),
-        # )
-        # self.save_unique_tracks_in_playlists(
-        #     unzip_data_from_zip(f"{zip_folder}/unique_playlist_tracks.gz")
-        # )
-        # self.save_unique_artists_in_playlists(
-        #     unzip_data_from_zip(f"{zip_folder}/unique_playlist_artists.gz")
-        # )
 
 
-def calc_release_year(release_date, release_date_precision) -> int:
-    if release_date_precision == ["year", "month", "day"]:
-        return release_date[0:4]
-    if release_date_precision is None:
-        return -1
+def export_from_files(spotify_to_file: SpotifyToFile, method: str, *data_files):
+    """Run an exporter method on data loaded from ``data_files``.
 
-    return release_date
+    The data is loaded in the worker itself, so it is never pickled across
+    processes. ``None`` stands for an argument with no file.
+    """
+    getattr(spotify_to_file, method)(
+        *(unzip_data_from_zip(data_file) if data_file else None for data_file in data_files)
+    )
 
 
 def main():
     setup_app_logging(logger, logging.DEBUG)
     spotify_to_file: SpotifyToFile = SpotifyToFile()
-    os.chdir(spotify_to_file.playlist_location)
-    spotify_to_file.save_all_data({})
+    try:
+        spotify_to_file.save_all_data({})
+    finally:
+        dump_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
+
+from spotify.spotify_utils import zip_data
+from storage.file.spotify_save_to_file import (
+    INDIVIDUAL_PLAYLISTS_WORKBOOK,
+    INDIVIDUAL_PLAYLISTS_ZIP,
+    SPOTIFY_LIBRARY_ALL_TRACKS,
+    SPOTIFY_LIBRARY_ALBUM_TRACKS,
+    SPOTIFY_LIBRARY_TRACKS,
+    SheetWriter,
+    SpotifyToFile,
+)
+
+ARTISTS = [
+    {
+        "name": "Björk",
+        "uri": "spotify:artist:b",
+        "id": "b",
+        "followers": {"href": None, "total": 10},
+        "popularity": 50,
+        "genres": ["art pop", "electronica"],
+        "images": [{"url": "https://i.scdn.co/b"}],
+    },
+    {
+        "name": "Air",
+        "uri": "spotify:artist:a",
+        "id": "a",
+        "followers": 5,
+        "popularity": 40,
+        "genres": [],
+        "images": [],
+    },
+]
+
+TRACK = {
+    "name": "Hyperballad",
+    "id": "t",
+    "uri": "spotify:track:t",
+    "duration_ms": 321000,
+    "artists": [{"name": "Björk"}],
+    "external_ids": {"isrc": "GBAAA9600001"},
+    "album": {
+        "name": "Post",
+        "release_date": "1995",
+        "release_date_precision": "year",
+    },
+}
+
+ALBUM = {
+    "name": "Post",
+    "id": "p",
+    "uri": "spotify:album:p",
+    "artists": [{"name": "Björk"}],
+    "release_date": "1995",
+    "release_date_precision": "year",
+    "label": "One Little Indian",
+    "album_type": "album",
+    "total_tracks": 1,
+    "images": [],
+    "external_ids": {"upc": "0000"},
+    "tracks": {"items": [TRACK]},
+}
+
+PLAYLIST = {
+    "name": "Mix: 90s/00s",
+    "id": "pl",
+    "owner": {"display_name": "me"},
+    "external_urls": {"spotify": "https://open.spotify.com/playlist/pl"},
+}
+
+
+class SpotifyToFileTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)
+        # skip the config lookup, the writers only use the working directory
+        self.spotify_to_file = SpotifyToFile.__new__(SpotifyToFile)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_sheet_writer_writes_csv_and_xlsx_in_one_pass(self):
+        with SheetWriter("sheet.csv", "sheet.xlsx") as sheet_writer:
+            sheet_writer.write_header(["Name", "Count"])
+            sheet_writer.write_row(["a", 1])
+            sheet_writer.write_row(["b, c", None])
+
+        with open("sheet.csv", encoding="utf-8-sig") as f:
+            self.assertEqual(
+                [["Name", "Count"], ["a", "1"], ["b, c", ""]], list(csv.reader(f))
+            )
+        rows = list(openpyxl.load_workbook("sheet.xlsx").active.values)
+        self.assertEqual([("Name", "Count"), ("a", 1), ("b, c", None)], rows)
+
+    def test_sheet_writer_skips_xlsx_on_error(self):
+        with self.assertRaises(KeyError):
+            with SheetWriter("sheet.csv", "sheet.xlsx") as sheet_writer:
+                sheet_writer.write_header(["Name"])
+                raise KeyError("name")
+
+        self.assertFalse(os.path.exists("sheet.xlsx"))
+
+    def test_save_artists_sheets_match(self):
+        self.spotify_to_file.save_artists(ARTISTS)
+
+        csv_file_name = [f for f in os.listdir() if f.endswith(".csv")][0]
+        with open(csv_file_name, encoding="utf-8-sig") as f:
+            csv_rows = list(csv.reader(f))
+        excel_rows = list(
+            openpyxl.load_workbook(csv_file_name.replace(".csv", ".xlsx")).active.values
+        )
+
+        self.assertEqual(3, len(excel_rows))
+        self.assertEqual(csv_rows[0], list(excel_rows[0]))
+        # empty strings are left as empty cells
+        self.assertEqual(("Air", "spotify:artist:a", "a", 5, 40, None, None), excel_rows[1])
+        self.assertEqual("art pop, electronica", excel_rows[2][5])
+        # the follower count, not the API's followers object
+        self.assertEqual(10, excel_rows[2][3])
+
+    def test_save_all_library_tracks_combines_track_sheets(self):
+        with SheetWriter(SPOTIFY_LIBRARY_TRACKS) as sheet_writer:
+            sheet_writer.write_header(["Artist", "Track"])
+            sheet_writer.write_row(["Air", "La femme d'argent"])
+        with SheetWriter(SPOTIFY_LIBRARY_ALBUM_TRACKS) as sheet_writer:
+            sheet_writer.write_header(["Artist", "Track"])
+            sheet_writer.write_row(["Björk", "Hyperballad"])
+
+        self.spotify_to_file.save_all_library_tracks()
+
+        ws = openpyxl.load_workbook(SPOTIFY_LIBRARY_ALL_TRACKS).active
+        self.assertEqual(
+            [("Artist", "Track"), ("Air", "La femme d'argent"), ("Björk", "Hyperballad")],
+            list(ws.values),
+        )
+        self.assertEqual("A1:B3", ws.auto_filter.ref)
+
+    def test_save_all_data_exports_every_sheet_from_worker_processes(self):
+        raw_data_location = os.path.join(self.tmp_dir.name, "raw")
+        zip_folder = os.path.join(raw_data_location, "2026-01-01")
+        zip_data(ARTISTS, "saved_artists", zip_folder)
+        zip_data([ALBUM], "saved_albums", zip_folder)
+        zip_data([TRACK], "saved_tracks", zip_folder)
+        zip_data([PLAYLIST], "playlists", zip_folder)
+        self.spotify_to_file.raw_data_location = raw_data_location
+        self.spotify_to_file.max_workers = 2
+
+        self.spotify_to_file.save_all_data({})
+
+        # file names without their date
+        exported = sorted(
+            f.rsplit("_", 1)[0] + os.path.splitext(f)[1]
+            for f in os.listdir()
+            if os.path.isfile(f)
+        )
+        self.assertEqual(
+            [
+                "spotify_library_albums.csv",
+                "spotify_library_albums.xlsx",
+                "spotify_library_albums_tracks.csv",
+                "spotify_library_albums_tracks.xlsx",
+                "spotify_library_artists.csv",
+                "spotify_library_artists.xlsx",
+                "spotify_library_tracks.csv",
+                "spotify_library_tracks.xlsx",
+                "spotify_playlists.csv",
+                "spotify_playlists.xlsx",
+            ],
+            exported,
+        )
+
+    def test_save_individual_playlists_writes_to_playlist_location(self):
+        self.spotify_to_file.individual_playlist_location = os.path.join(
+            self.tmp_dir.name, "individual"
+        )
+        os.makedirs(self.spotify_to_file.individual_playlist_location)
+        self.spotify_to_file.max_workers = 2
+        other_playlist = dict(PLAYLIST, name="Other", id="other")
+
+        self.spotify_to_file.save_individual_playlists(
+            [PLAYLIST, other_playlist], {"pl": [TRACK, None], "other": []}
+        )
+
+        self.assertEqual(
+            os.path.realpath(self.tmp_dir.name), os.path.realpath(os.getcwd())
+        )
+        file_names = sorted(os.listdir(self.spotify_to_file.individual_playlist_location))
+        self.assertEqual(2, len(file_names))
+        self.assertTrue(file_names[0].startswith("Mix_ 90s_00s_pl_"))
+        with open(
+            os.path.join(self.spotify_to_file.individual_playlist_location, file_names[0]),
+            encoding="utf-8-sig",
+        ) as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(["Björk", "Hyperballad", "Post"], rows[1][:3])
+        self.assertEqual("5:21", rows[1][-1])
+
+    def test_save_individual_playlists_to_one_zip(self):
+        self.spotify_to_file.individual_playlist_location = self.tmp_dir.name
+        other_playlist = dict(PLAYLIST, name="Other", id="other")
+
+        zip_file_name = self.spotify_to_file.save_individual_playlists(
+            [PLAYLIST, other_playlist],
+            {"pl": [TRACK, None], "other": []},
+            output=INDIVIDUAL_PLAYLISTS_ZIP,
+        )
+
+        self.assertTrue(os.path.isabs(zip_file_name))
+        with zipfile.ZipFile(zip_file_name) as zip_file:
+            names = zip_file.namelist()
+            self.assertEqual(2, len(names))
+            with zip_file.open(names[0]) as entry:
+                rows = list(csv.reader(io.TextIOWrapper(entry, encoding="utf-8-sig")))
+        self.assertTrue(names[0].startswith("Mix_ 90s_00s_pl_"))
+        self.assertEqual("Artist", rows[0][0])
+        self.assertEqual(["Björk", "Hyperballad", "Post"], rows[1][:3])
+
+    def test_save_individual_playlists_to_one_workbook(self):
+        self.spotify_to_file.individual_playlist_location = self.tmp_dir.name
+        long_name = dict(PLAYLIST, name="A [very] long playlist name: part one", id="l1")
+        same_start = dict(PLAYLIST, name="A [very] long playlist name: part two", id="l2")
+
+        excel_file_name = self.spotify_to_file.save_individual_playlists(
+            [PLAYLIST, long_name, same_start],
+            {"pl": [TRACK], "l1": [], "l2": [None]},
+            output=INDIVIDUAL_PLAYLISTS_WORKBOOK,
+        )
+
+        wb = openpyxl.load_workbook(excel_file_name)
+        self.assertEqual(
+            [
+                "Mix_ 90s_00s",
+                "A _very_ long playlist name_ pa",
+                "A _very_ long playlist name (2)",
+            ],
+            wb.sheetnames,
+        )
+        rows = list(wb["Mix_ 90s_00s"].values)
+        self.assertEqual(("Björk", "Hyperballad", "Post"), rows[1][:3])
+        self.assertEqual(1, len(list(wb.worksheets[2].values)))
+
+    def test_save_individual_playlists_rejects_unknown_output(self):
+        with self.assertRaises(ValueError):
+            self.spotify_to_file.save_individual_playlists([], {}, output="tarball")
+
+
+if __name__ == "__main__":
+    unittest.main()
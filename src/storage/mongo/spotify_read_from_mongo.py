@@ -1,15 +1,44 @@
 import logging
+from typing import List, Optional, Tuple
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.cursor import Cursor
 from pymongo.database import Database
 
 from spotify.spotify_utils import setup_app_logging
+from storage.mongo.spotify_save_to_mongo import MONGO_COLLECTIONS, create_sort_indexes
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 100
+
+ID_NAME_PROJECTION = {"_id": 0, "id": 1, "name": 1}
+FIRST_ARTIST_PROJECTION = {**ID_NAME_PROJECTION, "artists.name": 1}
+
+# Fields the readers may sort on, per collection, as declared by the writer
+SORT_FIELDS = {spec.name: spec.sort_fields for spec in MONGO_COLLECTIONS}
+UNIQUE_TRACK_SORT_FIELDS = ("name", "playlist_id")
+UNIQUE_ARTIST_SORT_FIELDS = ("name",)
+
+
+def sort_field(sort: str, allowed: Tuple[str, ...]) -> str:
+    """``sort`` when it is allowed, otherwise the name."""
+    if sort in allowed:
+        return sort
+    logger.debug(f"Sorting on name instead of unsupported field {sort}")
+    return "name"
+
 
 class SpotifyFromMongo:
+    """Read the collections written by ``SpotifyToMongo``.
+
+    Every reader projects just the fields it returns. Pass ``page`` (from 1)
+    to get one page of ``page_size`` documents sorted server side by
+    ``sort`` and ``_id``, backed by the sort indexes the writer creates with
+    each collection; without it all documents are returned, still sorted and
+    projected. A ``sort`` field outside ``SORT_FIELDS`` sorts by name.
+    """
+
     client: MongoClient
     db: Database
 
@@ -18,20 +47,38 @@ class SpotifyFromMongo:
         self.client = MongoClient(mongodb_server)
         self.db = self.client.spotify_db
 
-    def get_liked_artists(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_saved_artist"].find()
-        artists = []
-        for doc in cursor:
-            artists.append(
-                {
-                    "id": doc["id"],
-                    "name": doc["name"],
-                }
-            )
-        return artists
+    def ensure_indexes(self) -> None:
+        """The sort indexes, for collections written before the writer
+        created them."""
+        for spec in MONGO_COLLECTIONS:
+            create_sort_indexes(self.db[spec.name], spec)
+
+    def _find(
+        self,
+        collection_name: str,
+        projection: dict,
+        page: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        sort: str = "name",
+        descending: bool = False,
+    ) -> Cursor:
+        direction = DESCENDING if descending else ASCENDING
+        sort = sort_field(sort, SORT_FIELDS[collection_name])
+        cursor: Cursor = (
+            self.db[collection_name]
+            .find({}, projection)
+            .sort([(sort, direction), ("_id", direction)])
+        )
+        if page is not None:
+            cursor = cursor.skip((max(page, 1) - 1) * page_size).limit(page_size)
+        return cursor
 
-    def get_liked_albums(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_saved_album"].find()
+    def get_liked_artists(self, **page_args) -> list[dict]:
+        cursor = self._find("spotify_saved_artist", ID_NAME_PROJECTION, **page_args)
+        return [{"id": doc["id"], "name": doc["name"]} for doc in cursor]
+
+    def get_liked_albums(self, **page_args) -> list[dict]:
+        cursor = self._find("spotify_saved_album", FIRST_ARTIST_PROJECTION, **page_args)
         albums = []
         for doc in cursor:
             albums.append(
@@ -43,8 +90,8 @@ class SpotifyFromMongo:
             )
         return albums
 
-    def get_liked_tracks(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_saved_track"].find()
+    def get_liked_tracks(self, **page_args) -> list[dict]:
+        cursor = self._find("spotify_saved_track", FIRST_ARTIST_PROJECTION, **page_args)
         tracks = []
         for doc in cursor:
             tracks.append(
@@ -56,8 +103,20 @@ class SpotifyFromMongo:
             )
         return tracks
 
-    def get_unique_playlist_tracks(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_playlist_unique_track"].find()
+    def get_unique_playlist_tracks(self, aggregate: bool = False, **page_args) -> list[dict]:
+        """With ``aggregate`` the unique tracks are computed from the playlist
+        tracks by the server instead of read from their own collection."""
+        if aggregate:
+            return list(
+                self.db["spotify_playlist_track"].aggregate(
+                    unique_playlist_tracks_pipeline(**page_args), allowDiskUse=True
+                )
+            )
+        cursor = self._find(
+            "spotify_playlist_unique_track",
+            {**FIRST_ARTIST_PROJECTION, "playlist_id": 1},
+            **page_args,
+        )
         tracks = []
         for doc in cursor:
             tracks.append(
@@ -71,8 +130,10 @@ class SpotifyFromMongo:
 
         return tracks
 
-    def get_playlists(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_playlist"].find()
+    def get_playlists(self, **page_args) -> list[dict]:
+        cursor = self._find(
+            "spotify_playlist", {**ID_NAME_PROJECTION, "owner.display_name": 1}, **page_args
+        )
         playlists = []
         for doc in cursor:
             playlists.append(
@@ -85,8 +146,12 @@ class SpotifyFromMongo:
 
         return playlists
 
-    def get_playlist_tracks(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_playlist_track"].find()
+    def get_playlist_tracks(self, **page_args) -> list[dict]:
+        cursor = self._find(
+            "spotify_playlist_track",
+            {**ID_NAME_PROJECTION, "playlist_id": 1, "artist": 1},
+            **page_args,
+        )
         tracks = []
         for doc in cursor:
             tracks.append(
@@ -100,21 +165,22 @@ class SpotifyFromMongo:
 
         return tracks
 
-    def get_playlist_unique_artists(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_playlist_unique_artist"].find()
-        artists = []
-        for doc in cursor:
-            artists.append(
-                {
-                    "id": doc["id"],
-                    "name": doc["name"],
-                }
+    def get_playlist_unique_artists(self, aggregate: bool = False, **page_args) -> list[dict]:
+        """With ``aggregate`` the unique artists are computed from the
+        playlist tracks by the server instead of read from their own collection."""
+        if aggregate:
+            return list(
+                self.db["spotify_playlist_track"].aggregate(
+                    unique_playlist_artists_pipeline(**page_args), allowDiskUse=True
+                )
             )
+        cursor = self._find("spotify_playlist_unique_artist", ID_NAME_PROJECTION, **page_args)
+        return [{"id": doc["id"], "name": doc["name"]} for doc in cursor]
 
-        return artists
-
-    def get_liked_album_tracks(self) -> list[dict]:
-        cursor: Cursor = self.db["spotify_saved_album_track"].find()
+    def get_liked_album_tracks(self, **page_args) -> list[dict]:
+        cursor = self._find(
+            "spotify_saved_album_track", {**ID_NAME_PROJECTION, "artist": 1}, **page_args
+        )
         tracks = []
         for doc in cursor:
             tracks.append(
@@ -124,6 +190,49 @@ class SpotifyFromMongo:
         return tracks
 
 
+def page_stages(
+    sort_fields: Tuple[str, ...],
+    page: Optional[int] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    sort: str = "name",
+    descending: bool = False,
+) -> List[dict]:
+    direction = -1 if descending else 1
+    stages = [{"$sort": {sort_field(sort, sort_fields): direction, "_id": direction}}]
+    if page is not None:
+        stages += [{"$skip": (max(page, 1) - 1) * page_size}, {"$limit": page_size}]
+    return stages
+
+
+def unique_playlist_tracks_pipeline(**page_args) -> List[dict]:
+    """One document per track id, with the first playlist it appears in."""
+    return [
+        {"$match": {"id": {"$ne": None}}},
+        {
+            "$group": {
+                "_id": "$id",
+                "name": {"$first": "$name"},
+                "playlist_id": {"$first": "$playlist_id"},
+                "artists": {"$first": {"$arrayElemAt": ["$artists.name", 0]}},
+            }
+        },
+        *page_stages(UNIQUE_TRACK_SORT_FIELDS, **page_args),
+        {"$project": {"_id": 0, "id": "$_id", "playlist_id": 1, "name": 1, "artists": 1}},
+    ]
+
+
+def unique_playlist_artists_pipeline(**page_args) -> List[dict]:
+    """One document per artist found on any playlist track."""
+    return [
+        {"$project": {"_id": 0, "artists.id": 1, "artists.name": 1}},
+        {"$unwind": "$artists"},
+        {"$match": {"artists.id": {"$ne": None}}},
+        {"$group": {"_id": "$artists.id", "name": {"$first": "$artists.name"}}},
+        *page_stages(UNIQUE_ARTIST_SORT_FIELDS, **page_args),
+        {"$project": {"_id": 0, "id": "$_id", "name": 1}},
+    ]
+
+
 def dict2obj(d: dict) -> object:
     # checking whether object d is an
     # instance of class list
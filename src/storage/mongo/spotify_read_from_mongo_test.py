@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import MagicMock
+
+from pymongo import ASCENDING, DESCENDING
+
+from storage.mongo.spotify_read_from_mongo import (
+    SpotifyFromMongo,
+    unique_playlist_artists_pipeline,
+)
+
+
+def make_reader(docs):
+    """A reader wired to a mock database, without a Mongo connection."""
+    reader = SpotifyFromMongo.__new__(SpotifyFromMongo)
+    reader.db = MagicMock()
+    cursor = reader.db.__getitem__.return_value.find.return_value
+    cursor.sort.return_value = cursor
+    cursor.skip.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.__iter__.side_effect = lambda: iter(docs)
+    return reader, cursor
+
+
+class SpotifyFromMongoTest(unittest.TestCase):
+    def test_page_is_projected_sorted_and_limited_on_the_server(self):
+        reader, cursor = make_reader(
+            [{"id": "t1", "name": "Song", "artists": [{"name": "A"}, {"name": "B"}]}]
+        )
+
+        tracks = reader.get_liked_tracks(page=3, page_size=20)
+
+        self.assertEqual([{"id": "t1", "name": "Song", "artists": "A"}], tracks)
+        reader.db.__getitem__.return_value.find.assert_called_once_with(
+            {}, {"_id": 0, "id": 1, "name": 1, "artists.name": 1}
+        )
+        cursor.sort.assert_called_once_with([("name", ASCENDING), ("_id", ASCENDING)])
+        cursor.skip.assert_called_once_with(40)
+        cursor.limit.assert_called_once_with(20)
+
+    def test_without_page_everything_is_returned(self):
+        reader, cursor = make_reader([{"id": "a1", "name": "A"}])
+
+        self.assertEqual([{"id": "a1", "name": "A"}], reader.get_liked_artists())
+        cursor.skip.assert_not_called()
+
+    def test_only_declared_fields_are_sorted_on(self):
+        reader, cursor = make_reader([])
+
+        reader.get_playlist_tracks(sort="playlist_id", descending=True)
+        reader.get_liked_artists(sort="followers.total")
+
+        self.assertEqual(
+            [
+                [("playlist_id", DESCENDING), ("_id", DESCENDING)],
+                [("name", ASCENDING), ("_id", ASCENDING)],
+            ],
+            [call.args[0] for call in cursor.sort.call_args_list],
+        )
+        self.assertEqual(
+            {"$sort": {"name": 1, "_id": 1}},
+            unique_playlist_artists_pipeline(sort="playlist_id")[4],
+        )
+
+    def test_unique_artists_pipeline_pages_after_grouping(self):
+        pipeline = unique_playlist_artists_pipeline(page=2, page_size=10)
+
+        stages = [next(iter(stage)) for stage in pipeline]
+        self.assertEqual(
+            ["$project", "$unwind", "$match", "$group", "$sort", "$skip", "$limit", "$project"],
+            stages,
+        )
+        self.assertEqual({"$skip": 10}, pipeline[5])
+
+
+if __name__ == "__main__":
+    unittest.main()
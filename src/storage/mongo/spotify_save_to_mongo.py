@@ -1,18 +1,106 @@
+import argparse
 import logging
 import os
+import time
+import uuid
 from configparser import ConfigParser
+from typing import Iterator, List, NamedTuple, Tuple
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, ReplaceOne
 from pymongo.collection import Collection
 from pymongo.database import Database
-from pymongo.errors import DuplicateKeyError, BulkWriteError
+from pymongo.errors import BulkWriteError
 
+from spotify.spotify_enrich import (
+    enrich_albums,
+    enrich_playlist_tracks,
+    enrich_tracks,
+)
 from spotify.spotify_save import SpotifySave
 from spotify.spotify_utils import setup_app_logging, unzip_data, get_config_location, most_recent_directory, \
     unzip_data_from_zip
+from utils.metrics import dump_metrics, record_ingest
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 1000
+# Set on every document written by an upsert load
+LOAD_ID_FIELD = "_load_id"
+
+
+class MongoCollection(NamedTuple):
+    name: str
+    index_name: str
+    index_keys: List[Tuple[str, int]]
+    # fields identifying a document when it is replaced
+    key_fields: Tuple[str, ...]
+    # fields the readers may sort on, each backed by a (field, _id) index
+    sort_fields: Tuple[str, ...] = ("name",)
+
+
+SAVED_ARTIST_COLLECTION = MongoCollection(
+    "spotify_saved_artist", "spotify_artist_index", [("id", ASCENDING)], ("id",)
+)
+SAVED_ALBUM_COLLECTION = MongoCollection(
+    "spotify_saved_album", "spotify_saved_album_index", [("id", ASCENDING)], ("id",)
+)
+SAVED_TRACK_COLLECTION = MongoCollection(
+    "spotify_saved_track", "track_index", [("id", ASCENDING), ("url", ASCENDING)], ("id",)
+)
+SAVED_ALBUM_TRACK_COLLECTION = MongoCollection(
+    "spotify_saved_album_track",
+    "album_track_index",
+    [("id", ASCENDING), ("url", ASCENDING)],
+    ("id",),
+)
+PLAYLIST_COLLECTION = MongoCollection(
+    "spotify_playlist", "playlist_index", [("id", ASCENDING)], ("id",)
+)
+PLAYLIST_TRACK_COLLECTION = MongoCollection(
+    "spotify_playlist_track",
+    "playlist_track_index",
+    [("playlist_id", ASCENDING), ("id", ASCENDING), ("url", ASCENDING)],
+    ("playlist_id", "id"),
+    ("name", "playlist_id"),
+)
+PLAYLIST_UNIQUE_TRACK_COLLECTION = MongoCollection(
+    "spotify_playlist_unique_track",
+    "unique_playlist_track_index",
+    [("id", ASCENDING), ("url", ASCENDING)],
+    ("id",),
+)
+PLAYLIST_UNIQUE_ARTIST_COLLECTION = MongoCollection(
+    "spotify_playlist_unique_artist",
+    "unique_playlist_artist_index",
+    [("id", ASCENDING)],
+    ("id",),
+)
+
+MONGO_COLLECTIONS = (
+    SAVED_ARTIST_COLLECTION,
+    SAVED_ALBUM_COLLECTION,
+    SAVED_TRACK_COLLECTION,
+    SAVED_ALBUM_TRACK_COLLECTION,
+    PLAYLIST_COLLECTION,
+    PLAYLIST_TRACK_COLLECTION,
+    PLAYLIST_UNIQUE_TRACK_COLLECTION,
+    PLAYLIST_UNIQUE_ARTIST_COLLECTION,
+)
+
+
+def create_sort_indexes(collection: Collection, spec: MongoCollection) -> None:
+    """Indexes for the sorted, paginated reads; a no-op when they exist."""
+    for field in spec.sort_fields:
+        collection.create_index(
+            [(field, ASCENDING), ("_id", ASCENDING)], name=f"{field}_sort_index"
+        )
+
+
+def batches(documents: List[dict], batch_size: int) -> Iterator[List[dict]]:
+    for i in range(0, len(documents), batch_size):
+        yield documents[i: i + batch_size]
+
 
 class SpotifyToMongo(SpotifySave):
     client: MongoClient
@@ -23,11 +111,22 @@ class SpotifyToMongo(SpotifySave):
     individual_playlist_location = ""
 
 
-    def __init__(self, mongodb_server="mongodb://localhost:27017/",user_id:str = "") -> None:
+    def __init__(
+        self,
+        mongodb_server="mongodb://localhost:27017/",
+        user_id: str = "",
+        upsert: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        """With ``upsert`` collections are updated in place with batched
+        ``ReplaceOne`` upserts instead of being dropped and reloaded."""
         super().__init__()
         self.client = MongoClient(mongodb_server)
         self.db = self.client.get_database("spotify_db")
         self.user_id = user_id
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.load_id = uuid.uuid4().hex
         self.config_location = get_config_location()
         self.config_parser = ConfigParser()
         self.config_parser.read(self.config_location)
@@ -65,79 +164,55 @@ class SpotifyToMongo(SpotifySave):
             )
 
 
+    @traced(count="playlists")
     def save_individual_playlists(self, playlists: list, playlist_tracks: dict):
         # not implemented
         pass
 
+    @traced(count="unique_tracks_in_playlists")
     def save_unique_tracks_in_playlists(self, unique_tracks_in_playlists: dict):
         logger.info("save_unique_tracks_in_playlists_to_mongo")
 
-        collection_name = "spotify_playlist_unique_track"
-        self.db.drop_collection(collection_name)
-        playlist_unique_track_collection: Collection = self.db.create_collection(
-            collection_name
+        playlist_unique_track_collection = self._prepare_collection(
+            PLAYLIST_UNIQUE_TRACK_COLLECTION
         )
 
-        playlist_unique_track_collection.drop_indexes()
-        playlist_unique_track_collection.create_index(
-            name="unique_playlist_track_index",
-            keys=[("id", ASCENDING), ("url", ASCENDING)],
-            unique=True,
-        )
+        enrich_tracks(unique_tracks_in_playlists.values())
+        documents = []
         for value in unique_tracks_in_playlists.values():
             artists: list = value["artists"]
             value["artist"] = self.get_artist_from_artists(artists)
-            try:
-                playlist_unique_track_collection.insert_one(value)
-            except DuplicateKeyError as e:
-                logger.debug(value)
-                logger.debug(e)
-
-        # playlist_unique_track_collection.insert_many(unique_tracks_in_playlists.values())
+            documents.append(value)
+        self._save_documents(
+            playlist_unique_track_collection, PLAYLIST_UNIQUE_TRACK_COLLECTION, documents
+        )
 
     @staticmethod
     def get_artist_from_artists(artists):
 
         return " & ".join(artist["name"] for artist in artists)
 
+    @traced(count="unique_artists_in_playlists")
     def save_unique_artists_in_playlists(self, unique_artists_in_playlists: dict):
         logger.info("save_unique_artists_in_playlists_to_mongo")
 
-        collection_name = "spotify_playlist_unique_artist"
-        self.db.drop_collection(collection_name)
-        playlist_unique_artist_collection: Collection = self.db.create_collection(
-            collection_name
+        playlist_unique_artist_collection = self._prepare_collection(
+            PLAYLIST_UNIQUE_ARTIST_COLLECTION
         )
-
-        playlist_unique_artist_collection.drop_indexes()
-        playlist_unique_artist_collection.create_index(
-            name="unique_playlist_artist_index", keys=[("id", ASCENDING)], unique=True
+        self._save_documents(
+            playlist_unique_artist_collection,
+            PLAYLIST_UNIQUE_ARTIST_COLLECTION,
+            list(unique_artists_in_playlists.values()),
         )
-        for value in unique_artists_in_playlists.values():
-            try:
-                playlist_unique_artist_collection.insert_one(value)
-            except DuplicateKeyError as e:
-                logger.debug(value)
-                logger.debug(e)
-
-        # playlist_unique_track_collection.insert_many(unique_tracks_in_playlists.values())
 
+    @traced(count="playlists")
     def save_playlist_tracks(self, playlists: list, playlist_tracks: dict):
         logger.info("save_playlist_tracks_to_mongo")
 
-        collection_name = "spotify_playlist_track"
-        self.db.drop_collection(collection_name)
-        playlist_track_collection: Collection = self.db.create_collection(
-            collection_name
-        )
-
-        playlist_track_collection.drop_indexes()
-        playlist_track_collection.create_index(
-            name="playlist_track_index",
-            keys=[("playlist_id", ASCENDING), ("id", ASCENDING), ("url", ASCENDING)],
-            unique=True,
-        )
+        playlist_track_collection = self._prepare_collection(PLAYLIST_TRACK_COLLECTION)
 
+        enrich_playlist_tracks(playlist_tracks)
+        mongo_tracks: list = []
         for playlist_id in playlist_tracks.keys():
             tracks: list = playlist_tracks[playlist_id]
 
@@ -149,44 +224,28 @@ class SpotifyToMongo(SpotifySave):
                 mongo_track["artist"] = self.get_artist_from_artists(
                     track["track"]["artists"]
                 )
-                try:
-                    playlist_track_collection.insert_one(mongo_track)
-                except Exception as e:
-                    logger.debug(e)
-                    logger.debug(mongo_track)
+                mongo_tracks.append(mongo_track)
 
-        # playlist_track_collection.insert_many(mongo_tracks)
+        self._save_documents(
+            playlist_track_collection, PLAYLIST_TRACK_COLLECTION, mongo_tracks
+        )
 
+    @traced(count="playlists")
     def save_playlist_details(self, playlists: list, playlist_tracks: dict):
         logger.info("save_playlist_details_to_mongo")
 
-        collection_name = "spotify_playlist"
-        self.db.drop_collection(collection_name)
-        playlist_collection: Collection = self.db.create_collection(collection_name)
-
-        playlist_collection.drop_indexes()
-        playlist_collection.create_index(
-            name="playlist_index", keys=[("id", ASCENDING)], unique=True
-        )
-        try:
-            playlist_collection.insert_many(playlists)
-        except BulkWriteError as e:
-            logger.debug("Bulk write error, some duplicates skipped")
-            logger.debug(e.details)
+        playlist_collection = self._prepare_collection(PLAYLIST_COLLECTION)
+        self._save_documents(playlist_collection, PLAYLIST_COLLECTION, playlists)
 
+    @traced(count="albums")
     def save_albums(self, albums: list):
         logger.info("save_albums_to_mongo")
 
-        collection_name = "spotify_saved_album"
-        self.db.drop_collection(collection_name)
-        album_collection: Collection = self.db.create_collection(collection_name)
-
-        album_collection.drop_indexes()
-        album_collection.create_index(
-            name="spotify_saved_album_index", keys=[("id", ASCENDING)], unique=True
-        )
+        album_collection = self._prepare_collection(SAVED_ALBUM_COLLECTION)
 
+        enrich_albums(albums)
         mongo_albums: list = []
+        complete = True
         for album in albums:
             try:
                 mongo_album = album
@@ -197,25 +256,18 @@ class SpotifyToMongo(SpotifySave):
                 mongo_albums.append(mongo_album)
             except KeyError:
                 logger.info(f"KeyError for album {album}")
+                complete = False
                 break
 
-        if mongo_albums:
-            album_collection.insert_many(mongo_albums)
+        self._save_documents(
+            album_collection, SAVED_ALBUM_COLLECTION, mongo_albums, complete=complete
+        )
 
+    @traced(count="tracks")
     def save_album_tracks(self, tracks: list):
         logger.info("save_album_tracks_to_mongo")
-        db: Database = self.client.get_database("spotify_db")
 
-        collection_name = "spotify_saved_album_track"
-        db.drop_collection(collection_name)
-        album_track_collection: Collection = db.create_collection(collection_name)
-
-        album_track_collection.drop_indexes()
-        album_track_collection.create_index(
-            name="album_track_index",
-            keys=[("id", ASCENDING), ("url", ASCENDING)],
-            unique=True,
-        )
+        album_track_collection = self._prepare_collection(SAVED_ALBUM_TRACK_COLLECTION)
 
         mongo_tracks: list = list()
         for track in tracks:
@@ -224,23 +276,17 @@ class SpotifyToMongo(SpotifySave):
 
             mongo_tracks.append(mongo_track)
 
-        album_track_collection.insert_many(tracks)
+        self._save_documents(
+            album_track_collection, SAVED_ALBUM_TRACK_COLLECTION, mongo_tracks
+        )
 
+    @traced(count="tracks")
     def save_tracks(self, tracks: list):
         logger.info("save_tracks_to_mongo")
-        db: Database = self.client.get_database("spotify_db")
 
-        collection_name = "spotify_saved_track"
-        db.drop_collection(collection_name)
-        track_collection: Collection = db.create_collection(collection_name)
-
-        track_collection.drop_indexes()
-        track_collection.create_index(
-            name="track_index",
-            keys=[("id", ASCENDING), ("url", ASCENDING)],
-            unique=True,
-        )
+        track_collection = self._prepare_collection(SAVED_TRACK_COLLECTION)
 
+        enrich_tracks(tracks)
         mongo_tracks: list = []
         for track in tracks:
             mongo_track = track
@@ -252,22 +298,102 @@ class SpotifyToMongo(SpotifySave):
 
             mongo_tracks.append(mongo_track)
 
-        track_collection.insert_many(mongo_tracks)
+        self._save_documents(track_collection, SAVED_TRACK_COLLECTION, mongo_tracks)
 
+    @traced(count="artists")
     def save_artists(self, artists: list):
         logger.info("save_artists_to_mongo")
 
-        collection_name = "spotify_saved_artist"
-        self.db.drop_collection(collection_name)
-        artist_collection: Collection = self.db.create_collection(collection_name)
+        artist_collection = self._prepare_collection(SAVED_ARTIST_COLLECTION)
+        self._save_documents(artist_collection, SAVED_ARTIST_COLLECTION, artists)
 
-        artist_collection.drop_indexes()
-        artist_collection.create_index(
-            name="spotify_artist_index", keys=[("id", ASCENDING)], unique=True
-        )
+    def _prepare_collection(self, spec: MongoCollection) -> Collection:
+        """The collection to load into, with its unique and sort indexes in place.
 
-        artist_collection.insert_many(artists)
+        In upsert mode the collection and its index are kept, so readers
+        never see it empty. Otherwise it is dropped and recreated.
+        """
+        if self.upsert:
+            collection = self.db[spec.name]
+        else:
+            self.db.drop_collection(spec.name)
+            collection = self.db.create_collection(spec.name)
+        # a no-op when the same index already exists
+        collection.create_index(name=spec.index_name, keys=spec.index_keys, unique=True)
+        create_sort_indexes(collection, spec)
+        return collection
+
+    def _save_documents(
+        self,
+        collection: Collection,
+        spec: MongoCollection,
+        documents: List[dict],
+        complete: bool = True,
+    ) -> None:
+        """``complete`` is False when ``documents`` is only part of the
+        library, so an upsert load must not remove the rest."""
+        if self.upsert:
+            self._bulk_upsert(collection, spec, documents, complete)
+            return
+        for batch in batches(documents, self.batch_size):
+            with record_ingest(spec.name, len(batch)):
+                try:
+                    collection.insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    logger.debug(
+                        f"Skipped {len(e.details.get('writeErrors', []))} duplicate "
+                        f"{spec.name} documents"
+                    )
+
+    def _bulk_upsert(
+        self,
+        collection: Collection,
+        spec: MongoCollection,
+        documents: List[dict],
+        complete: bool = True,
+    ) -> None:
+        """Replace documents by key in unordered batches, then drop stale ones.
+
+        Every document written is tagged with this load's id, so anything
+        left with an older id is no longer in the library. The stale ones are
+        only dropped after a complete load in which every batch landed;
+        otherwise documents this load failed to write would be lost.
+        """
+        start_time = time.time()
+        upserted = modified = 0
+        failed_batches = 0
+        for batch in batches(documents, self.batch_size):
+            requests = []
+            for document in batch:
+                document[LOAD_ID_FIELD] = self.load_id
+                key = {field: document.get(field) for field in spec.key_fields}
+                requests.append(ReplaceOne(key, document, upsert=True))
+            with record_ingest(spec.name, len(requests)):
+                try:
+                    result = collection.bulk_write(requests, ordered=False)
+                    upserted += result.upserted_count
+                    modified += result.modified_count
+                except BulkWriteError as e:
+                    # duplicates within a batch race on the same key, the others land
+                    failed_batches += 1
+                    logger.debug(
+                        f"{len(e.details.get('writeErrors', []))} {spec.name} upserts failed"
+                    )
+        if failed_batches or not documents or not complete:
+            logger.warning(
+                f"Kept stale {spec.name} documents: {failed_batches} batches failed, "
+                f"{len(documents)} documents, complete load: {complete}"
+            )
+            removed_count = 0
+        else:
+            removed = collection.delete_many({LOAD_ID_FIELD: {"$ne": self.load_id}})
+            removed_count = removed.deleted_count
+        logger.info(
+            f"Upserted {spec.name}: {upserted} new, {modified} changed, "
+            f"{removed_count} removed in {time.time() - start_time:.2f}s"
+        )
 
+    @traced()
     def save_all_data(self, all_data: dict):
         most_recent = most_recent_directory(self.raw_data_location)
         logger.debug(f"Most recent directory: {most_recent}")
@@ -310,9 +436,28 @@ class SpotifyToMongo(SpotifySave):
 def main():
     setup_app_logging(logger, logging.DEBUG)
 
-    spotify_to_mongodb: SpotifyToMongo = SpotifyToMongo()
-
-    spotify_to_mongodb.save_all_data({})
+    parser = argparse.ArgumentParser(description="Save Spotify data to MongoDB")
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="Update collections in place with bulk upserts instead of reloading them",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Documents per bulk write",
+    )
+    args = parser.parse_args()
+
+    spotify_to_mongodb: SpotifyToMongo = SpotifyToMongo(
+        upsert=args.upsert, batch_size=args.batch_size
+    )
+
+    try:
+        spotify_to_mongodb.save_all_data({})
+    finally:
+        dump_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import MagicMock
+
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from storage.mongo.spotify_save_to_mongo import (
+    LOAD_ID_FIELD,
+    PLAYLIST_TRACK_COLLECTION,
+    SpotifyToMongo,
+)
+
+
+def make_saver(upsert=True, batch_size=2):
+    """A saver wired to a mock database, skipping config loading."""
+    saver = SpotifyToMongo.__new__(SpotifyToMongo)
+    saver.db = MagicMock()
+    saver.upsert = upsert
+    saver.batch_size = batch_size
+    saver.load_id = "load-1"
+    return saver
+
+
+def playlist_item(track_id):
+    return {
+        "added_at": "2024-01-01T00:00:00Z",
+        "is_local": False,
+        "track": {"id": track_id, "name": track_id, "artists": [{"name": "a"}]},
+    }
+
+
+class SpotifyToMongoTest(unittest.TestCase):
+    def test_upsert_keeps_collection_and_replaces_by_key_in_batches(self):
+        saver = make_saver()
+        collection = saver.db.__getitem__.return_value
+
+        saver.save_playlist_tracks([], {"p1": [playlist_item(t) for t in "abc"]})
+
+        saver.db.drop_collection.assert_not_called()
+        self.assertEqual(3, collection.create_index.call_count)
+        requests = [call.args[0] for call in collection.bulk_write.call_args_list]
+        self.assertEqual([2, 1], [len(batch) for batch in requests])
+        self.assertEqual(
+            ReplaceOne(
+                {"playlist_id": "p1", "id": "a"},
+                requests[0][0]._doc,
+                upsert=True,
+            ),
+            requests[0][0],
+        )
+        self.assertEqual("load-1", requests[0][0]._doc[LOAD_ID_FIELD])
+        for call in collection.bulk_write.call_args_list:
+            self.assertFalse(call.kwargs["ordered"])
+        collection.delete_many.assert_called_once_with({LOAD_ID_FIELD: {"$ne": "load-1"}})
+
+    def test_stale_documents_are_kept_after_failed_or_partial_loads(self):
+        saver = make_saver()
+        collection = saver.db.__getitem__.return_value
+        collection.bulk_write.side_effect = [
+            MagicMock(),
+            BulkWriteError({"writeErrors": [{"index": 0}]}),
+        ]
+
+        saver.save_playlist_tracks([], {"p1": [playlist_item(t) for t in "abc"]})
+        collection.bulk_write.side_effect = None
+        saver.save_artists([])
+        saver.save_albums([{"id": "a", "artists": [{"name": "a"}]}, {"id": "b"}])
+
+        collection.delete_many.assert_not_called()
+
+    def test_reload_mode_recreates_collection(self):
+        saver = make_saver(upsert=False)
+
+        saver.save_playlist_tracks([], {"p1": [playlist_item("a")]})
+
+        saver.db.drop_collection.assert_called_once_with(PLAYLIST_TRACK_COLLECTION.name)
+        collection = saver.db.create_collection.return_value
+        collection.insert_many.assert_called_once()
+        collection.insert_one.assert_not_called()
+        self.assertEqual(
+            ["playlist_track_index", "name_sort_index", "playlist_id_sort_index"],
+            [call.kwargs["name"] for call in collection.create_index.call_args_list],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,435 @@
+"""Serve the API's library listings straight from the ``spot_*`` tables.
+
+An alternative to the in-memory lists the API loads from the snapshot zips:
+every listing is one query through an asyncpg pool, so API workers start
+instantly and hold none of the library in memory. Pages are keyset paginated
+on ``(sort key, id)``; each response carries a ``next_cursor`` to pass back as
+``cursor``. Plain ``page`` numbers still work (with an OFFSET) for clients that
+don't send a cursor. The counts behind ``total`` and ``total_filtered`` are
+cached for ``COUNT_CACHE_SECONDS``, so paging through a listing costs one
+query per page rather than up to three. Name search uses ILIKE, which the ``pg_trgm`` GIN indexes
+from ``schema/migrations`` serve without a sequential scan; the artist, genre
+and year filters use the reverse lookup, genre and ``release_year`` indexes.
+"""
+import base64
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+from pydantic import BaseModel
+
+from spotify.spotify_postgres_rows import (
+    ALBUMS_TABLE,
+    ALBUM_ARTISTS_TABLE,
+    ARTISTS_TABLE,
+    PLAYLISTS_TABLE,
+    TRACKS_TABLE,
+    TRACK_ARTISTS_TABLE,
+)
+from spotify.spotify_postgres_stats import stats_query
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+# totals only change on ingestion, so a slightly stale count is fine
+COUNT_CACHE_SECONDS = 60
+MAX_CACHED_COUNTS = 1024
+
+TRACK_ARTISTS_JSON = (
+    "SELECT COALESCE(json_agg(json_build_object('id', a.id, 'name', a.name) ORDER BY a.name), '[]') "
+    f"FROM {TRACK_ARTISTS_TABLE} ta JOIN {ARTISTS_TABLE} a ON a.id = ta.artist_id "
+    "WHERE ta.track_id = t.id"
+)
+ALBUM_ARTISTS_JSON = (
+    "SELECT COALESCE(json_agg(json_build_object('id', a.id, 'name', a.name) ORDER BY a.name), '[]') "
+    f"FROM {ALBUM_ARTISTS_TABLE} aa JOIN {ARTISTS_TABLE} a ON a.id = aa.artist_id "
+    "WHERE aa.album_id = al.id"
+)
+TRACK_ARTISTS_JOINED = (
+    "SELECT COALESCE(string_agg(a.name, ', ' ORDER BY a.name), '') "
+    f"FROM {TRACK_ARTISTS_TABLE} ta JOIN {ARTISTS_TABLE} a ON a.id = ta.artist_id "
+    "WHERE ta.track_id = t.id"
+)
+ALBUM_ARTISTS_JOINED = (
+    "SELECT COALESCE(string_agg(a.name, ', ' ORDER BY a.name), '') "
+    f"FROM {ALBUM_ARTISTS_TABLE} aa JOIN {ARTISTS_TABLE} a ON a.id = aa.artist_id "
+    "WHERE aa.album_id = al.id"
+)
+
+TRACKS_QUERY = f"""
+    SELECT t.id, t.name, t.duration_ms, t.preview_url,
+           al.name AS album_name, al.image AS album_image, al.release_date,
+           al.album_type, al.total_tracks,
+           ({TRACK_ARTISTS_JSON}) AS artists,
+           {{sort_key}} AS sort_key
+    FROM {TRACKS_TABLE} t
+    LEFT JOIN {ALBUMS_TABLE} al ON al.id = t.album_id
+"""
+TRACK_SORT_KEYS = {
+    "name": "lower(t.name)",
+    "duration": "t.duration_ms",
+    "artists_joined": f"lower(({TRACK_ARTISTS_JOINED}))",
+}
+TRACK_SEARCH = (
+    "(t.name ILIKE {param} OR al.name ILIKE {param} OR EXISTS ("
+    f"SELECT 1 FROM {TRACK_ARTISTS_TABLE} ta JOIN {ARTISTS_TABLE} a ON a.id = ta.artist_id "
+    "WHERE ta.track_id = t.id AND a.name ILIKE {param}))"
+)
+
+ALBUMS_QUERY = f"""
+    SELECT al.id, al.name, al.image, al.release_date, al.release_date_precision,
+           al.album_type, al.label, al.total_tracks,
+           ({ALBUM_ARTISTS_JSON}) AS artists,
+           {{sort_key}} AS sort_key
+    FROM {ALBUMS_TABLE} al
+"""
+ALBUM_SORT_KEYS = {
+    "name": "lower(al.name)",
+    "artist": f"lower(({ALBUM_ARTISTS_JOINED}))",
+}
+ALBUM_SEARCH = (
+    "(al.name ILIKE {param} OR EXISTS ("
+    f"SELECT 1 FROM {ALBUM_ARTISTS_TABLE} aa JOIN {ARTISTS_TABLE} a ON a.id = aa.artist_id "
+    "WHERE aa.album_id = al.id AND a.name ILIKE {param}))"
+)
+
+ARTISTS_QUERY = f"""
+    SELECT ar.id, ar.name, ar.image, ar.genres, ar.popularity, ar.followers,
+           {{sort_key}} AS sort_key
+    FROM {ARTISTS_TABLE} ar
+"""
+# artists embedded in albums and tracks are stored without followers
+ARTIST_FILTER = "ar.followers IS NOT NULL"
+ARTIST_SORT_KEYS = {"name": "lower(ar.name)"}
+ARTIST_SEARCH = "ar.name ILIKE {param}"
+
+TRACK_ARTIST_FILTER = (
+    f"EXISTS (SELECT 1 FROM {TRACK_ARTISTS_TABLE} ta "
+    "WHERE ta.track_id = t.id AND ta.artist_id = {param})"
+)
+ALBUM_ARTIST_FILTER = (
+    f"EXISTS (SELECT 1 FROM {ALBUM_ARTISTS_TABLE} aa "
+    "WHERE aa.album_id = al.id AND aa.artist_id = {param})"
+)
+
+PLAYLISTS_QUERY = f"""
+    SELECT p.id, p.name, p.uri, p.description, p.owner, p.public, p.tracks_count,
+           p.external_urls, {{sort_key}} AS sort_key
+    FROM {PLAYLISTS_TABLE} p
+"""
+PLAYLIST_SORT_KEYS = {"name": "lower(p.name)"}
+PLAYLIST_SEARCH = "(p.name ILIKE {param} OR p.description ILIKE {param})"
+
+GENRES_QUERY = f"""
+    SELECT DISTINCT jsonb_array_elements_text(genres) AS genre
+    FROM {ARTISTS_TABLE}
+    WHERE genres IS NOT NULL
+    ORDER BY genre
+"""
+
+
+class LibraryPage(BaseModel):
+    """One page of a listing, plus what the client needs to fetch the next."""
+
+    items: List[Dict[str, Any]]
+    total: int
+    total_filtered: int
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_key: Any, item_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_key, item_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        sort_key, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return sort_key, item_id
+
+
+def like_pattern(search: str) -> str:
+    """An ILIKE pattern matching ``search`` anywhere, with wildcards escaped."""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def build_filtered_query(
+    query: str, sort_key: str, conditions: Optional[List[Tuple[str, Any]]] = None
+) -> Tuple[str, List[Any]]:
+    """``query`` with its ``{sort_key}`` filled in and ``conditions`` applied.
+
+    ``conditions`` are ``(sql, value)`` pairs; the ``{param}`` placeholder in
+    the sql is replaced by the value's positional parameter, and a ``None``
+    value means the sql takes no parameter.
+    """
+    args: List[Any] = []
+    where = []
+    for condition, value in conditions or []:
+        if value is None:
+            where.append(condition)
+            continue
+        args.append(value)
+        where.append(condition.format(param=f"${len(args)}"))
+
+    sql = query.format(sort_key=sort_key)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql, args
+
+
+def build_page_query(
+    query: str,
+    sort_keys: Dict[str, str],
+    field: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: int = 12,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    conditions: Optional[List[Tuple[str, Any]]] = None,
+) -> Tuple[str, List[Any]]:
+    """SQL and arguments for one keyset paginated page of ``query``.
+
+    The sort key comes from ``sort_keys[field]``, falling back to the name.
+    One extra row is fetched to tell whether there is a next page.
+    """
+    sort_key = sort_keys.get(field or "name", sort_keys["name"])
+    descending = sort == "desc"
+    sql, args = build_filtered_query(query, sort_key, conditions)
+    sql = f"SELECT * FROM ({sql}) page"
+
+    if cursor:
+        last_sort_key, last_id = decode_cursor(cursor)
+        args += [last_sort_key, last_id]
+        operator = "<" if descending else ">"
+        sql += f" WHERE (page.sort_key, page.id) {operator} (${len(args) - 1}, ${len(args)})"
+    direction = "DESC" if descending else "ASC"
+    sql += f" ORDER BY page.sort_key {direction}, page.id {direction}"
+
+    args.append(page_size(limit) + 1)
+    sql += f" LIMIT ${len(args)}"
+    if not cursor and page > 1:
+        args.append((page - 1) * page_size(limit))
+        sql += f" OFFSET ${len(args)}"
+    return sql, args
+
+
+def build_count_query(
+    query: str, conditions: Optional[List[Tuple[str, Any]]] = None
+) -> Tuple[str, List[Any]]:
+    sql, args = build_filtered_query(query, "NULL", conditions)
+    return f"SELECT count(*) FROM ({sql}) counted", args
+
+
+def page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def json_column(value: Any, default: Any) -> Any:
+    if value is None:
+        return default
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def images(url: Optional[str]) -> List[Dict[str, Any]]:
+    return [{"url": url}] if url else []
+
+
+def track_item(record) -> Dict[str, Any]:
+    artists = json_column(record["artists"], [])
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "artists": artists,
+        "duration_ms": record["duration_ms"],
+        "artists_joined": ", ".join(artist["name"] for artist in artists),
+        "_album": {
+            "name": record["album_name"] or "",
+            "images": images(record["album_image"]),
+            "release_date": record["release_date"] or "",
+            "album_type": record["album_type"] or "",
+            "total_tracks": record["total_tracks"] or 0,
+        },
+        "preview_url": record["preview_url"] or "",
+        "track_number": 0,
+        "disc_number": 0,
+    }
+
+
+def album_item(record) -> Dict[str, Any]:
+    artists = json_column(record["artists"], [])
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "artists": artists,
+        "images": images(record["image"]),
+        "release_date": record["release_date"],
+        "artists_joined": ", ".join(artist["name"] for artist in artists),
+        "album_type": record["album_type"],
+        "label": record["label"] or "",
+        "total_tracks": record["total_tracks"],
+        "release_date_precision": record["release_date_precision"] or "",
+    }
+
+
+def artist_item(record) -> Dict[str, Any]:
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "images": images(record["image"]),
+        "followers": {"total": record["followers"]},
+        "genres": json_column(record["genres"], []),
+        "popularity": record["popularity"] or 0,
+        "artists_joined": record["name"],
+    }
+
+
+def playlist_item(record) -> Dict[str, Any]:
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "uri": record["uri"],
+        "description": record["description"] or "",
+        "owner": {"display_name": record["owner"]},
+        "public": record["public"],
+        "tracks": {"total": record["tracks_count"]},
+        "external_urls": json_column(record["external_urls"], {}),
+    }
+
+
+class PostgresLibrary:
+    """Read only, paginated access to the saved library in Postgres."""
+
+    def __init__(
+        self, pool: asyncpg.Pool, count_cache_seconds: float = COUNT_CACHE_SECONDS
+    ) -> None:
+        self.pool = pool
+        self.count_cache_seconds = count_cache_seconds
+        self._counts: Dict[Tuple[str, Tuple[Any, ...]], Tuple[float, int]] = {}
+
+    async def _count(self, conn, query: str, conditions: List[Tuple[str, Any]]) -> int:
+        sql, args = build_count_query(query, conditions)
+        key = (sql, tuple(args))
+        cached = self._counts.get(key)
+        if cached and time.monotonic() - cached[0] < self.count_cache_seconds:
+            return cached[1]
+        count = await conn.fetchval(sql, *args)
+        if len(self._counts) >= MAX_CACHED_COUNTS:
+            self._counts.clear()
+        self._counts[key] = (time.monotonic(), count)
+        return count
+
+    async def _page(
+        self,
+        query: str,
+        sort_keys: Dict[str, str],
+        to_item,
+        conditions: List[Tuple[str, Any]],
+        base_conditions: Optional[List[Tuple[str, Any]]] = None,
+        **page_args,
+    ) -> LibraryPage:
+        base_conditions = base_conditions or []
+        # filters the client didn't ask for are left out altogether
+        conditions = base_conditions + [
+            (condition, value) for condition, value in conditions if value is not None
+        ]
+        sql, args = build_page_query(query, sort_keys, conditions=conditions, **page_args)
+        logger.debug(f"Library page query: {sql} {args}")
+        async with self.pool.acquire() as conn:
+            records = await conn.fetch(sql, *args)
+            total = await self._count(conn, query, base_conditions)
+            if len(conditions) > len(base_conditions):
+                total_filtered = await self._count(conn, query, conditions)
+            else:
+                total_filtered = total
+
+        limit = page_size(page_args.get("limit", 12))
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            next_cursor = encode_cursor(last["sort_key"], last["id"])
+        return LibraryPage(
+            items=[to_item(record) for record in records],
+            total=total,
+            total_filtered=total_filtered,
+            next_cursor=next_cursor,
+        )
+
+    async def get_tracks(
+        self,
+        search: Optional[str] = None,
+        artist_id: Optional[str] = None,
+        album_id: Optional[str] = None,
+        **page_args,
+    ) -> LibraryPage:
+        search = like_pattern(search) if search else None
+        return await self._page(
+            TRACKS_QUERY,
+            TRACK_SORT_KEYS,
+            track_item,
+            [
+                (TRACK_SEARCH, search),
+                (TRACK_ARTIST_FILTER, artist_id),
+                ("t.album_id = {param}", album_id),
+            ],
+            **page_args,
+        )
+
+    async def get_albums(
+        self,
+        search: Optional[str] = None,
+        type: Optional[str] = None,
+        artist_id: Optional[str] = None,
+        year: Optional[int] = None,
+        **page_args,
+    ) -> LibraryPage:
+        search = like_pattern(search) if search else None
+        return await self._page(
+            ALBUMS_QUERY,
+            ALBUM_SORT_KEYS,
+            album_item,
+            [
+                (ALBUM_SEARCH, search),
+                ("al.album_type = {param}", type),
+                (ALBUM_ARTIST_FILTER, artist_id),
+                ("al.release_year = {param}", year),
+            ],
+            **page_args,
+        )
+
+    async def get_artists(
+        self, search: Optional[str] = None, genre: Optional[str] = None, **page_args
+    ) -> LibraryPage:
+        search = like_pattern(search) if search else None
+        return await self._page(
+            ARTISTS_QUERY,
+            ARTIST_SORT_KEYS,
+            artist_item,
+            [(ARTIST_SEARCH, search), ("ar.genres ? {param}", genre)],
+            base_conditions=[(ARTIST_FILTER, None)],
+            **page_args,
+        )
+
+    async def get_playlists(self, search: Optional[str] = None, **page_args) -> LibraryPage:
+        search = like_pattern(search) if search else None
+        return await self._page(
+            PLAYLISTS_QUERY,
+            PLAYLIST_SORT_KEYS,
+            playlist_item,
+            [(PLAYLIST_SEARCH, search)],
+            **page_args,
+        )
+
+    async def get_genres(self) -> List[str]:
+        async with self.pool.acquire() as conn:
+            return [record["genre"] for record in await conn.fetch(GENRES_QUERY)]
+
+    async def get_stats(self, name: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Rows of one of the ``STATS_VIEWS`` materialized views."""
+        async with self.pool.acquire() as conn:
+            records = await conn.fetch(stats_query(name), page_size(limit))
+        return [dict(record) for record in records]
@@ -0,0 +1,140 @@
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.config import app
+from app.dependencies import get_library
+from spotify.spotify_postgres_stats import TOP_GENRES
+from storage.postgres.spotify_library_postgres import (
+    TRACK_SORT_KEYS,
+    TRACKS_QUERY,
+    PostgresLibrary,
+    build_page_query,
+    decode_cursor,
+    encode_cursor,
+    like_pattern,
+)
+
+
+class FakeConnection:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    async def fetch(self, sql, *args):
+        self.queries.append((sql, args))
+        return self.records
+
+    async def fetchval(self, sql, *args):
+        self.queries.append((sql, args))
+        return 10
+
+
+class FakePool:
+    def __init__(self, records):
+        self.conn = FakeConnection(records)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def artist_record(artist_id):
+    return {
+        "id": artist_id,
+        "name": artist_id.upper(),
+        "image": None,
+        "genres": '["rock"]',
+        "popularity": 1,
+        "followers": 2,
+        "sort_key": artist_id,
+    }
+
+
+class BuildPageQueryTest(unittest.TestCase):
+    def test_cursor_continues_after_last_row(self):
+        cursor = encode_cursor("abba", "id1")
+
+        sql, args = build_page_query(
+            TRACKS_QUERY,
+            TRACK_SORT_KEYS,
+            sort="desc",
+            limit=20,
+            cursor=cursor,
+            conditions=[("t.name ILIKE {param}", like_pattern("a"))],
+        )
+
+        self.assertEqual(("abba", "id1"), decode_cursor(cursor))
+        self.assertIn("t.name ILIKE $1", sql)
+        self.assertIn("(page.sort_key, page.id) < ($2, $3)", sql)
+        self.assertIn("ORDER BY page.sort_key DESC, page.id DESC LIMIT $4", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertEqual(["%a%", "abba", "id1", 21], args)
+
+    def test_page_number_without_cursor_uses_offset(self):
+        sql, args = build_page_query(
+            TRACKS_QUERY, TRACK_SORT_KEYS, field="duration", page=3, limit=10
+        )
+
+        self.assertIn("t.duration_ms AS sort_key", sql)
+        self.assertTrue(sql.endswith("LIMIT $1 OFFSET $2"))
+        self.assertEqual([11, 20], args)
+
+    def test_like_wildcards_are_escaped(self):
+        self.assertEqual("%100\\%\\_%", like_pattern("100%_"))
+
+
+class PostgresLibraryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_extra_row_becomes_next_cursor(self):
+        library = PostgresLibrary(FakePool([artist_record(i) for i in "abc"]))
+
+        page = await library.get_artists(limit=2, genre="rock")
+
+        self.assertEqual(["a", "b"], [artist["id"] for artist in page.items])
+        self.assertEqual(["rock"], page.items[0]["genres"])
+        self.assertEqual(("b", "b"), decode_cursor(page.next_cursor))
+        page_sql, page_args = library.pool.conn.queries[0]
+        self.assertIn("ar.followers IS NOT NULL AND ar.genres ? $1", page_sql)
+        self.assertEqual(("rock", 3), page_args)
+
+    async def test_last_page_has_no_cursor(self):
+        library = PostgresLibrary(FakePool([artist_record("a")]))
+
+        page = await library.get_artists(limit=2)
+
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual((10, 10), (page.total, page.total_filtered))
+
+    async def test_totals_are_counted_once_per_filter(self):
+        library = PostgresLibrary(FakePool([artist_record("a")]))
+
+        await library.get_artists(limit=2, genre="rock")
+        await library.get_artists(limit=2, genre="rock", cursor=encode_cursor("a", "a"))
+        await library.get_artists(limit=2, genre="pop")
+
+        counts = [sql for sql, _ in library.pool.conn.queries if "count(*)" in sql]
+        self.assertEqual(3, len(counts))
+
+    async def test_invalid_cursor_is_a_bad_request(self):
+        library = PostgresLibrary(FakePool([]))
+        with patch.object(app, "library", library, create=True):
+            self.assertIs(library, get_library(encode_cursor("a", "a")))
+            with self.assertRaises(HTTPException) as raised:
+                get_library("not a cursor")
+        self.assertEqual(400, raised.exception.status_code)
+
+    async def test_stats_read_the_materialized_view(self):
+        library = PostgresLibrary(FakePool([{"genre": "rock", "track_count": 3}]))
+
+        stats = await library.get_stats(TOP_GENRES, limit=5)
+
+        self.assertEqual([{"genre": "rock", "track_count": 3}], stats)
+        sql, args = library.pool.conn.queries[0]
+        self.assertIn("FROM spot_stats_top_genres ORDER BY track_count DESC", sql)
+        self.assertEqual((5,), args)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,54 +1,83 @@
 import asyncio
-import json
 import logging
-import os
-from typing import List
-
-import asyncpg
+from typing import AsyncIterator, Dict, List, Optional, Sequence
 
+from postgres.postgres_driver import close_shared_pools, get_shared_pool
 from spotify.spotify_utils import setup_app_logging
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1000
+
+
+def quote_identifier(name: str) -> str:
+    return '"%s"' % name.replace('"', '""')
+
 
 class SpotifyFromPostgres:
+    """Read saved Spotify data back out of Postgres.
 
-    def __init__(self) -> None:
+    Tables are streamed through a server-side cursor, ``chunk_size`` rows at
+    a time, so memory stays flat however large the table is. JSON and JSONB
+    columns arrive already decoded by the pool's type codecs.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE) -> None:
         super().__init__()
+        self.chunk_size = chunk_size
 
     async def get_pool(self):
-        pool = await asyncpg.create_pool(
-            database=os.environ.get("POSTGRES_DATABASE", "spotify"),
-            host=os.environ.get("POSTGRES_HOST", "localhost"),
-            port=os.environ.get("POSTGRES_PORT", 5432),
-            # user=os.environ.get("POSTGRES_USER", "postgres"),
-            user=os.environ.get("POSTGRES_USER", "simon"),
-            password=os.environ.get("POSTGRES_PASSWORD"),
-        )
-        return pool
+        return await get_shared_pool()
 
-    async def get_liked_artists(self) -> list[dict]:
+    async def stream_table(
+        self,
+        table_name: str,
+        columns: Optional[Sequence[str]] = None,
+        order_by: str = "id",
+    ) -> AsyncIterator[List[Dict]]:
+        """Yield the table's rows as lists of dicts, one chunk at a time."""
+        column_list = ", ".join(map(quote_identifier, columns)) if columns else "*"
+        query = "SELECT %s FROM %s ORDER BY %s" % (
+            column_list,
+            quote_identifier(table_name),
+            quote_identifier(order_by),
+        )
         pool = await self.get_pool()
         async with pool.acquire() as conn:
-            artists: List[asyncpg.Record] = await conn.fetch("SELECT * FROM artists;")
-            artists_out: List[dict] = []
-            # TODO change messy
-            for artist in artists:
-                artist_out = dict(artist)
-                for key, value in artist_out.items():
-                    if key == "images":
-                        value = json.loads(value)
-                        artist_out[key] = value
-                    print(f"{key} = {value}, type = {type(value)}")
-                artists_out.append(artist_out)
+            # server-side cursors only live inside a transaction
+            async with conn.transaction(readonly=True):
+                cursor = await conn.cursor(query)
+                while True:
+                    records = await cursor.fetch(self.chunk_size)
+                    if not records:
+                        break
+                    yield [dict(record) for record in records]
+
+    def stream_artists(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        return self.stream_table("artists", **kwargs)
+
+    def stream_albums(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        return self.stream_table("albums", **kwargs)
 
-            return artists_out
+    def stream_tracks(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        return self.stream_table("tracks", **kwargs)
+
+    def stream_playlists(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        return self.stream_table("playlists", **kwargs)
+
+    async def get_liked_artists(self) -> list[dict]:
+        artists_out: List[dict] = []
+        async for artists in self.stream_artists():
+            artists_out.extend(artists)
+        logger.debug(f"Read {len(artists_out)} artists")
+        return artists_out
 
 
 async def main():
     setup_app_logging(logger, logging.DEBUG)
     spotify_from_postgres: SpotifyFromPostgres = SpotifyFromPostgres()
     liked_artists = await spotify_from_postgres.get_liked_artists()
+    await close_shared_pools()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+import unittest
+from contextlib import asynccontextmanager
+
+from storage.postgres.spotify_read_from_postgres import SpotifyFromPostgres
+
+
+class FakeCursor:
+    def __init__(self, records):
+        self.records = records
+        self.fetch_sizes = []
+
+    async def fetch(self, size):
+        self.fetch_sizes.append(size)
+        chunk, self.records = self.records[:size], self.records[size:]
+        return chunk
+
+
+class FakeConnection:
+    def __init__(self, records):
+        self.cursor_ = FakeCursor(records)
+        self.queries = []
+        self.in_transaction = False
+
+    @asynccontextmanager
+    async def transaction(self, readonly=False):
+        self.in_transaction = True
+        yield
+        self.in_transaction = False
+
+    async def cursor(self, query):
+        assert self.in_transaction
+        self.queries.append(query)
+        return self.cursor_
+
+
+class FakePool:
+    def __init__(self, records):
+        self.conn = FakeConnection(records)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class SpotifyFromPostgresTest(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_table_in_chunks(self):
+        pool = FakePool([{"id": i, "images": [{"url": "u"}]} for i in range(5)])
+        reader = SpotifyFromPostgres(chunk_size=2)
+        reader.get_pool = lambda: _return(pool)
+
+        chunks = [chunk async for chunk in reader.stream_artists(columns=["id", "images"])]
+
+        self.assertEqual([2, 2, 1], [len(chunk) for chunk in chunks])
+        self.assertEqual([{"url": "u"}], chunks[0][0]["images"])
+        self.assertEqual(
+            ['SELECT "id", "images" FROM "artists" ORDER BY "id"'], pool.conn.queries
+        )
+
+
+async def _return(value):
+    return value
+
+
+if __name__ == "__main__":
+    unittest.main()
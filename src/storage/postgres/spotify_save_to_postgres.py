@@ -1,17 +1,17 @@
 import asyncio
-import json
 import logging
 import os
 from configparser import ConfigParser
 
-import asyncpg
-
+from postgres.postgres_driver import close_shared_pools, get_shared_pool
 from spotify.spotify_save import SpotifySave
 from spotify.spotify_utils import (
     setup_app_logging,
     unzip_data_from_zip,
     most_recent_directory, get_config_location,
 )
+from utils.metrics import dump_metrics, record_ingest
+from utils.tracing import traced
 
 BATCH_SIZE = 500
 
@@ -59,6 +59,7 @@ class SpotifyToPostgres(SpotifySave):
                 + self.individual_playlist_location
             )
 
+    @traced()
     async def save_all_data(self, all_data: dict):
         most_recent = most_recent_directory(self.raw_data_location)
         await self.save_artists(
@@ -88,15 +89,19 @@ class SpotifyToPostgres(SpotifySave):
         # await self.save_unique_artists_in_playlists(unzip_data_from_zip(f"{self.raw_data_location}/{most_recent}/unique_playlist_artists.gz"))
         #
 
+    @traced(count="unique_artists_in_playlists")
     def save_unique_artists_in_playlists(self, unique_artists_in_playlists: dict):
         pass
 
+    @traced(count="playlists")
     def save_playlist_tracks(self, playlists: list, playlist_tracks: dict):
         pass
 
+    @traced(count="playlists")
     def save_playlist_details(self, playlists: list, playlist_tracks: dict):
         pass
 
+    @traced(count="tracks")
     async def save_album_tracks(self, tracks: list):
         pass
 
@@ -132,35 +137,36 @@ class SpotifyToPostgres(SpotifySave):
             print(artist_id)
             return artist_id
 
+    @traced(count="artists")
     async def save_artists(self, artists: list):
         logger.info("save_artists_to_postgres")
         pool = await self.get_pool()
         async with pool.acquire() as conn:
             async with conn.transaction():
                 for batch in self._artist_batches(artists):
-                    await conn.executemany(
-                        "INSERT INTO artists (name, external_urls, followers, genres, href, images, popularity, type, uri) "
-                        "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9) "
-                        "ON CONFLICT (uri) DO NOTHING;",
-                        [
-                            (
-                                artist["name"],
-                                json.dumps(artist["external_urls"]),
-                                json.dumps(artist["followers"]),
-                                artist["genres"],
-                                artist["href"],
-                                json.dumps(artist["images"]),
-                                artist["popularity"],
-                                artist["type"],
-                                artist["uri"],
-                            )
-                            for artist in batch
-                        ],
-                    )
+                    with record_ingest("artists", len(batch)):
+                        await conn.executemany(
+                            "INSERT INTO artists (name, external_urls, followers, genres, href, images, popularity, type, uri) "
+                            "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9) "
+                            "ON CONFLICT (uri) DO NOTHING;",
+                            [
+                                (
+                                    artist["name"],
+                                    artist["external_urls"],
+                                    artist["followers"],
+                                    artist["genres"],
+                                    artist["href"],
+                                    artist["images"],
+                                    artist["popularity"],
+                                    artist["type"],
+                                    artist["uri"],
+                                )
+                                for artist in batch
+                            ],
+                        )
                     print(f"Inserted {len(batch)} artists")
 
-        await pool.close()
-
+    @traced(count="albums")
     async def save_albums(self, albums: list):
         logger.info("save_albums_to_postgres")
         pool = await self.get_pool()
@@ -169,62 +175,63 @@ class SpotifyToPostgres(SpotifySave):
         async with pool.acquire() as conn:
             async with conn.transaction():
                 for batch in self._album_batches(albums):
-                    await conn.executemany(
-                        "INSERT INTO albums (album_type, artists, external_urls, href, "
-                        "images, name, release_date, release_date_precision, total_tracks, uri) "
-                        "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10) "
-                        "ON CONFLICT (uri) DO NOTHING;",
-                        [
-                            (
-                                album["album_type"],
-                                json.dumps(album["artists"]),
-                                json.dumps(album["external_urls"]),
-                                album["href"],
-                                json.dumps(album["images"]),
-                                album["name"],
-                                album["release_date"],
-                                album["release_date_precision"],
-                                album["total_tracks"],
-                                album["uri"],
-                            )
-                            for album in batch
-                        ],
-                    )
+                    with record_ingest("albums", len(batch)):
+                        await conn.executemany(
+                            "INSERT INTO albums (album_type, artists, external_urls, href, "
+                            "images, name, release_date, release_date_precision, total_tracks, uri) "
+                            "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10) "
+                            "ON CONFLICT (uri) DO NOTHING;",
+                            [
+                                (
+                                    album["album_type"],
+                                    album["artists"],
+                                    album["external_urls"],
+                                    album["href"],
+                                    album["images"],
+                                    album["name"],
+                                    album["release_date"],
+                                    album["release_date_precision"],
+                                    album["total_tracks"],
+                                    album["uri"],
+                                )
+                                for album in batch
+                            ],
+                        )
                     print(f"Inserted {len(batch)} albums")
 
-        await pool.close()
-
+    @traced(count="tracks")
     async def save_tracks(self, tracks: list):
         logger.info("save_tracks_to_postgres")
         pool = await self.get_pool()
         async with pool.acquire() as conn:
             async with conn.transaction():
                 for batch in self._track_batches(tracks):
-                    await conn.executemany(
-                        "INSERT INTO tracks (album, artists, available_markets, disc_number, duration_ms, explicit, "
-                        "external_urls, href, name, popularity, preview_url, track_number, type, uri) "
-                        "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14) "
-                        "ON CONFLICT (uri) DO NOTHING;",
-                        [
-                            (
-                                json.dumps(track["album"]),
-                                json.dumps(track["artists"]),
-                                track["available_markets"],
-                                track["disc_number"],
-                                track["duration_ms"],
-                                track["explicit"],
-                                json.dumps(track["external_urls"]),
-                                track["href"],
-                                track["name"],
-                                track["popularity"],
-                                track["preview_url"],
-                                track["track_number"],
-                                track["type"],
-                                track["uri"],
-                            )
-                            for track in batch
-                        ],
-                    )
+                    with record_ingest("tracks", len(batch)):
+                        await conn.executemany(
+                            "INSERT INTO tracks (album, artists, available_markets, disc_number, duration_ms, explicit, "
+                            "external_urls, href, name, popularity, preview_url, track_number, type, uri) "
+                            "VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14) "
+                            "ON CONFLICT (uri) DO NOTHING;",
+                            [
+                                (
+                                    track["album"],
+                                    track["artists"],
+                                    track["available_markets"],
+                                    track["disc_number"],
+                                    track["duration_ms"],
+                                    track["explicit"],
+                                    track["external_urls"],
+                                    track["href"],
+                                    track["name"],
+                                    track["popularity"],
+                                    track["preview_url"],
+                                    track["track_number"],
+                                    track["type"],
+                                    track["uri"],
+                                )
+                                for track in batch
+                            ],
+                        )
                     print(f"Inserted {len(batch)} tracks")
 
     def _album_batches(self, albums):
@@ -241,21 +248,14 @@ class SpotifyToPostgres(SpotifySave):
             yield [track for track in tracks[i: i + BATCH_SIZE]]
 
     async def get_pool(self):
-        pool = await asyncpg.create_pool(
-            database=os.environ.get("POSTGRES_DATABASE", "spotify"),
-            host=os.environ.get("POSTGRES_HOST", "localhost"),
-            port=os.environ.get("POSTGRES_PORT", 5432),
-            # user=os.environ.get("POSTGRES_USER", "postgres"),
-            # TODO fix this
-            user=os.environ.get("POSTGRES_USER", "simon"),
-            password=os.environ.get("POSTGRES_PASSWORD"),
-        )
-        return pool
+        return await get_shared_pool()
 
+    @traced(count="playlists")
     def save_individual_playlists(self, playlists: list, playlist_tracks: dict):
         # not implemented
         pass
 
+    @traced(count="unique_tracks_in_playlists")
     def save_unique_tracks_in_playlists(self, unique_tracks_in_playlists: dict):
         # not implemented
         pass
@@ -267,7 +267,16 @@ def main():
 
     spotify_to_postgres: SpotifyToPostgres = SpotifyToPostgres()
 
-    asyncio.run(spotify_to_postgres.save_all_data({}))
+    async def save_and_close():
+        try:
+            await spotify_to_postgres.save_all_data({})
+        finally:
+            await close_shared_pools()
+
+    try:
+        asyncio.run(save_and_close())
+    finally:
+        dump_metrics()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+"""In-process metrics for the hot paths, rendered in the Prometheus text format.
+
+Counters, gauges and histograms are kept per label set in a process-wide
+``REGISTRY``. The FastAPI app serves them at ``/metrics``. The CLI exporters
+write them to ``$METRICS_FILE`` when they finish, if it is set.
+
+Metrics are per process. Work done in worker processes (decoding snapshots
+for the file exporter or the Postgres ingestor) is not counted in the parent.
+
+The metrics recorded across the code base are defined at the bottom of this
+module, so every label set for a name lives in one place.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = "METRICS_FILE"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Prometheus' own defaults, for things that take milliseconds to seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# loads and writes that can take minutes on a large library
+SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, "Metric"] = {}
+        # called before rendering, to refresh gauges sampled on demand
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: "Metric") -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Forget every recorded value, e.g. between tests."""
+        for metric in self.metrics.values():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values: Dict[LabelValues, object] = {}
+        registry.register(self)
+
+    def label_values(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.values.clear()
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(name suffix, formatted labels, value) for every recorded value."""
+        with self.lock:
+            values = dict(self.values)
+        for label_values, value in sorted(values.items()):
+            yield "", format_labels(self.labelnames, label_values), value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name} can only go up, got {amount}")
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self.label_values(labels), 0)
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self.label_values(labels), 0)
+
+
+class HistogramValue:
+    def __init__(self, num_buckets: int) -> None:
+        # per bucket, not cumulative; rendering adds them up
+        self.bucket_counts = [0] * num_buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self.label_values(labels)
+        bucket = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self.lock:
+            histogram_value = self.values.get(key)
+            if histogram_value is None:
+                histogram_value = self.values[key] = HistogramValue(len(self.buckets))
+            histogram_value.bucket_counts[bucket] += 1
+            histogram_value.sum += value
+            histogram_value.count += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the ``with`` block takes, even when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self.lock:
+            histogram_value = self.values.get(self.label_values(labels))
+            return histogram_value.count if histogram_value else 0
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self.lock:
+            values = {
+                key: (list(value.bucket_counts), value.sum, value.count)
+                for key, value in self.values.items()
+            }
+        labelnames = self.labelnames + ("le",)
+        for label_values, (bucket_counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                yield "_bucket", format_labels(
+                    labelnames, label_values + (format_value(bound),)
+                ), cumulative
+            labels = format_labels(self.labelnames, label_values)
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def dump_metrics(file_name: Optional[str] = None) -> None:
+    """Write the metrics to ``file_name``, or to ``$METRICS_FILE`` when that
+    is set; the CLI exporters call this when they finish."""
+    file_name = file_name or os.environ.get(METRICS_FILE)
+    if not file_name:
+        return
+    with open(file_name, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    logger.info(f"Wrote metrics to {file_name}")
+
+
+@contextmanager
+def record_ingest(table: str, rows: int) -> Iterator[None]:
+    """Count ``rows`` written to ``table`` by the ``with`` block, and how fast."""
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    INGEST_ROWS.inc(rows, table=table)
+    INGEST_SECONDS.observe(seconds, table=table)
+    if seconds > 0:
+        INGEST_ROWS_PER_SECOND.set(rows / seconds, table=table)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template",
+    ("method", "route", "status"),
+)
+RATE_LIMITER_WAIT_SECONDS = Histogram(
+    "rate_limiter_wait_seconds",
+    "Time spent waiting for a rate limiter token",
+    ("limiter",),
+    buckets=(0.001, 0.01, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+RATE_LIMITER_TOKENS = Counter(
+    "rate_limiter_tokens_total",
+    "Rate limiter token requests, granted or denied (had to wait)",
+    ("limiter", "outcome"),
+)
+SPOTIFY_API_SECONDS = Histogram(
+    "spotify_api_request_duration_seconds",
+    "Spotify Web API call latency by spotipy method and HTTP status",
+    ("endpoint", "status"),
+)
+SNAPSHOT_LOAD_SECONDS = Histogram(
+    "snapshot_load_duration_seconds",
+    "Time to read and decode a snapshot file",
+    ("data_type",),
+    buckets=SLOW_BUCKETS,
+)
+SNAPSHOT_WRITE_SECONDS = Histogram(
+    "snapshot_write_duration_seconds",
+    "Time to encode and write a snapshot file",
+    ("data_type",),
+    buckets=SLOW_BUCKETS,
+)
+INGEST_ROWS = Counter(
+    "ingest_rows_total", "Rows written to a database table", ("table",)
+)
+INGEST_SECONDS = Histogram(
+    "ingest_duration_seconds",
+    "Time to write a batch of rows to a database table",
+    ("table",),
+    buckets=SLOW_BUCKETS,
+)
+INGEST_ROWS_PER_SECOND = Gauge(
+    "ingest_rows_per_second",
+    "Throughput of the latest batch written to a database table",
+    ("table",),
+)
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Resident memory of this process")
+
+REGISTRY.add_collector(lambda: PROCESS_RSS.set(psutil.Process().memory_info().rss))
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+from utils.metrics import (
+    INGEST_ROWS,
+    INGEST_SECONDS,
+    METRICS_FILE,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    dump_metrics,
+    record_ingest,
+)
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        REGISTRY.reset()
+
+    def test_counter_and_gauge_render_per_label_set(self):
+        counter = Counter("tokens_total", "Tokens", ("outcome",), self.registry)
+        gauge = Gauge("rss_bytes", "RSS", registry=self.registry)
+
+        counter.inc(outcome="granted")
+        counter.inc(2, outcome="granted")
+        counter.inc(outcome='de"nied\n')
+        gauge.set(1024)
+
+        self.assertEqual(
+            [
+                "# HELP tokens_total Tokens",
+                "# TYPE tokens_total counter",
+                'tokens_total{outcome="de\\"nied\\n"} 1',
+                'tokens_total{outcome="granted"} 3',
+                "# HELP rss_bytes RSS",
+                "# TYPE rss_bytes gauge",
+                "rss_bytes 1024",
+            ],
+            self.registry.render().splitlines(),
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram(
+            "load_seconds", "Load", ("data_type",), buckets=(0.1, 1), registry=self.registry
+        )
+
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value, data_type="saved_tracks")
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('load_seconds_bucket{data_type="saved_tracks",le="0.1"} 1', lines)
+        self.assertIn('load_seconds_bucket{data_type="saved_tracks",le="1"} 3', lines)
+        self.assertIn('load_seconds_bucket{data_type="saved_tracks",le="+Inf"} 4', lines)
+        self.assertIn('load_seconds_sum{data_type="saved_tracks"} 4.25', lines)
+        self.assertIn('load_seconds_count{data_type="saved_tracks"} 4', lines)
+
+    def test_histogram_times_blocks_that_raise(self):
+        histogram = Histogram("call_seconds", "Call", ("status",), registry=self.registry)
+
+        with self.assertRaises(KeyError):
+            with histogram.time(status="error"):
+                raise KeyError()
+
+        self.assertEqual(1, histogram.count(status="error"))
+
+    def test_labels_must_match_the_metric(self):
+        counter = Counter("rows_total", "Rows", ("table",), self.registry)
+
+        with self.assertRaises(ValueError):
+            counter.inc(collection="tracks")
+        with self.assertRaises(ValueError):
+            counter.inc(-1, table="tracks")
+        with self.assertRaises(ValueError):
+            Counter("rows_total", "Rows again", registry=self.registry)
+
+    def test_record_ingest_and_dump(self):
+        with record_ingest("spot_tracks", 500):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "metrics.prom")
+            os.environ[METRICS_FILE] = file_name
+            try:
+                dump_metrics()
+            finally:
+                del os.environ[METRICS_FILE]
+            with open(file_name, encoding="utf-8") as f:
+                text = f.read()
+
+        self.assertEqual(500, INGEST_ROWS.value(table="spot_tracks"))
+        self.assertEqual(1, INGEST_SECONDS.count(table="spot_tracks"))
+        self.assertIn('ingest_rows_total{table="spot_tracks"} 500', text)
+        self.assertIn("process_resident_memory_bytes ", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
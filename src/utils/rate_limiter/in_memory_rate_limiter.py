@@ -1,8 +1,9 @@
 import time
 from threading import Lock
 
-from black import Optional
+from typing import Optional
 
+from utils.metrics import RATE_LIMITER_TOKENS, RATE_LIMITER_WAIT_SECONDS
 from utils.rate_limiter.rate_limiter_interface import RateLimiterInterface, RateLimiterConfig
 
 
@@ -30,8 +31,15 @@ class InMemoryRateLimiter(RateLimiterInterface):
             return False
 
     def wait_for_token(self) -> None:
-        while not self.acquire():
-            time.sleep(0.1)
+        with RATE_LIMITER_WAIT_SECONDS.time(limiter="memory"):
+            denied = False
+            while not self.acquire():
+                # one denial per call that waits, however many times it polls
+                if not denied:
+                    RATE_LIMITER_TOKENS.inc(limiter="memory", outcome="denied")
+                    denied = True
+                time.sleep(0.1)
+        RATE_LIMITER_TOKENS.inc(limiter="memory", outcome="granted")
 
     def get_rate_limit_info(self):
         with self.lock:
@@ -0,0 +1,26 @@
+import unittest
+from unittest.mock import patch
+
+from utils.metrics import RATE_LIMITER_TOKENS, REGISTRY
+from utils.rate_limiter.in_memory_rate_limiter import InMemoryRateLimiter
+
+
+class InMemoryRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+
+    @patch("utils.rate_limiter.in_memory_rate_limiter.time.sleep")
+    def test_a_call_that_waits_is_denied_once(self, sleep):
+        limiter = InMemoryRateLimiter()
+
+        with patch.object(limiter, "acquire", side_effect=[False, False, False, True]):
+            limiter.wait_for_token()
+        limiter.wait_for_token()
+
+        self.assertEqual(3, sleep.call_count)
+        self.assertEqual(1, RATE_LIMITER_TOKENS.value(limiter="memory", outcome="denied"))
+        self.assertEqual(2, RATE_LIMITER_TOKENS.value(limiter="memory", outcome="granted"))
+
+
+if __name__ == "__main__":
+    unittest.main()
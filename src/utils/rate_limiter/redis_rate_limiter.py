@@ -4,6 +4,7 @@ import time
 from typing import Optional
 import redis
 
+from utils.metrics import RATE_LIMITER_TOKENS, RATE_LIMITER_WAIT_SECONDS
 from utils.rate_limiter.rate_limiter_interface import RateLimiterInterface, RateLimiterConfig, RateLimitInfo
 
 logger = logging.getLogger(__name__)
@@ -56,8 +57,15 @@ class RedisRateLimiter(RateLimiterInterface):
 
     def wait_for_token(self) -> None:
         """Wait until a token is available."""
-        while not self.acquire():
-            time.sleep(0.1)  # Small sleep to prevent CPU spinning
+        with RATE_LIMITER_WAIT_SECONDS.time(limiter="redis"):
+            denied = False
+            while not self.acquire():
+                # one denial per call that waits, however many times it polls
+                if not denied:
+                    RATE_LIMITER_TOKENS.inc(limiter="redis", outcome="denied")
+                    denied = True
+                time.sleep(0.1)  # Small sleep to prevent CPU spinning
+        RATE_LIMITER_TOKENS.inc(limiter="redis", outcome="granted")
 
     def get_retry_after(self) -> int:
         """Get the retry-after time in seconds."""
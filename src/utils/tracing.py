@@ -0,0 +1,287 @@
+"""Optional span tracing across the fetch, transform and save stages.
+
+Tracing is off by default. Set ``TRACE_FILE`` and every finished span is
+appended to it as one JSON line. The field names follow the OTLP JSON
+encoding (``traceId``, ``spanId``, ``parentSpanId``, ``startTimeUnixNano``,
+...), so a local collector stand-in can load the file as it is.
+
+Without ``TRACE_FILE``, spans go through the ``opentelemetry`` API when it is
+installed. They are exported when the process has an SDK tracer provider, for
+example under ``opentelemetry-instrument``. Otherwise ``span`` hands out a
+no-op span.
+
+Spans nest through a context variable, so asyncio tasks started inside a span
+are its children. Code running in executor threads or worker processes starts
+new traces.
+
+    TRACE_FILE=trace.jsonl python -m spotify.spotify_postgres_saver --use-zip-data
+    python -m utils.tracing trace.jsonl
+    python -m utils.tracing trace.jsonl --tree --min-ms 50
+"""
+import argparse
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = "TRACE_FILE"
+STATUS_OK = "STATUS_CODE_OK"
+STATUS_ERROR = "STATUS_CODE_ERROR"
+
+
+class Span:
+    def __init__(
+        self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = STATUS_OK
+        self.status_message = None
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+class NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class FileSpanExporter:
+    """Appends finished spans to a JSON lines file, from any thread."""
+
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+        self.lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock, open(self.file_name, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[FileSpanExporter] = None
+_configured = False
+
+
+def configure_tracing(file_name: Optional[str] = None) -> None:
+    """Export spans to ``file_name``, or to ``$TRACE_FILE`` when that is set.
+    Called on the first span; call it again to change or turn off the file."""
+    global _exporter, _configured
+    file_name = file_name or os.environ.get(TRACE_FILE)
+    _exporter = FileSpanExporter(file_name) if file_name else None
+    _configured = True
+    if file_name:
+        logger.info(f"Writing trace spans to {file_name}")
+
+
+def get_exporter() -> Optional[FileSpanExporter]:
+    if not _configured:
+        configure_tracing()
+    return _exporter
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Trace the ``with`` block as a child of the current span. The yielded
+    span takes more attributes with ``set_attribute``."""
+    exporter = get_exporter()
+    if exporter is None:
+        if otel_trace is None:
+            yield NOOP_SPAN
+            return
+        attributes = {k: v for k, v in attributes.items() if v is not None}
+        tracer = otel_trace.get_tracer(__name__)
+        with tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+            yield otel_span
+        return
+
+    new_span = Span(name, current_span.get(), attributes)
+    token = current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.set_error(e)
+        raise
+    finally:
+        current_span.reset(token)
+        new_span.end_time = time.time_ns()
+        exporter.export(new_span)
+
+
+def traced(name: Optional[str] = None, count: Optional[str] = None):
+    """Trace every call of the decorated function or coroutine function, as
+    ``name`` or its qualified name. ``count`` names an argument whose length
+    is recorded as the ``items`` attribute."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func)
+
+        def attributes(args, kwargs) -> dict:
+            if count is None:
+                return {}
+            value = signature.bind_partial(*args, **kwargs).arguments.get(count)
+            # generators have no length up front
+            return {"items": len(value)} if hasattr(value, "__len__") else {}
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes(args, kwargs)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes(args, kwargs)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SpanSummary(NamedTuple):
+    name: str
+    count: int
+    # milliseconds
+    total: float
+    mean: float
+    max: float
+    errors: int
+
+
+def load_spans(file_name: str) -> List[dict]:
+    with open(file_name, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def duration_ms(span_dict: dict) -> float:
+    return (span_dict["endTimeUnixNano"] - span_dict["startTimeUnixNano"]) / 1e6
+
+
+def summarize(spans: List[dict]) -> List[SpanSummary]:
+    """Time per span name, the largest total first."""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for span_dict in spans:
+        name = span_dict["name"]
+        durations.setdefault(name, []).append(duration_ms(span_dict))
+        if span_dict["status"]["code"] == STATUS_ERROR:
+            errors[name] = errors.get(name, 0) + 1
+    summaries = [
+        SpanSummary(
+            name=name,
+            count=len(values),
+            total=sum(values),
+            mean=sum(values) / len(values),
+            max=max(values),
+            errors=errors.get(name, 0),
+        )
+        for name, values in durations.items()
+    ]
+    return sorted(summaries, key=lambda summary: summary.total, reverse=True)
+
+
+def format_summary(summaries: List[SpanSummary]) -> str:
+    lines = [f"{'span':<56}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}{'errors':>8}"]
+    for summary in summaries:
+        lines.append(
+            f"{summary.name:<56}{summary.count:>8}{summary.total:>12.1f}"
+            f"{summary.mean:>10.1f}{summary.max:>10.1f}{summary.errors:>8}"
+        )
+    return "\n".join(lines)
+
+
+def format_tree(spans: List[dict], min_ms: float = 0) -> str:
+    """Every trace as an indented tree of spans in start order, leaving out
+    spans shorter than ``min_ms`` and everything under them."""
+    children: Dict[Optional[str], List[dict]] = {}
+    span_ids = {span_dict["spanId"] for span_dict in spans}
+    for span_dict in spans:
+        parent = span_dict["parentSpanId"]
+        # the parent is missing when the run was cut short
+        children.setdefault(parent if parent in span_ids else None, []).append(span_dict)
+    for siblings in children.values():
+        siblings.sort(key=lambda span_dict: span_dict["startTimeUnixNano"])
+
+    lines = []
+
+    def add(span_dict: dict, depth: int) -> None:
+        duration = duration_ms(span_dict)
+        if duration < min_ms:
+            return
+        attributes = " ".join(f"{k}={v}" for k, v in span_dict["attributes"].items())
+        error = " ERROR" if span_dict["status"]["code"] == STATUS_ERROR else ""
+        lines.append(
+            f"{'  ' * depth}{span_dict['name']} {duration:.1f}ms {attributes}{error}".rstrip()
+        )
+        for child in children.get(span_dict["spanId"], []):
+            add(child, depth + 1)
+
+    for root in children.get(None, []):
+        add(root, 0)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a TRACE_FILE")
+    parser.add_argument("trace_file")
+    parser.add_argument("--tree", action="store_true", help="print every trace as a tree")
+    parser.add_argument(
+        "--min-ms", type=float, default=0, help="leave shorter spans out of the tree"
+    )
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace_file)
+    print(format_summary(summarize(spans)))
+    if args.tree:
+        print()
+        print(format_tree(spans, args.min_ms))
+
+
+if __name__ == "__main__":
+    main()
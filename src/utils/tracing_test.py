@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from utils.tracing import (
+    STATUS_ERROR,
+    configure_tracing,
+    format_tree,
+    load_spans,
+    span,
+    summarize,
+    traced,
+)
+
+
+class Saver:
+    @traced(count="tracks")
+    def save_tracks(self, tracks: list):
+        with span("write", table="tracks"):
+            pass
+
+    @traced("saver.fetch")
+    async def fetch(self):
+        await asyncio.gather(self.fetch_page(0), self.fetch_page(50))
+
+    async def fetch_page(self, offset: int):
+        with span("page", offset=offset):
+            await asyncio.sleep(0)
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.trace_file = os.path.join(self.tmp_dir.name, "trace.jsonl")
+        configure_tracing(self.trace_file)
+
+    def tearDown(self):
+        configure_tracing()
+        self.tmp_dir.cleanup()
+
+    def spans_by_name(self):
+        return {span_dict["name"]: span_dict for span_dict in load_spans(self.trace_file)}
+
+    def test_nested_spans_share_the_trace(self):
+        Saver().save_tracks([{"id": "1"}, {"id": "2"}])
+
+        spans = self.spans_by_name()
+        parent, child = spans["Saver.save_tracks"], spans["write"]
+        self.assertEqual({"items": 2}, parent["attributes"])
+        self.assertEqual({"table": "tracks"}, child["attributes"])
+        self.assertEqual(parent["spanId"], child["parentSpanId"])
+        self.assertEqual(parent["traceId"], child["traceId"])
+        self.assertIsNone(parent["parentSpanId"])
+        self.assertLessEqual(parent["startTimeUnixNano"], child["startTimeUnixNano"])
+        self.assertGreaterEqual(parent["endTimeUnixNano"], child["endTimeUnixNano"])
+
+    def test_async_tasks_are_children_of_the_awaiting_span(self):
+        asyncio.run(Saver().fetch())
+
+        spans = load_spans(self.trace_file)
+        root = next(s for s in spans if s["name"] == "saver.fetch")
+        pages = [s for s in spans if s["name"] == "page"]
+        self.assertEqual([root["spanId"]] * 2, [s["parentSpanId"] for s in pages])
+        self.assertEqual([0, 50], sorted(s["attributes"]["offset"] for s in pages))
+
+    def test_errors_are_recorded_and_raised(self):
+        with self.assertRaises(ValueError):
+            with span("merge") as merge_span:
+                merge_span.set_attribute("rows", 10)
+                raise ValueError("bad row")
+
+        merge = self.spans_by_name()["merge"]
+        self.assertEqual(STATUS_ERROR, merge["status"]["code"])
+        self.assertEqual("ValueError: bad row", merge["status"]["message"])
+        self.assertEqual({"rows": 10}, merge["attributes"])
+
+    def test_summary_and_tree(self):
+        with span("export"):
+            for offset in (0, 50):
+                with span("request", offset=offset):
+                    pass
+
+        spans = load_spans(self.trace_file)
+        summaries = {summary.name: summary for summary in summarize(spans)}
+        self.assertEqual(2, summaries["request"].count)
+        self.assertEqual(1, summaries["export"].count)
+        tree = format_tree(spans).splitlines()
+        self.assertTrue(tree[0].startswith("export "))
+        self.assertTrue(tree[1].startswith("  request ") and tree[1].endswith("offset=0"))
+        self.assertTrue(tree[2].endswith("offset=50"))
+
+    def test_nothing_is_written_when_turned_off(self):
+        configure_tracing()
+
+        with span("ignored") as ignored:
+            ignored.set_attribute("rows", 1)
+
+        self.assertFalse(os.path.exists(self.trace_file))
+
+
+if __name__ == "__main__":
+    unittest.main()